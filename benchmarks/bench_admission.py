@@ -0,0 +1,65 @@
+"""
+Admission control benchmark: decision latency as the offered load grows past
+what the server can serve, with and without --max-sessions.
+
+Starts server.py (turbo pacing) once per mode and session limit, then plays
+bot load (benchmarks/loadgen.py) at increasing concurrency. Without a limit,
+every connection is served at once and latency grows with the load; with one,
+connections beyond the limit get a Busy reply and retry after a backoff, so
+the sessions being served keep their latency. With --keep-alive each client
+plays its sessions over one connection, which holds no slot between them.
+
+Usage:
+    python -m benchmarks.bench_admission
+    python -m benchmarks.bench_admission --mode asyncio --max-sessions 20 --concurrency 50 200 800
+    python -m benchmarks.bench_admission --mode threaded --concurrency 20 200 --keep-alive
+"""
+import argparse
+
+from benchmarks import loadgen
+from benchmarks.bench_concurrency import raise_fd_limit, start_server
+from server import SERVER_MODES
+
+def run(modes=SERVER_MODES, max_sessions=20, concurrency=(20, 100, 400), sessions_per_client=5, rounds=5,
+        keep_alive=False):
+    """
+    Returns:
+        list of (mode, max_sessions, concurrency, loadgen result) tuples.
+    """
+    raise_fd_limit()
+    results = []
+    for mode in modes:
+        for limit in (0, max_sessions):
+            server, port = start_server(mode, ["--pacing", "turbo", "--max-sessions", str(limit)])
+            try:
+                for clients in concurrency:
+                    result = loadgen.run("127.0.0.1", port, clients * sessions_per_client, clients, rounds,
+                                         keep_alive=keep_alive)
+                    results.append((mode, limit, clients, result))
+            finally:
+                server.terminate()
+                server.wait()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Decision latency under overload, with and without a session limit")
+    parser.add_argument("--mode", choices=SERVER_MODES, help="Only this server mode (default: both)")
+    parser.add_argument("--max-sessions", type=int, default=20, help="Session limit compared against no limit")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[20, 100, 400],
+                        help="Concurrent bot sessions to offer, one run each")
+    parser.add_argument("--sessions-per-client", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--keep-alive", action="store_true", help="Each client keeps its connection between sessions")
+    args = parser.parse_args()
+    if args.max_sessions < 1:
+        parser.error("--max-sessions must be at least 1")
+
+    modes = [args.mode] if args.mode else SERVER_MODES
+    print(f"{'mode':<10}{'limit':>7}{'clients':>9}{'rounds/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'busy':>8}{'failed':>8}")
+    for mode, limit, clients, result in run(modes, args.max_sessions, args.concurrency,
+                                            args.sessions_per_client, args.rounds, args.keep_alive):
+        print(f"{mode:<10}{limit or 'none':>7}{clients:>9}{result['rounds_per_s']:>11,.0f}"
+              f"{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['busy']:>8,}{result['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
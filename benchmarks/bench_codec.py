@@ -0,0 +1,162 @@
+"""
+Codec microbenchmark: messages/second for protocol.py before and after the
+precompiled struct.Struct codec.
+
+"before" is the original implementation (format string parsed on every call,
+dict per decoded message, names padded/decoded every time), kept here as a
+reference. "after" is protocol.py as it is now, plus the zero-copy
+pack_into / unpack_from variants over a preallocated buffer.
+
+Usage:
+    python -m benchmarks.bench_codec
+"""
+import struct
+import timeit
+
+import protocol
+from consts import *
+
+# --- Reference: original (pre-codec) implementation ---
+def legacy_pad_string(text, length=TEAM_NAME_LEN):
+    encoded = text.encode('utf-8')
+    if len(encoded) < length:
+        return encoded + b'\x00' * (length - len(encoded))
+    return encoded[:length]
+
+def legacy_decode_string(bytes_data):
+    return bytes_data.decode('utf-8').rstrip('\x00')
+
+def legacy_pack_offer(server_port, server_name):
+    return struct.pack('!IBH32s', MAGIC_COOKIE, MSG_TYPE_OFFER, server_port, legacy_pad_string(server_name))
+
+def legacy_unpack_offer(data):
+    try:
+        cookie, msg_type, server_port, server_name_bytes = struct.unpack('!IBH32s', data)
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_OFFER:
+            return None
+        return {"type": "OFFER", "server_port": server_port, "server_name": legacy_decode_string(server_name_bytes)}
+    except struct.error:
+        return None
+
+def legacy_pack_request(team_name, rounds):
+    return struct.pack('!IBB32s', MAGIC_COOKIE, MSG_TYPE_REQUEST, rounds, legacy_pad_string(team_name))
+
+def legacy_unpack_request(data):
+    try:
+        cookie, msg_type, rounds, team_name_bytes = struct.unpack('!IBB32s', data)
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_REQUEST:
+            return None
+        return {"type": "REQUEST", "rounds": rounds, "team_name": legacy_decode_string(team_name_bytes)}
+    except struct.error:
+        return None
+
+def legacy_pack_payload_server(result, card_rank, card_suit):
+    return struct.pack('!IBBHB', MAGIC_COOKIE, MSG_TYPE_PAYLOAD, result, card_rank, card_suit)
+
+def legacy_unpack_payload_server(data):
+    try:
+        cookie, msg_type, result, rank, suit = struct.unpack('!IBBHB', data)
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+            return None
+        return {"type": "PAYLOAD_SERVER", "result": result, "rank": rank, "suit": suit}
+    except struct.error:
+        return None
+
+def legacy_pack_payload_client(decision):
+    return struct.pack('!IB5s', MAGIC_COOKIE, MSG_TYPE_PAYLOAD, decision.encode('utf-8'))
+
+def legacy_unpack_payload_client(data):
+    try:
+        cookie, msg_type, decision_bytes = struct.unpack('!IB5s', data)
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+            return None
+        return {"type": "PAYLOAD_CLIENT", "decision": legacy_decode_string(decision_bytes)}
+    except struct.error:
+        return None
+
+# --- Benchmark cases ---
+SERVER_NAME = "blACKjACK"
+TEAM_NAME = "Team Rocket"
+
+OFFER = legacy_pack_offer(40000, SERVER_NAME)
+REQUEST = legacy_pack_request(TEAM_NAME, 10)
+PAYLOAD_SERVER = legacy_pack_payload_server(RESULT_NOT_OVER, 12, 3)
+PAYLOAD_CLIENT = legacy_pack_payload_client(ACTION_HIT)
+
+# Preallocated buffers for the zero-copy variants
+OUT_BUFFER = bytearray(protocol.PAYLOAD_SERVER_SIZE * 64)
+IN_VIEW = memoryview(PAYLOAD_SERVER * 64)
+
+def legacy_pack_round():
+    # Eight cards of a round, one bytes object each, then joined for a single send
+    return b''.join([legacy_pack_payload_server(RESULT_NOT_OVER, 12, 3) for _ in range(8)])
+
+def codec_pack_round():
+    # Eight cards of a round written back to back into one preallocated buffer
+    offset = 0
+    for _ in range(8):
+        offset = protocol.pack_payload_server_into(OUT_BUFFER, offset, RESULT_NOT_OVER, 12, 3)
+    return offset
+
+# name -> (before, after, messages per call)
+CASES = {
+    "pack_offer": (
+        lambda: legacy_pack_offer(40000, SERVER_NAME),
+        lambda: protocol.pack_offer(40000, SERVER_NAME), 1),
+    "unpack_offer": (
+        lambda: legacy_unpack_offer(OFFER),
+        lambda: protocol.unpack_offer(OFFER), 1),
+    "pack_request": (
+        lambda: legacy_pack_request(TEAM_NAME, 10),
+        lambda: protocol.pack_request(TEAM_NAME, 10), 1),
+    "unpack_request": (
+        lambda: legacy_unpack_request(REQUEST),
+        lambda: protocol.unpack_request(REQUEST), 1),
+    "pack_payload_server": (
+        lambda: legacy_pack_payload_server(RESULT_NOT_OVER, 12, 3),
+        lambda: protocol.pack_payload_server(RESULT_NOT_OVER, 12, 3), 1),
+    "pack_payload_server_into": (
+        lambda: legacy_pack_payload_server(RESULT_NOT_OVER, 12, 3),
+        lambda: protocol.pack_payload_server_into(OUT_BUFFER, 18, RESULT_NOT_OVER, 12, 3), 1),
+    "unpack_payload_server": (
+        lambda: legacy_unpack_payload_server(PAYLOAD_SERVER),
+        lambda: protocol.unpack_payload_server(PAYLOAD_SERVER), 1),
+    "unpack_payload_server_from": (
+        lambda: legacy_unpack_payload_server(PAYLOAD_SERVER),
+        lambda: protocol.unpack_payload_server_from(IN_VIEW, 18), 1),
+    "pack_payload_client": (
+        lambda: legacy_pack_payload_client(ACTION_STAND),
+        lambda: protocol.pack_payload_client(ACTION_STAND), 1),
+    "unpack_payload_client": (
+        lambda: legacy_unpack_payload_client(PAYLOAD_CLIENT),
+        lambda: protocol.unpack_payload_client(PAYLOAD_CLIENT), 1),
+    "pack_round_8_payloads": (legacy_pack_round, codec_pack_round, 8),
+}
+
+def messages_per_second(func, number=200000, repeat=7):
+    """
+    Best-of-'repeat' throughput of calling func() 'number' times.
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return number / best
+
+def run(number=200000):
+    """
+    Returns {case: {"before": msgs/s, "after": msgs/s}}.
+    """
+    results = {}
+    for name, (before, after, messages) in CASES.items():
+        results[name] = {
+            "before": messages_per_second(before, number) * messages,
+            "after": messages_per_second(after, number) * messages,
+        }
+    return results
+
+def main():
+    results = run()
+    print(f"{'case':<28}{'before msg/s':>15}{'after msg/s':>15}{'speedup':>10}")
+    for name, r in results.items():
+        print(f"{name:<28}{r['before']:>15,.0f}{r['after']:>15,.0f}{r['after'] / r['before']:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
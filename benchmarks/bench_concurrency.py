@@ -0,0 +1,165 @@
+"""
+Concurrency benchmark: how many simultaneous sessions one server process holds.
+
+Starts server.py in the requested mode, opens N TCP sessions that each play
+the opening deal of a round and then sit waiting for their decision, samples
+the server's memory and thread count while all N are parked, then lets every
+session stand and finish.
+
+Usage:
+    python -m benchmarks.bench_concurrency --mode asyncio --sessions 10000
+    python -m benchmarks.bench_concurrency --mode threaded --sessions 2000
+"""
+import argparse
+import asyncio
+import os
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+import protocol
+from consts import *
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def raise_fd_limit():
+    """
+    Lifts the soft open-files limit to the hard limit (each session is one fd).
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+def start_server(mode, extra_args=()):
+    """
+    Launches server.py as a child process.
+    Returns:
+        (process, tcp_port) tuple once the server is listening.
+    """
+    proc = subprocess.Popen([sys.executable, "server.py", "--mode", mode, *extra_args],
+                            cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, preexec_fn=raise_fd_limit)
+
+    port = None
+    for line in proc.stdout:
+        match = re.search(r"Listening for TCP connections on port (\d+)", line)
+        if match:
+            port = int(match.group(1))
+            break
+    if port is None:
+        raise RuntimeError("Server exited before it started listening")
+
+    # Keep draining the server's output so its prints never block on a full pipe
+    drain = threading.Thread(target=lambda: [None for _ in proc.stdout])
+    drain.daemon = True
+    drain.start()
+    return proc, port
+
+def read_proc_status(pid):
+    """
+    Reads resident memory (KiB) and thread count of a process from /proc.
+    """
+    rss_kib, threads = 0, 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kib = int(line.split()[1])
+            elif line.startswith("Threads:"):
+                threads = int(line.split()[1])
+    return rss_kib, threads
+
+async def run_session(port, parked, release, connect_limit, stats):
+    """
+    Plays one single-round session: opening deal, wait, stand, read to the result.
+    """
+    async with connect_limit:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(protocol.pack_request("bench", 1))
+
+        # Player card, player card, dealer upcard
+        for _ in range(3):
+            msg = protocol.unpack_payload_server(await reader.readexactly(protocol.PAYLOAD_SERVER_SIZE))
+            if msg.result != RESULT_NOT_OVER:
+                break
+
+    parked()
+    await release.wait()
+
+    try:
+        writer.write(protocol.pack_payload_client(ACTION_STAND))
+        while True:
+            msg = protocol.unpack_payload_server(await reader.readexactly(protocol.PAYLOAD_SERVER_SIZE))
+            if msg.result != RESULT_NOT_OVER:
+                stats['finished'] += 1
+                break
+    except asyncio.IncompleteReadError:
+        stats['failed'] += 1
+    finally:
+        writer.close()
+
+async def drive(port, sessions, connect_batch, pid):
+    release = asyncio.Event()
+    all_parked = asyncio.Event()
+    stats = {'parked': 0, 'finished': 0, 'failed': 0}
+
+    def parked():
+        stats['parked'] += 1
+        if stats['parked'] == sessions:
+            all_parked.set()
+
+    connect_limit = asyncio.Semaphore(connect_batch)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(run_session(port, parked, release, connect_limit, stats))
+             for _ in range(sessions)]
+
+    await all_parked.wait()
+    open_time = time.perf_counter() - start
+    rss_kib, threads = read_proc_status(pid)
+
+    start = time.perf_counter()
+    release.set()
+    await asyncio.gather(*tasks)
+    finish_time = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "open_seconds": open_time,
+        "finish_seconds": finish_time,
+        "server_rss_mib": rss_kib / 1024,
+        "server_threads": threads,
+        "finished": stats['finished'],
+        "failed": stats['failed'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session benchmark")
+    parser.add_argument("--mode", choices=("threaded", "asyncio"), default="asyncio")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--pacing", choices=("human", "turbo"), default="human")
+    parser.add_argument("--connect-batch", type=int, default=500,
+                        help="Maximum handshakes in flight at once")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    proc, port = start_server(args.mode, ("--pacing", args.pacing))
+    try:
+        idle_rss, idle_threads = read_proc_status(proc.pid)
+        result = asyncio.run(drive(port, args.sessions, args.connect_batch, proc.pid))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"Mode: {args.mode} (pacing: {args.pacing})")
+    print(f"Idle server:   {idle_rss / 1024:.1f} MiB, {idle_threads} threads")
+    print(f"Parked {result['sessions']} sessions in {result['open_seconds']:.2f}s: "
+          f"{result['server_rss_mib']:.1f} MiB, {result['server_threads']} threads "
+          f"({(result['server_rss_mib'] * 1024 - idle_rss) / result['sessions']:.1f} KiB/session)")
+    print(f"Finished {result['finished']} sessions ({result['failed']} failed) "
+          f"in {result['finish_seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
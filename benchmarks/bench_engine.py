@@ -0,0 +1,78 @@
+"""
+Round engine benchmark: engine.RoundEngine alone, in-process, with no sockets.
+
+Plays basic strategy through the engine's events, as the simulator does, and
+again with every event packed into wire messages by server.encode_events (all
+of a session's per-round work except the reads and writes).
+
+    1 deck    reshuffled before every round (the server's default)
+    6 decks   cut card at 75%
+    8 decks   cut card at 90%
+
+Usage:
+    python -m benchmarks.bench_engine
+    python -m benchmarks.bench_engine --rounds 1000000
+"""
+import argparse
+import random
+import time
+
+import simulator
+from cards import Shoe
+from engine import RoundEngine, PLAYER_TURN
+from server import encode_events
+
+SHOES = {
+    "1 deck": (1, 0.0),
+    "6 decks": (6, 0.75),
+    "8 decks": (8, 0.9),
+}
+
+def play_encoded(engine, strategy, batched):
+    # simulator.play_round, plus the messages a session would send
+    messages = encode_events(engine.start_round(), batched)
+    player_hand = engine.player_hand
+    upcard_value = simulator.CARD_VALUE[engine.dealer_hand.cards[0]]
+    while engine.state is PLAYER_TURN:
+        if strategy[player_hand.soft_aces > 0][player_hand.total][upcard_value]:
+            messages += encode_events(engine.hit(), batched)
+        else:
+            messages += encode_events(engine.stand(), batched)
+    return messages
+
+CASES = {
+    "engine": lambda engine: simulator.play_round(engine, simulator.BASIC),
+    "+ v2 encode": lambda engine: play_encoded(engine, simulator.BASIC, True),
+    "+ v1 encode": lambda engine: play_encoded(engine, simulator.BASIC, False),
+}
+
+def rounds_per_second(play, decks, penetration, rounds, seed=1):
+    engine = RoundEngine(Shoe(decks, penetration, rng=random.Random(seed)))
+    engine.join(rounds)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        play(engine)
+    return rounds / (time.perf_counter() - start)
+
+def run(rounds=200000):
+    """
+    Returns {case: {shoe: rounds per second}}.
+    """
+    return {
+        case: {shoe: rounds_per_second(play, decks, penetration, rounds)
+               for shoe, (decks, penetration) in SHOES.items()}
+        for case, play in CASES.items()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="RoundEngine throughput, in-process")
+    parser.add_argument("--rounds", type=int, default=200000, help="Rounds per case and shoe")
+    args = parser.parse_args()
+
+    results = run(args.rounds)
+    print(f"{'case':<14}" + "".join(f"{shoe:>14}" for shoe in SHOES) + "   (rounds/s)")
+    for case, by_shoe in results.items():
+        print(f"{case:<14}" + "".join(f"{by_shoe[shoe]:>14,.0f}" for shoe in SHOES))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Decision-time benchmark for the client's odds engine (probability.py).
+
+For every starting hand (two cards under 21) against every dealer upcard,
+times one full decision: the exact dealer outcome distribution plus the EV of
+hitting and standing. "cold" clears every cache first, as for the first
+decision on a fresh shoe; "warm" repeats the same decision from the caches.
+Each decision is timed --repeat times and its fastest time kept, so that a
+scheduler hiccup is not reported as a slow decision.
+
+Exits with status 1 if any decision takes longer than TARGET_MS.
+
+Usage:
+    python -m benchmarks.bench_ev
+    python -m benchmarks.bench_ev --repeat 1
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import probability
+from cards import Hand, RANK_VALUE
+
+# Budget for one decision at the client prompt
+TARGET_MS = 5.0
+REPEAT = 3
+
+RANKS = range(1, 11)  # J/Q/K score like 10
+
+def starting_positions(decks):
+    """
+    Yields (total, soft, upcard_rank, composition) for every two-card hand under 21.
+    """
+    full = probability.full_composition(decks)
+    for first, second in itertools.combinations_with_replacement(RANKS, 2):
+        hand = Hand()
+        hand.add_value(RANK_VALUE[first])
+        hand.add_value(RANK_VALUE[second])
+        if hand.total >= 21:
+            continue
+        for upcard in RANKS:
+            composition = probability.remove_ranks(full, (first, second, upcard))
+            yield hand.total, hand.is_soft, upcard, composition
+
+def decide(total, soft, upcard, composition):
+    probability.dealer_distribution(upcard, composition)
+    probability.decision_ev(total, soft, upcard, composition)
+
+def time_decisions(decks, cold, repeat=REPEAT):
+    """
+    Returns the sorted per-decision times in milliseconds (the fastest of
+    'repeat' timings of each decision).
+    """
+    times = []
+    for position in starting_positions(decks):
+        fastest = None
+        for _ in range(repeat):
+            if cold:
+                probability.clear_caches()
+            else:
+                decide(*position)
+            start = time.perf_counter()
+            decide(*position)
+            elapsed = time.perf_counter() - start
+            if fastest is None or elapsed < fastest:
+                fastest = elapsed
+        times.append(fastest * 1e3)
+    return sorted(times)
+
+def summarize(times):
+    return {
+        "mean_ms": sum(times) / len(times),
+        "p50_ms": times[len(times) // 2],
+        "p95_ms": times[int(len(times) * 0.95)],
+        "max_ms": times[-1],
+    }
+
+def run(deck_counts=(1, 6), repeat=REPEAT):
+    """
+    Returns {"<decks>-deck cold|warm": {"mean_ms", "p50_ms", "p95_ms", "max_ms"}}.
+    """
+    results = {}
+    for decks in deck_counts:
+        for cold in (True, False):
+            results[f"{decks}-deck {'cold' if cold else 'warm'}"] = summarize(time_decisions(decks, cold, repeat))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every first decision of the odds engine")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Timings per decision (the fastest is kept)")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = run(repeat=args.repeat)
+    print(f"{'case':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    over = []
+    for name, r in results.items():
+        flag = "  OVER TARGET" if r["max_ms"] > TARGET_MS else ""
+        print(f"{name:<14}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['max_ms']:>10.3f}{flag}")
+        if flag:
+            over.append(name)
+    print(f"Target: {TARGET_MS:.0f} ms per decision")
+    if over:
+        print(f"FAIL: the slowest decision is over the target in {', '.join(over)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
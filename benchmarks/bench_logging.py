@@ -0,0 +1,55 @@
+"""
+Logging benchmark: server throughput with per-card trace logging on and off.
+
+Starts server.py (turbo pacing) once per mode and logging setting, with its
+output going to a pipe as it would under a process manager, and plays the same
+bot load against it (benchmarks/loadgen.py).
+
+Usage:
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --mode asyncio --sessions 2000 --log-format json
+"""
+import argparse
+
+from benchmarks import loadgen
+from benchmarks.bench_concurrency import raise_fd_limit, start_server
+from server import SERVER_MODES
+import gamelog
+
+SETTINGS = (("trace off", []), ("trace on", ["--trace"]))
+
+def run(modes=SERVER_MODES, sessions=1000, concurrency=20, rounds=10, log_format="text"):
+    """
+    Returns:
+        list of (mode, setting, loadgen result) tuples.
+    """
+    raise_fd_limit()
+    results = []
+    for mode in modes:
+        for setting, flags in SETTINGS:
+            server, port = start_server(mode, ["--pacing", "turbo", "--log-format", log_format, *flags])
+            try:
+                result = loadgen.run("127.0.0.1", port, sessions, concurrency, rounds)
+            finally:
+                server.terminate()
+                server.wait()
+            results.append((mode, setting, result))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Server rounds/s with trace logging on and off")
+    parser.add_argument("--mode", choices=SERVER_MODES, help="Only this server mode (default: both)")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--log-format", choices=gamelog.LOG_FORMATS, default="text")
+    args = parser.parse_args()
+
+    modes = [args.mode] if args.mode else SERVER_MODES
+    print(f"{'mode':<10}{'logging':<12}{'rounds/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'failed':>8}")
+    for mode, setting, result in run(modes, args.sessions, args.concurrency, args.rounds, args.log_format):
+        print(f"{mode:<10}{setting:<12}{result['rounds_per_s']:>12,.0f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
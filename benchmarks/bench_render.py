@@ -0,0 +1,100 @@
+"""
+Client output benchmark: CPU the interactive client spends per round in each
+output mode (render.py), against a local turbo server.
+
+The client plays through its real game loop (client.BlackjackClient.play_rounds),
+standing on every hand, with its answers read from a prepared stdin and its
+output written to os.devnull. Only the client process's CPU time is counted.
+Writes are the write calls the output took (one per flush). The odds caches
+(probability.py) are shared by the cases: the first one fills them.
+
+    ansi          colored text with odds (the interactive default)
+    ansi, no odds the same text without the bust odds and EVs
+    quiet         session summaries only
+    json          one JSON object per event
+
+Usage:
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --sessions 20 --rounds 200
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+from benchmarks.bench_concurrency import start_server
+from client import BlackjackClient
+from render import make_renderer
+
+CASES = {
+    "ansi": ("ansi", None),
+    "ansi, no odds": ("ansi", False),
+    "quiet": ("quiet", None),
+    "json": ("json", None),
+}
+
+class CountingSink:
+    """
+    A text sink that counts the writes it gets (standing in for a terminal or a pipe).
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.writes = 0
+        self.chars = 0
+
+    def write(self, text):
+        self.writes += 1
+        self.chars += len(text)
+        self.out.write(text)
+
+    def flush(self):
+        self.out.flush()
+
+def measure(port, mode, odds, sessions, rounds):
+    """
+    Returns:
+        (CPU microseconds per round, writes per round, characters per round)
+    """
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        sink = CountingSink(devnull)
+        client = BlackjackClient("Render", renderer=make_renderer(mode, sink, odds))
+        stdin = sys.stdin
+        # Standing needs one answer per round
+        sys.stdin = io.StringIO("s\n" * (sessions * rounds))
+        try:
+            started = time.process_time()
+            for _ in range(sessions):
+                client.connect_to_server("127.0.0.1", port, rounds)
+            cpu = time.process_time() - started
+        finally:
+            sys.stdin = stdin
+            client.close_connection()
+    played = sessions * rounds
+    return cpu / played * 1e6, sink.writes / played, sink.chars / played
+
+def run(sessions=10, rounds=200, cases=CASES):
+    """
+    Returns {case: (CPU us per round, writes per round, characters per round)}.
+    """
+    server, port = start_server("threaded", ["--pacing", "turbo"])
+    try:
+        return {case: measure(port, mode, odds, sessions, rounds) for case, (mode, odds) in cases.items()}
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Client CPU per round by output mode")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=200, help="Rounds per session (at most 255)")
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.rounds)
+    print(f"{'mode':<14}{'CPU/round':>12}{'writes/round':>14}{'chars/round':>13}")
+    for case, (cpu_us, writes, chars) in results.items():
+        print(f"{case:<14}{cpu_us:>9.1f} us{writes:>14.2f}{chars:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Dealing benchmark: time and memory allocated per round for each way of
+getting a shuffled deck.
+
+    original  new Deck of 52 (rank, suit) tuples every round (pre-cards.py server)
+    int deck  new array('B') deck copied from FULL_DECK every round
+    shoe      one persistent Shoe, reshuffled in place every round (server default)
+    6-deck    one persistent 6-deck Shoe with the cut card at 75%
+
+Each "round" deals 6 cards. Allocation is measured with tracemalloc as the
+peak memory a round needs on top of what is already allocated.
+
+Usage:
+    python -m benchmarks.bench_shoe
+"""
+import random
+import time
+import tracemalloc
+
+from cards import *
+
+CARDS_PER_ROUND = 6
+
+class OriginalDeck:
+    # The server's Deck before cards.py, kept as a reference
+    def __init__(self):
+        self.cards = []
+        for suit in range(4):
+            for rank in range(1, 14):
+                self.cards.append((rank, suit))
+        random.shuffle(self.cards)
+
+    def draw_card(self):
+        return self.cards.pop()
+
+def round_original(_):
+    deck = OriginalDeck()
+    for _ in range(CARDS_PER_ROUND):
+        deck.draw_card()
+
+def round_int_deck(_):
+    cards = FULL_DECK[:]
+    random.shuffle(cards)
+    for _ in range(CARDS_PER_ROUND):
+        cards.pop()
+
+def round_shoe(shoe):
+    shoe.start_round()
+    for _ in range(CARDS_PER_ROUND):
+        shoe.draw_card()
+
+CASES = {
+    "original": (round_original, lambda: None),
+    "int deck": (round_int_deck, lambda: None),
+    "shoe": (round_shoe, lambda: Shoe(1, 0.0)),
+    "6-deck": (round_shoe, lambda: Shoe(6, 0.75)),
+}
+
+def time_per_round(play_round, state, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        play_round(state)
+    return (time.perf_counter() - start) / rounds
+
+def bytes_per_round(play_round, state, rounds):
+    tracemalloc.start()
+    total = 0
+    for _ in range(rounds):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        play_round(state)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / rounds
+
+def run(rounds=20000):
+    """
+    Returns {case: {"us_per_round": ..., "bytes_per_round": ...}}.
+    """
+    results = {}
+    for name, (play_round, make_state) in CASES.items():
+        state = make_state()
+        results[name] = {
+            "us_per_round": time_per_round(play_round, state, rounds) * 1e6,
+            "bytes_per_round": bytes_per_round(play_round, state, rounds // 10),
+        }
+    return results
+
+def main():
+    results = run()
+    print(f"{'case':<10}{'us/round':>10}{'bytes/round':>14}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['us_per_round']:>10.1f}{r['bytes_per_round']:>14.0f}")
+
+if __name__ == "__main__":
+    main()
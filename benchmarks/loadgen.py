@@ -0,0 +1,152 @@
+"""
+Load generator: many concurrent bot sessions against one server.
+
+Connects straight to host:port (no UDP discovery), keeps --concurrency
+sessions open at a time until --sessions have been played, each by a headless
+BotClient (bot.py) with the given strategy. Reports sessions/s, rounds/s and
+the p50/p95/p99 round-trip of a decision (sending Hit/Stand until the server's
+first reply). A session turned away with a Busy reply is counted and retried
+after a backoff (discovery.backoff_delay); it does not count as failed.
+
+Usage:
+    python -m benchmarks.loadgen --host 127.0.0.1 --port 40000 --sessions 1000 --concurrency 50
+    python -m benchmarks.loadgen --spawn asyncio --sessions 1000   # start a local turbo server
+    python -m benchmarks.loadgen --spawn threaded --max-sessions 50 --concurrency 500   # overload
+    python -m benchmarks.loadgen --spawn asyncio --table           # bots share tables
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.bench_concurrency import raise_fd_limit, start_server
+from bot import BotClient, STRATEGY_NAMES
+from client import ServerBusy
+from consts import *
+from discovery import backoff_delay
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list (0.0 if empty).
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def run(host, port, sessions=500, concurrency=50, rounds=10, strategy="basic",
+        protocol_version=PROTOCOL_VERSION, timeout=30.0, keep_alive=False, table=False):
+    """
+    Plays 'sessions' sessions, 'concurrency' at a time, one thread per open session.
+    With keep_alive, each thread plays all its sessions over one connection; with
+    table, the bots play at shared tables.
+    Returns:
+        dict: sessions, errors, busy (Busy replies), rounds, decisions, seconds,
+              sessions_per_s, rounds_per_s and p50_ms / p95_ms / p99_ms decision latency.
+    """
+    remaining = [sessions]
+    lock = threading.Lock()
+    results = []
+    errors = []
+    busy_replies = [0]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        bot = BotClient(f"Load{seed}", strategy, protocol_version, rng=rng, keep_alive=keep_alive, table=table)
+        attempt = 0
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    bot.close_connection()
+                    return
+                remaining[0] -= 1
+            try:
+                stats = bot.play_session(host, port, rounds, timeout=timeout)
+                attempt = 0
+            except ServerBusy as busy:
+                with lock:
+                    busy_replies[0] += 1
+                    remaining[0] += 1  # Not played: retry it after the backoff
+                time.sleep(backoff_delay(attempt, busy.retry_after, rng))
+                attempt += 1
+                continue
+            except (OSError, ConnectionError) as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                results.append(stats)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(min(concurrency, sessions))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies = sorted(latency for stats in results for latency in stats.latencies)
+    total_rounds = sum(stats.rounds for stats in results)
+    return {
+        "sessions": len(results),
+        "errors": len(errors),
+        "busy": busy_replies[0],
+        "rounds": total_rounds,
+        "decisions": len(latencies),
+        "seconds": seconds,
+        "sessions_per_s": len(results) / seconds,
+        "rounds_per_s": total_rounds / seconds,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+def print_report(result):
+    print(f"Sessions:  {result['sessions']:,} in {result['seconds']:.2f}s "
+          f"({result['sessions_per_s']:,.1f}/s), {result['errors']} failed, {result['busy']:,} busy replies")
+    print(f"Rounds:    {result['rounds']:,} ({result['rounds_per_s']:,.1f}/s)")
+    print(f"Decisions: {result['decisions']:,}, round-trip "
+          f"p50 {result['p50_ms']:.2f} ms | p95 {result['p95_ms']:.2f} ms | p99 {result['p99_ms']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent bot sessions against a Blackjack server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Server TCP port (or use --spawn)")
+    parser.add_argument("--spawn", choices=("threaded", "asyncio"),
+                        help="Start a local turbo-paced server in this mode instead of using --port")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="With --spawn: run the server in supervisor mode with N worker processes")
+    parser.add_argument("--max-sessions", type=int, default=0,
+                        help="With --spawn: the server's --max-sessions (0 = no limit)")
+    parser.add_argument("--sessions", type=int, default=500, help="Sessions to play in total")
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions open at the same time")
+    parser.add_argument("--rounds", type=int, default=10, help="Rounds per session")
+    parser.add_argument("--strategy", default="basic", help=STRATEGY_NAMES)
+    parser.add_argument("--protocol", type=int, choices=(PROTOCOL_V1, PROTOCOL_V2), default=PROTOCOL_VERSION)
+    parser.add_argument("--keep-alive", action="store_true",
+                        help="Each concurrent bot plays all its sessions over one connection")
+    parser.add_argument("--table", action="store_true", help="Bots play at shared tables")
+    args = parser.parse_args()
+
+    if not 1 <= args.rounds <= MAX_ROUNDS:
+        parser.error(f"--rounds must be between 1 and {MAX_ROUNDS}")
+    if (args.port is None) == (args.spawn is None):
+        parser.error("give exactly one of --port and --spawn")
+
+    raise_fd_limit()
+    server = None
+    port = args.port
+    if args.spawn:
+        server, port = start_server(args.spawn, ["--pacing", "turbo", "--workers", str(args.workers),
+                                                 "--max-sessions", str(args.max_sessions)])
+    try:
+        result = run(args.host, port, args.sessions, args.concurrency, args.rounds, args.strategy, args.protocol,
+                     keep_alive=args.keep_alive, table=args.table)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    print_report(result)
+
+if __name__ == "__main__":
+    main()
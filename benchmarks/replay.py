@@ -0,0 +1,211 @@
+"""
+Journal replay: re-drives the sessions recorded in server journals
+(journal.py) against a live server, as a load test shaped like real traffic.
+
+Each recorded private session is played again by a bot with the same protocol
+version, rounds and pacing flag, starting at its recorded offset and making
+the recorded decisions after the recorded think times (both divided by
+--speed; --speed 0 plays back to back with no waits). The live server deals
+its own cards, so the decisions are replayed in order: a round that ends
+sooner than it did skips the rest, and one that goes on longer stands.
+Table sessions are not replayed (how their rounds go depends on who else sat
+at the table), nor are autoplay sessions (the server made their decisions).
+
+Reports the same numbers as benchmarks/loadgen.py.
+
+Usage:
+    python server.py --journal server.journal            # record some traffic
+    python -m benchmarks.replay server.journal --port 40000
+    python -m benchmarks.replay server.journal.0 server.journal.1 --spawn asyncio --speed 10
+"""
+import argparse
+import threading
+import time
+from collections import defaultdict
+
+import journal
+import pacing
+from benchmarks.bench_concurrency import raise_fd_limit, start_server
+from benchmarks.loadgen import percentile, print_report
+from bot import BotClient
+from client import ServerBusy
+from consts import *
+from discovery import backoff_delay
+
+class RecordedSession:
+    """
+    What a bot needs to play one journaled session again.
+    """
+
+    __slots__ = ("start", "version", "rounds", "flags", "moves")
+
+    def __init__(self, start, version, rounds, flags):
+        self.start = start      # Seconds after the first session of the journal started
+        self.version = version
+        self.rounds = rounds
+        self.flags = flags
+        self.moves = defaultdict(list)  # round -> [(hit, think seconds)] in order
+
+def load_sessions(paths):
+    """
+    Reads the private sessions of one or more journals, ordered by start time.
+    Returns:
+        list of RecordedSession
+    """
+    sessions = []
+    for path in paths:
+        by_id = {}
+        last_ms = {}  # Time of each session's latest record: what the player saw before deciding
+        with journal.JournalReader(path) as recorded:
+            for record in recorded:
+                if record.kind == journal.KIND_SESSION:
+                    if not record.extra & FLAG_TABLE and record.who == journal.SESSION_PLAYER:
+                        by_id[record.session] = RecordedSession(record.ms / 1e3, record.value, record.round,
+                                                                record.extra)
+                elif record.kind == journal.KIND_DECISION and record.session in by_id:
+                    think = (record.ms - last_ms.get(record.session, record.ms)) / 1e3
+                    by_id[record.session].moves[record.round].append((record.value == journal.DECISION_HIT, think))
+                last_ms[record.session] = record.ms
+        sessions.extend(session for session in by_id.values() if session.rounds)
+    sessions.sort(key=lambda session: session.start)
+    if sessions:
+        first = sessions[0].start
+        for session in sessions:
+            session.start -= first
+    return sessions
+
+class ReplayBot(BotClient):
+    """
+    A bot that makes a recorded session's decisions instead of following a strategy.
+    """
+
+    def __init__(self, session, speed):
+        super().__init__("Replay", protocol_version=min(session.version, PROTOCOL_VERSION))
+        self.session = session
+        self.speed = speed
+        self.moves = iter(())
+        self.should_hit = self.next_move
+
+    def pack_request(self, rounds_to_play, keep_alive=True, flags=0):
+        return super().pack_request(rounds_to_play, keep_alive, flags | (self.session.flags & FLAG_TURBO))
+
+    def play_round(self, tcp_socket, round_num, latencies):
+        self.moves = iter(self.session.moves.get(round_num, ()))
+        return super().play_round(tcp_socket, round_num, latencies)
+
+    def next_move(self, hand, upcard_value):
+        # Out of recorded moves (the live round went on longer): stand
+        hit, think = next(self.moves, (False, 0.0))
+        if self.speed and think > 0:
+            time.sleep(think / self.speed)
+        return hit
+
+def run(host, port, sessions, concurrency=50, speed=1.0, timeout=30.0):
+    """
+    Replays 'sessions' with up to 'concurrency' open at a time, each started no
+    earlier than its recorded offset (divided by 'speed').
+    Returns:
+        dict: The same keys as loadgen.run.
+    """
+    queue = list(reversed(sessions))
+    lock = threading.Lock()
+    results = []
+    errors = []
+    busy_replies = [0]
+    started = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                session = queue.pop()
+            if speed:
+                delay = started + session.start / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            bot = ReplayBot(session, speed)
+            attempt = 0
+            while True:
+                try:
+                    stats = bot.play_session(host, port, session.rounds, timeout=timeout)
+                except ServerBusy as busy:
+                    with lock:
+                        busy_replies[0] += 1
+                    time.sleep(backoff_delay(attempt, busy.retry_after))
+                    attempt += 1
+                    continue
+                except (OSError, ConnectionError) as e:
+                    with lock:
+                        errors.append(e)
+                    break
+                with lock:
+                    results.append(stats)
+                break
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(concurrency, len(sessions)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies = sorted(latency for stats in results for latency in stats.latencies)
+    total_rounds = sum(stats.rounds for stats in results)
+    return {
+        "sessions": len(results),
+        "errors": len(errors),
+        "busy": busy_replies[0],
+        "rounds": total_rounds,
+        "decisions": len(latencies),
+        "seconds": seconds,
+        "sessions_per_s": len(results) / seconds,
+        "rounds_per_s": total_rounds / seconds,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay journaled sessions against a Blackjack server")
+    parser.add_argument("journals", nargs="+", help="Journal files written by server.py --journal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Server TCP port (or use --spawn)")
+    parser.add_argument("--spawn", choices=("threaded", "asyncio"),
+                        help="Start a local server in this mode instead of using --port")
+    parser.add_argument("--pacing", choices=sorted(pacing.PRESETS), default=pacing.TURBO.name,
+                        help="With --spawn: the server's default pacing (sessions recorded with the turbo flag "
+                             "ask for it themselves)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions open at the same time, at most")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback speed: 2 halves every wait, 0 plays without waiting")
+    args = parser.parse_args()
+
+    if (args.port is None) == (args.spawn is None):
+        parser.error("give exactly one of --port and --spawn")
+    if args.speed < 0 or args.concurrency < 1:
+        parser.error("--speed must not be negative and --concurrency must be at least 1")
+    try:
+        sessions = load_sessions(args.journals)
+    except (OSError, journal.JournalError) as e:
+        parser.error(str(e))
+    if not sessions:
+        parser.error("no private sessions in the given journals")
+    print(f"Replaying {len(sessions):,} sessions "
+          f"({sum(session.rounds for session in sessions):,} rounds) at speed {args.speed:g}")
+
+    raise_fd_limit()
+    server = None
+    port = args.port
+    if args.spawn:
+        server, port = start_server(args.spawn, ["--pacing", args.pacing])
+    try:
+        result = run(args.host, port, sessions, args.concurrency, args.speed)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    print_report(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark suite: the hot paths of the game plus an end-to-end run, written to
+JSON so runs can be compared, with a regression check against a saved run.
+
+    codec.*     protocol.py packing/unpacking
+    scoring.*   Hand and the client's score helpers
+    dealing.*   Shoe rounds (1 deck reshuffled per round, 6 decks with a cut card)
+    stats.*     client statistics: bust odds (cached/cold), full decision EV (cold)
+    engine.*    RoundEngine rounds in-process (no sockets), bare and with v2 encoding
+    simulator.* vectorized Monte Carlo throughput
+    e2e.*       server.py on loopback (threaded and asyncio), driven by bot sessions
+
+Every metric records whether lower or higher is better; the regression check
+flags any metric that got worse by more than --threshold (a ratio, default 10%)
+and exits with status 1. Compare runs made on the same, otherwise idle machine:
+on a shared or throttled CPU, nanosecond-scale metrics easily move by more than
+the threshold between identical runs.
+
+Usage:
+    python -m benchmarks.suite --output after.json
+    python -m benchmarks.suite --output after.json --baseline before.json --threshold 0.15
+    python -m benchmarks.suite --only codec,scoring --quick
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+import client
+import probability
+import protocol
+import simulator
+from benchmarks import bench_engine, bench_ev, loadgen
+from benchmarks.bench_concurrency import ROOT_DIR, raise_fd_limit, start_server
+from cards import *
+from consts import *
+
+DEFAULT_THRESHOLD = 0.10
+
+LOWER, HIGHER = "lower", "higher"
+
+def metric(value, unit, better=LOWER):
+    return {"value": value, "unit": unit, "better": better}
+
+def ns_per_call(func, number, repeat=5):
+    """
+    Best-of-'repeat' time of one func() call, in nanoseconds.
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+# --- Microbenchmarks ---
+def bench_codec(scale):
+    offer = protocol.pack_offer(40000, "blACKjACK")
+    request = protocol.pack_request_v2("Team Rocket", 10)
+    payload = protocol.pack_payload_server(RESULT_NOT_OVER, 12, 3)
+    batch = protocol.pack_payload_batch(RESULT_WIN, [(10, 1), (7, 2), (1, 0)])
+    decision = protocol.pack_decision(3, ACTION_HIT)
+    load_offer = protocol.pack_offer_load(40000, "blACKjACK", 12, 100)
+    out = bytearray(64)
+    cases = {
+        "pack_offer": lambda: protocol.pack_offer(40000, "blACKjACK"),
+        "unpack_offer": lambda: protocol.unpack_offer(offer),
+        "set_offer_sessions": lambda: protocol.set_offer_sessions(load_offer, 13),
+        "unpack_offer_load": lambda: protocol.unpack_offer_load(load_offer),
+        "unpack_request": lambda: protocol.unpack_request(request),
+        "pack_payload_server": lambda: protocol.pack_payload_server(RESULT_NOT_OVER, 12, 3),
+        "pack_payload_server_into": lambda: protocol.pack_payload_server_into(out, 0, RESULT_NOT_OVER, 12, 3),
+        "unpack_payload_server_from": lambda: protocol.unpack_payload_server_from(payload),
+        "pack_payload_batch": lambda: protocol.pack_payload_batch(RESULT_WIN, [(10, 1), (7, 2), (1, 0)]),
+        "unpack_payload_batch_from": lambda: protocol.unpack_payload_batch_from(batch),
+        "unpack_decision_from": lambda: protocol.unpack_decision_from(decision),
+    }
+    return {name: metric(ns_per_call(func, 100000 // scale), "ns/call") for name, func in cases.items()}
+
+def bench_scoring(scale):
+    cards = [0, 13, 26, 9, 4, 2]  # Two Aces among them: exercises the soft total
+    ranks = [CARD_RANK[card] for card in cards]
+
+    def hand_add():
+        hand = Hand()
+        for card in cards:
+            hand.add(card)
+        return hand.total
+
+    return {
+        "hand_add_6_cards": metric(ns_per_call(hand_add, 100000 // scale), "ns/call"),
+        "calculate_hand_score": metric(ns_per_call(lambda: client.calculate_hand_score(ranks), 100000 // scale), "ns/call"),
+    }
+
+def bench_dealing(scale):
+    def deal(shoe):
+        shoe.start_round()
+        for _ in range(6):
+            shoe.draw_card()
+
+    single, six = Shoe(1, 0.0), Shoe(6, 0.75)
+    return {
+        "shoe_round_1_deck": metric(ns_per_call(lambda: deal(single), 20000 // scale), "ns/round"),
+        "shoe_round_6_decks": metric(ns_per_call(lambda: deal(six), 20000 // scale), "ns/round"),
+    }
+
+def bench_stats(scale):
+    def cold_stats():
+        probability.bust_probability.cache_clear()
+        return client.calculate_stats([10, 6], 9)
+
+    ev = bench_ev.summarize(bench_ev.time_decisions(1, cold=True))
+    return {
+        "calculate_stats": metric(ns_per_call(lambda: client.calculate_stats([10, 6], 9), 50000 // scale), "ns/call"),
+        "calculate_stats_cold": metric(ns_per_call(cold_stats, 20000 // scale), "ns/call"),
+        "decision_ev_cold_mean": metric(ev["mean_ms"], "ms"),
+        "decision_ev_cold_p95": metric(ev["p95_ms"], "ms"),
+        "decision_ev_cold_max": metric(ev["max_ms"], "ms"),
+    }
+
+def bench_engine_rounds(scale):
+    rounds = 100000 // scale
+    return {
+        "rounds_6_decks": metric(bench_engine.rounds_per_second(bench_engine.CASES["engine"], 6, 0.75, rounds),
+                                 "rounds/s", HIGHER),
+        "encoded_v2_6_decks": metric(bench_engine.rounds_per_second(bench_engine.CASES["+ v2 encode"], 6, 0.75, rounds),
+                                     "rounds/s", HIGHER),
+    }
+
+def bench_simulator(scale):
+    if simulator.np is None:
+        return {}
+    rounds = 200000 // scale
+    result = simulator.simulate(rounds, "basic", workers=1, seed=1)
+    return {"vectorized_1_deck": metric(rounds / result["seconds"], "rounds/s", HIGHER)}
+
+# --- End to end ---
+def bench_e2e(scale):
+    raise_fd_limit()
+    results = {}
+    for mode in ("threaded", "asyncio"):
+        server, port = start_server(mode, ["--pacing", "turbo"])
+        try:
+            run = loadgen.run("127.0.0.1", port, sessions=400 // scale, concurrency=20, rounds=10)
+        finally:
+            server.terminate()
+            server.wait()
+        results[f"{mode}_rounds_per_s"] = metric(run["rounds_per_s"], "rounds/s", HIGHER)
+        results[f"{mode}_decision_p50"] = metric(run["p50_ms"], "ms")
+        results[f"{mode}_decision_p99"] = metric(run["p99_ms"], "ms")
+        results[f"{mode}_failed_sessions"] = metric(run["errors"], "sessions")
+    return results
+
+GROUPS = {
+    "codec": bench_codec,
+    "scoring": bench_scoring,
+    "dealing": bench_dealing,
+    "stats": bench_stats,
+    "engine": bench_engine_rounds,
+    "simulator": bench_simulator,
+    "e2e": bench_e2e,
+}
+
+def environment():
+    """
+    Where the numbers came from: interpreter, machine and commit.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": getattr(simulator.np, "__version__", None),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def run(groups=tuple(GROUPS), quick=False):
+    """
+    Runs the given benchmark groups.
+    Returns:
+        dict: {"environment": {...}, "metrics": {"group.name": {"value", "unit", "better"}}}
+    """
+    scale = 10 if quick else 1
+    metrics = {}
+    for group in groups:
+        print(f"Running {group}...", file=sys.stderr)
+        for name, result in GROUPS[group](scale).items():
+            metrics[f"{group}.{name}"] = result
+    return {"environment": environment(), "metrics": metrics}
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares every metric present in both runs.
+    Returns:
+        list of (name, old, new, change, regressed) where change > 0 means worse
+        (e.g. 0.25 = 25% slower), and regressed is change > threshold.
+    """
+    rows = []
+    for name, new in current["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None:
+            continue
+        # Ratio of the value in the worse direction to the other. Zeros are explicit: a failure
+        # count leaving 0 or a throughput dropping to 0 is an infinite regression, 0 -> 0 no change
+        if new["better"] == LOWER:
+            worse, better = new["value"], old["value"]
+        else:
+            worse, better = old["value"], new["value"]
+        if better:
+            change = worse / better - 1.0
+        else:
+            change = float("inf") if worse else 0.0
+        rows.append((name, old["value"], new["value"], change, change > threshold))
+    return rows
+
+def print_metrics(result):
+    for name, m in result["metrics"].items():
+        print(f"{name:<40}{m['value']:>14,.2f} {m['unit']}")
+
+def print_comparison(rows, threshold):
+    print(f"\n{'metric':<40}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<40}{old:>14,.2f}{new:>14,.2f}{change * 100:>+9.1f}%{flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"\n{regressions} regression(s) beyond {threshold * 100:.0f}% ({len(rows)} metrics compared)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Blackjack benchmark suite")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Flag metrics that got worse by more than this ratio (default 0.10)")
+    parser.add_argument("--only", help=f"Comma-separated groups ({','.join(GROUPS)})")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (noisier)")
+    args = parser.parse_args()
+
+    groups = args.only.split(",") if args.only else list(GROUPS)
+    unknown = [group for group in groups if group not in GROUPS]
+    if unknown:
+        parser.error(f"Unknown group(s): {', '.join(unknown)}")
+
+    random.seed(0)
+    result = run(groups, args.quick)
+    print_metrics(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, result, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
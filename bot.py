@@ -0,0 +1,257 @@
+"""
+Headless Blackjack client: plays a fixed strategy with no prompts or colors.
+Used to script sessions and to generate load (see benchmarks/loadgen.py).
+
+Usage:
+    python bot.py --host 127.0.0.1 --port 40000 --rounds 10 --strategy basic
+    python bot.py --rounds 10                      # find a server by UDP offer
+    python bot.py --rounds 10 --sessions 5 --keep-alive   # five sessions, one connection
+    python bot.py --host 127.0.0.1 --port 40000 --rounds 10 --table   # at a shared table
+    python bot.py --host 127.0.0.1 --port 40000 --rounds 1000000 --autoplay   # the server plays by our strategy
+"""
+import argparse
+import random
+import time
+
+import simulator
+from client import BlackjackClient, ServerBusy, TableState
+from discovery import backoff_delay
+from protocol import *
+from cards import *
+
+STRATEGY_NAMES = "'basic', 'stand-on-N', 'stand-on-N-soft-M' or 'random'"
+
+def make_policy(name, rng=random):
+    """
+    Returns should_hit(hand, upcard_value) for a strategy name:
+    'basic', 'stand-on-N' or 'stand-on-N-soft-M' (see simulator.get_strategy), or 'random'
+    (a coin flip below 21).
+    Raises:
+        ValueError: For an unknown name.
+    """
+    if name == "random":
+        return lambda hand, upcard_value: hand.total < BLACKJACK and rng.random() < 0.5
+
+    try:
+        table = simulator.get_strategy(name)
+    except ValueError:
+        raise ValueError(f"Unknown strategy '{name}' (expected {STRATEGY_NAMES})") from None
+    return lambda hand, upcard_value: table[hand.soft_aces > 0][hand.total][upcard_value]
+
+class SessionStats:
+    """
+    Outcome and timings of one bot session.
+    """
+
+    __slots__ = ("rounds", "wins", "losses", "ties", "latencies", "seconds")
+
+    def __init__(self):
+        self.rounds = 0
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+        self.latencies = []  # Seconds from sending each decision to the server's first reply
+        self.seconds = 0.0   # Connect to last result
+
+    def record(self, result):
+        self.rounds += 1
+        if result == RESULT_WIN:
+            self.wins += 1
+        elif result == RESULT_LOSS:
+            self.losses += 1
+        else:
+            self.ties += 1
+
+class BotClient(BlackjackClient):
+    """
+    A BlackjackClient that plays by a strategy instead of asking the user.
+    """
+
+    def __init__(self, team_name="Bot", strategy="basic", protocol_version=PROTOCOL_VERSION, rng=random,
+                 keep_alive=False, table=False, autoplay=False):
+        super().__init__(team_name, protocol_version, table)
+        self.strategy = strategy
+        self.should_hit = make_policy(strategy, rng)
+        # Play every session over one connection (needs protocol v2)
+        self.keep_alive = keep_alive and protocol_version >= PROTOCOL_V2
+        # Have the server play every round by our strategy and send back results only (v2)
+        self.autoplay = autoplay and protocol_version >= PROTOCOL_V2
+        if self.autoplay:
+            if strategy == "random":
+                raise ValueError("The 'random' strategy cannot be sent to the server for autoplay")
+            self.autoplay_policy = simulator.policy_for(strategy)
+
+    def play_session(self, server_ip, server_port, rounds_to_play, timeout=None):
+        """
+        Plays every round of one session. Connects first, unless the connection of
+        the previous session was kept open (keep_alive); disconnects afterwards
+        unless keep_alive is set.
+        Returns:
+            SessionStats
+        Raises:
+            ServerBusy: If the server is full (the connection is closed).
+            OSError / ConnectionError: If the connection fails or drops.
+        """
+        stats = SessionStats()
+        started = time.perf_counter()
+        tcp_socket = self.open_connection(server_ip, server_port, timeout)
+        try:
+            if self.autoplay:
+                tcp_socket.sendall(self.pack_autoplay(rounds_to_play, self.keep_alive))
+            else:
+                tcp_socket.sendall(self.pack_request(rounds_to_play, self.keep_alive))
+            self.pending.clear()
+
+            if self.autoplay:
+                self.read_autoplay_results(stats)
+            elif self.table:
+                self.play_table_rounds(tcp_socket, rounds_to_play, stats)
+            else:
+                for round_num in range(1, rounds_to_play + 1):
+                    stats.record(self.play_round(tcp_socket, round_num, stats.latencies))
+        except BaseException:
+            self.close_connection()
+            raise
+        if not self.keep_alive:
+            self.close_connection()
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def pack_autoplay(self, rounds_to_play, keep_alive=True):
+        """
+        Packs an Autoplay request carrying this bot's strategy (see simulator.policy_for).
+        """
+        flags = FLAG_KEEP_ALIVE if keep_alive else 0
+        return pack_autoplay(self.team_name, rounds_to_play, *self.autoplay_policy,
+                             version=self.protocol_version, flags=flags)
+
+    def read_autoplay_results(self, stats):
+        """
+        Counts the results of an autoplay session as the server streams them,
+        up to its closing summary.
+        """
+        while True:
+            msg = self.recv_autoplay_message()
+            if type(msg) is AutoplaySummary:
+                break
+            results = msg.results
+            stats.rounds += len(results)
+            stats.wins += results.count(RESULT_WIN)
+            stats.losses += results.count(RESULT_LOSS)
+            stats.ties += results.count(RESULT_TIE)
+        if msg.rounds != stats.rounds:
+            raise Exception(f"Autoplay summary reports {msg.rounds} rounds, {stats.rounds} results arrived")
+
+    def play_round(self, tcp_socket, round_num, latencies):
+        """
+        Plays one round on an open session.
+        Returns:
+            int: RESULT_WIN, RESULT_LOSS or RESULT_TIE.
+        """
+        player_hand = Hand()
+        for _ in range(2):
+            msg = self.recv_payload()
+            player_hand.add(make_card(msg.rank, msg.suit))
+            # Two cards can never bust, so the round always continues here
+
+        msg = self.recv_payload()
+        upcard_value = RANK_VALUE[msg.rank]
+
+        while self.should_hit(player_hand, upcard_value):
+            sent = time.perf_counter()
+            tcp_socket.sendall(self.pack_decision(round_num, ACTION_HIT))
+            msg = self.recv_payload()
+            latencies.append(time.perf_counter() - sent)
+
+            player_hand.add(make_card(msg.rank, msg.suit))
+            if msg.result != RESULT_NOT_OVER:
+                return msg.result
+
+        sent = time.perf_counter()
+        tcp_socket.sendall(self.pack_decision(round_num, ACTION_STAND))
+        msg = self.recv_payload()
+        latencies.append(time.perf_counter() - sent)
+
+        # Dealer's turn: read until the message that carries the result
+        while msg.result == RESULT_NOT_OVER:
+            msg = self.recv_payload()
+        return msg.result
+
+    def play_table_rounds(self, tcp_socket, rounds_to_play, stats):
+        """
+        Plays a session at a shared table, deciding whenever the server
+        announces this seat's turn. Latency is measured from each decision to
+        the next message from the server.
+        """
+        state = TableState()
+        sent = None
+        while state.rounds_done < rounds_to_play:
+            msg = self.recv_table_message()
+            if sent is not None:
+                stats.latencies.append(time.perf_counter() - sent)
+                sent = None
+            state.apply(msg)
+            if type(msg) is TableCards and msg.seat == state.my_seat and msg.result != RESULT_NOT_OVER:
+                stats.record(msg.result)
+
+            if state.wants_decision():
+                hand = state.my_hand()
+                decision = ACTION_HIT if self.should_hit(hand, RANK_VALUE[state.upcard_rank()]) else ACTION_STAND
+                sent = time.perf_counter()
+                tcp_socket.sendall(self.pack_decision(state.round_tag, decision))
+                if decision == ACTION_HIT:
+                    state.awaiting_card = True
+                else:
+                    state.my_turn = False
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Blackjack sessions with a fixed strategy.")
+    parser.add_argument("--host", help="Server address (default: wait for a UDP offer)")
+    parser.add_argument("--port", type=int, help="Server TCP port (with --host)")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--strategy", default="basic", help=STRATEGY_NAMES)
+    parser.add_argument("--name", default="Bot")
+    parser.add_argument("--protocol", type=int, choices=(PROTOCOL_V1, PROTOCOL_V2), default=PROTOCOL_VERSION)
+    parser.add_argument("--sessions", type=int, default=1, help="Sessions to play, one after another")
+    parser.add_argument("--keep-alive", action="store_true", help="Play every session over one connection (v2)")
+    parser.add_argument("--table", action="store_true", help="Play at a shared table with other players (v2)")
+    parser.add_argument("--autoplay", action="store_true",
+                        help="Let the server play every round by --strategy and send back only the results (v2)")
+    args = parser.parse_args()
+
+    if args.autoplay and args.protocol < PROTOCOL_V2:
+        parser.error("--autoplay needs protocol v2")
+    max_rounds = MAX_AUTOPLAY_ROUNDS if args.autoplay else MAX_ROUNDS
+    if not 1 <= args.rounds <= max_rounds:
+        parser.error(f"--rounds must be between 1 and {max_rounds}")
+    try:
+        bot = BotClient(args.name, args.strategy, args.protocol, keep_alive=args.keep_alive, table=args.table,
+                        autoplay=args.autoplay)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.host:
+        if args.port is None:
+            parser.error("--host needs --port")
+        server_ip, server_port = args.host, args.port
+    else:
+        server_ip, server_port = bot.listen_for_offer()
+
+    for _ in range(args.sessions):
+        attempt = 0
+        while True:
+            try:
+                stats = bot.play_session(server_ip, server_port, args.rounds)
+                break
+            except ServerBusy as busy:
+                delay = backoff_delay(attempt, busy.retry_after)
+                attempt += 1
+                print(f"Server is full, retrying in {delay:.1f}s")
+                time.sleep(delay)
+        print(f"{stats.rounds} rounds in {stats.seconds:.2f}s: "
+              f"{stats.wins} won, {stats.losses} lost, {stats.ties} tied")
+    bot.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Compact card model shared by the server and the client.
+
+A card is a single int 0-51: suit * 13 + (rank - 1).
+Everything about a card (rank, suit, Blackjack value, printable name) is a
+lookup in a precomputed 52-entry table.
+"""
+import random
+from array import array
+
+from consts import RESULT_WIN, RESULT_LOSS, RESULT_TIE
+
+NUM_RANKS = 13
+NUM_SUITS = 4
+NUM_CARDS = NUM_RANKS * NUM_SUITS
+
+# Mapping suit integers (0-3) to symbols
+SUIT_SYMBOLS = ('♡', '♢', '♧', '♤')
+
+# Printable rank, indexed by rank (1-13); index 0 is unused
+RANK_LABELS = (None, 'A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+
+# Initial Blackjack value, indexed by rank: Ace = 11 (reduced to 1 when needed), J/Q/K = 10
+RANK_VALUE = (0, 11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
+ACE_VALUE = 11
+ACE_REDUCTION = 10  # An Ace counted as 1 instead of 11
+BLACKJACK = 21
+DEALER_STANDS_ON = 17  # The dealer hits below 17 and stands on every 17 (soft included)
+
+BOLD = "\033[1m"
+RESET = "\033[0m"
+
+def make_card(rank, suit):
+    """
+    Encodes (rank 1-13, suit 0-3) as a card int 0-51.
+    """
+    return suit * NUM_RANKS + rank - 1
+
+def round_result(player_score, dealer_score):
+    """
+    Result of a round the player did not bust, from the player's side.
+    Returns:
+        int: RESULT_WIN, RESULT_LOSS or RESULT_TIE.
+    """
+    if dealer_score > BLACKJACK or player_score > dealer_score:
+        return RESULT_WIN
+    if player_score < dealer_score:
+        return RESULT_LOSS
+    return RESULT_TIE
+
+# --- Per-card tables (indexed by card int) ---
+CARD_RANK = tuple(card % NUM_RANKS + 1 for card in range(NUM_CARDS))
+CARD_SUIT = tuple(card // NUM_RANKS for card in range(NUM_CARDS))
+CARD_VALUE = tuple(RANK_VALUE[rank] for rank in CARD_RANK)
+CARD_NAME = tuple(f"{RANK_LABELS[rank]}{SUIT_SYMBOLS[suit]}" for rank, suit in zip(CARD_RANK, CARD_SUIT))
+CARD_NAME_BOLD = tuple(f"{BOLD}{name}{RESET}" for name in CARD_NAME)  # As printed by the client UI
+CARD_WIRE = tuple(zip(CARD_RANK, CARD_SUIT))  # (rank, suit) as sent in protocol messages
+
+# One ordered 52-card deck; new decks are copied from it (a single memcpy)
+FULL_DECK = array('B', range(NUM_CARDS))
+
+class Hand:
+    """
+    A Blackjack hand that keeps its score up to date as cards are added.
+    Adding a card and reading the score are O(1): the hand tracks its running
+    total and how many Aces are still counted as 11 ("soft" Aces).
+    """
+
+    __slots__ = ("cards", "total", "soft_aces")
+
+    def __init__(self):
+        self.cards = []     # Card ints, in the order they were dealt
+        self.total = 0      # Best score (Aces reduced to 1 only as needed)
+        self.soft_aces = 0  # Aces currently counted as 11
+
+    def add(self, card):
+        """
+        Adds a card int to the hand and returns the new score.
+        """
+        self.cards.append(card)
+        # add_value, inlined: this runs for every card dealt
+        value = CARD_VALUE[card]
+        total = self.total + value
+        if value == ACE_VALUE:
+            self.soft_aces += 1
+        while total > BLACKJACK and self.soft_aces:
+            total -= ACE_REDUCTION
+            self.soft_aces -= 1
+        self.total = total
+        return total
+
+    def add_value(self, value):
+        """
+        Updates the score for a card of the given Blackjack value (Ace = 11).
+        Returns:
+            int: The new score.
+        """
+        total = self.total + value
+        soft_aces = self.soft_aces
+        if value == ACE_VALUE:
+            soft_aces += 1
+
+        # If busted (>21), convert Aces from 11 to 1
+        while total > BLACKJACK and soft_aces:
+            total -= ACE_REDUCTION
+            soft_aces -= 1
+
+        self.total = total
+        self.soft_aces = soft_aces
+        return total
+
+    def score_if_added(self, value):
+        """
+        Returns the score this hand would have after a card of the given value,
+        without changing the hand.
+        """
+        total = self.total + value
+        soft_aces = self.soft_aces + (value == ACE_VALUE)
+        while total > BLACKJACK and soft_aces:
+            total -= ACE_REDUCTION
+            soft_aces -= 1
+        return total
+
+    @property
+    def score(self):
+        return self.total
+
+    @property
+    def is_soft(self):
+        return self.soft_aces > 0
+
+    @property
+    def busted(self):
+        return self.total > BLACKJACK
+
+    def ranks(self):
+        """
+        Returns the ranks (1-13) of the cards in the hand.
+        """
+        return [CARD_RANK[card] for card in self.cards]
+
+    def clear(self):
+        self.cards.clear()
+        self.total = 0
+        self.soft_aces = 0
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __repr__(self):
+        return f"Hand({' '.join(CARD_NAME[card] for card in self.cards)} = {self.total})"
+
+class Shoe:
+    """
+    A shoe of one or more decks, dealt across many rounds (and sessions).
+
+    Cards are dealt from the front of one preallocated array. The cut card sits
+    at 'penetration' (fraction of the shoe dealt before a reshuffle); once it has
+    come out, start_round reshuffles the same array in place. Nothing is
+    allocated per round.
+
+    A reshuffle only touches the cards dealt since the last one: the rest of the
+    shoe is still in random order, unseen, so a Fisher-Yates pass over the dealt
+    prefix (each position swapped with a random card from there to the end)
+    leaves the whole shoe as random as a full shuffle, at the cost of the few
+    cards a round deals rather than every card in the shoe.
+
+    penetration=0.0 reshuffles before every round (a fresh deck each round).
+    """
+
+    def __init__(self, decks=1, penetration=0.0, rng=random):
+        if decks < 1:
+            raise ValueError(f"A shoe needs at least one deck, got {decks}")
+        if not 0.0 <= penetration < 1.0:
+            raise ValueError(f"Penetration must be in [0, 1), got {penetration}")
+
+        self.decks = decks
+        self.penetration = penetration
+        self.cards = FULL_DECK * decks
+        self.cut = int(len(self.cards) * penetration)
+        self.position = len(self.cards)  # Next card to deal: all of them count as dealt until the first shuffle
+        self.round_start = 0             # First card dealt in the current round
+        self.shuffles = 0
+        self._shuffle = rng.shuffle
+        self._random = rng.random
+        self.shuffle()
+
+    def shuffle(self):
+        # Shuffle the dealt cards back into the shoe (in place), as described above
+        cards = self.cards
+        size = len(cards)
+        random = self._random
+        for i in range(min(self.position, size - 1)):
+            j = i + int(random() * (size - i))
+            cards[i], cards[j] = cards[j], cards[i]
+        self.position = 0
+        self.round_start = 0
+        self.shuffles += 1
+
+    def start_round(self):
+        """
+        Call before dealing each round: reshuffles if the cut card has come out.
+        """
+        if self.position >= self.cut:
+            self.shuffle()
+        self.round_start = self.position
+
+    def draw_card(self):
+        # Return the next card int
+        if self.position == len(self.cards):
+            self._recycle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    def remaining(self):
+        return len(self.cards) - self.position
+
+    def _recycle(self):
+        # The shoe ran out mid-round (only possible with a deep cut card): shuffle the
+        # discards of earlier rounds back in, keeping this round's cards out of play
+        if self.round_start == 0:
+            raise RuntimeError("Shoe exhausted within a single round")
+        in_play = self.cards[self.round_start:]
+        discards = self.cards[:self.round_start]
+        self._shuffle(discards)
+        self.cards[:] = in_play + discards
+        self.round_start = 0
+        self.position = len(in_play)
+        self.shuffles += 1
@@ -1,36 +1,18 @@
+import argparse
+import select
 import socket
+import time
+from collections import deque
 import sys
 import os
+from discovery import OFFER_WINDOW, ServerTable, backoff_delay
+from framing import FrameReader
+import interfaces
 import protocol
+import probability
 from protocol import *
-import utils
-
-# --- Colors for UI ---
-class Colors:
-    """
-    ANSI Escape Codes for terminal coloring.
-    Allows printing colored text in the console.
-    """
-
-    RESET = "\033[0m"
-    RED = "\033[91m"  # For Bust / Loss
-    GREEN = "\033[92m"  # For Win / Safe
-    BOLD = "\033[1m"
-
-    @staticmethod
-    def card(text):
-        # Formats card text as Bold
-        return f"{Colors.BOLD}{text}{Colors.RESET}"
-
-    @staticmethod
-    def win(text):
-        # Formats text as Bold Green
-        return f"{Colors.GREEN}{Colors.BOLD}{text}{Colors.RESET}"
-
-    @staticmethod
-    def loss(text):
-        # Formats text as Bold Red
-        return f"{Colors.RED}{Colors.BOLD}{text}{Colors.RESET}"
+from render import RENDERERS, make_renderer
+from cards import *
 
 # Enable ANSI colors in Windows terminal
 os.system('')
@@ -40,79 +22,163 @@ def get_card_value(rank):
     Returns the initial Blackjack value for a card rank.
     """
 
-    # Ace is worth 11 by default (converted to 1 later if bust)
-    if rank == 1:
-        return 11
+    # Ace = 11 (converted to 1 later if bust), J/Q/K = 10, number cards = their rank
+    return RANK_VALUE[rank]
 
-    # Face cards (Jack=11, Queen=12, King=13) are all worth 10
-    if rank >= 11:
-        return 10
-
-    # Number cards (2-10) are worth their rank
-    return rank
-
-def calculate_stats(current_hand_ranks, dealer_visible_rank=None):
+def calculate_stats(current_hand_ranks, dealer_visible_rank=None, decks=1):
     """
-    Calculates statistics based on the REMAINING cards in a 52-card deck.
+    Calculates statistics based on the REMAINING cards in the shoe (one 52-card deck by default).
     Subtracts Player's hand AND Dealer's visible card from the pool.
+    Results are cached per (score, soft Ace, remaining cards), see probability.py.
     """
 
-    # 1. Start with a full deck: 4 cards of each rank (1-13)
-    deck_pool = {rank: 4 for rank in range(1, 14)}
+    # Cards seen so far: Player's hand plus the Dealer's visible card (if we know it)
+    seen = list(current_hand_ranks)
+    if dealer_visible_rank:
+        seen.append(dealer_visible_rank)
+    composition = probability.remove_ranks(probability.full_composition(decks), seen)
 
-    # 2. Remove Player's known cards
-    for rank in current_hand_ranks:
-        if deck_pool[rank] > 0:
-            deck_pool[rank] -= 1
+    hand = hand_from_ranks(current_hand_ranks)
+    return probability.bust_probability(hand.total, hand.is_soft, composition)
 
-    # 3. Remove Dealer's visible card (if we know it)
-    if dealer_visible_rank and deck_pool[dealer_visible_rank] > 0:
-        deck_pool[dealer_visible_rank] -= 1
+def calculate_ev(current_hand_ranks, dealer_visible_rank, decks=1):
+    """
+    Exact odds of the Dealer's final total and the expected value of each move
+    (stand exact, hit approximate), from the cards still in the shoe (see
+    probability.decision_ev).
+    Returns:
+        (dealer_bust_prob, stand_ev, hit_ev): bust chance in percent, EVs per unit bet.
+    """
+    composition = probability.remove_ranks(probability.full_composition(decks), list(current_hand_ranks) + [dealer_visible_rank])
+    hand = hand_from_ranks(current_hand_ranks)
+    distribution = probability.dealer_distribution(dealer_visible_rank, composition)
+    stand_ev, hit_ev = probability.decision_ev(hand.total, hand.is_soft, dealer_visible_rank, composition)
+    return distribution[probability.BUST] * 100, stand_ev, hit_ev
 
-    total_remaining_cards = sum(deck_pool.values())
+def hand_from_ranks(hand_ranks):
+    """
+    Builds a scored Hand (see cards.py) from a list of ranks.
+    """
+    hand = Hand()
+    for rank in hand_ranks:
+        hand.add_value(RANK_VALUE[rank])
+    return hand
 
-    if total_remaining_cards == 0:
-        return 0.0, 0.0
+def calculate_hand_score(hand_ranks):
+    """
+    Calculates score from a list of ranks, handling Ace as 1 or 11.
+    """
+    return hand_from_ranks(hand_ranks).total
 
-    safe_count = 0
+def parse_decisions(choice):
+    """
+    Turns the player's input into a list of decisions.
+    Accepts 'h', 's', 'hit', 'stand', or a planned sequence such as 'hhs'.
+    Returns:
+        list of ACTION_HIT / ACTION_STAND (empty if the input is invalid).
+    """
+    choice = choice.strip().lower()
+    if choice == 'hit':
+        return [ACTION_HIT]
+    if choice == 'stand':
+        return [ACTION_STAND]
+    if not choice or not set(choice) <= {'h', 's'}:
+        return []
+    return [ACTION_HIT if c == 'h' else ACTION_STAND for c in choice]
+
+def expand_batch(batch):
+    """
+    Converts a v2 Batch into the v1 Payload sequence it replaces:
+    every card with RESULT_NOT_OVER, then (if the round ended) the last card
+    again carrying the final result.
+    """
+    messages = [protocol.PayloadServer(RESULT_NOT_OVER, rank, suit) for rank, suit in batch.cards]
 
-    # 4. Simulate drawing from the remaining pool
-    for rank, count in deck_pool.items():
-        if count > 0:
-            temp_hand = current_hand_ranks + [rank]
+    if batch.result != RESULT_NOT_OVER and messages:
+        messages.append(messages[-1]._replace(result=batch.result))
+    return messages
 
-            if calculate_hand_score(temp_hand) <= 21:
-                # If rank is safe, all copies of it in the deck are safe outcomes
-                safe_count += count
+class ServerBusy(ConnectionError):
+    """
+    The server is full: it answered with a Busy reply and closed the connection.
+    """
 
-    # 5. Calculate weighted percentages
-    safe_prob = (safe_count / total_remaining_cards) * 100
-    bust_prob = 100.0 - safe_prob
+    def __init__(self, retry_after):
+        super().__init__(f"Server is full, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after  # Seconds
 
-    return bust_prob, safe_prob
+def busy_error(frame):
+    """
+    Returns the ServerBusy to raise for a Busy reply frame.
+    """
+    busy = protocol.unpack_busy_from(frame)
+    return ServerBusy((busy.retry_after_ms if busy else BUSY_RETRY_AFTER_MS) / 1000)
 
-def calculate_hand_score(hand_ranks):
+RESULT_TEXT = {RESULT_WIN: "WINS", RESULT_LOSS: "LOSES", RESULT_TIE: "TIES"}
+
+class TableState:
     """
-    Calculates score from a list of ranks, handling Ace as 1 or 11.
+    What a client seated at a shared table knows: who sits where, every hand of
+    the current round, and whether it is this client's turn. Updated by apply()
+    with each table message.
     """
-    score = 0
-    aces = 0
 
-    for rank in hand_ranks:
-        if rank == 1:     # Ace counts as 11 initially
-            aces += 1
-            score += 11
-        elif rank >= 11:  # Face cards (J, Q, K) count as 10
-            score += 10
-        else:             # Number cards (2-10) count as their rank
-            score += rank
+    def __init__(self):
+        self.my_seat = None
+        self.names = {}             # Seat number -> team name
+        self.hands = {}             # Seat number (DEALER_SEAT for the dealer) -> Hand of the current round
+        self.round_tag = None
+        self.rounds_done = 0
+        self.my_turn = False
+        self.awaiting_card = False  # A Hit was sent and its card has not arrived yet
+        self.result = None          # This client's result in the current round, once known
+
+    def apply(self, msg):
+        kind = type(msg)
+        if kind is TableCards:
+            if msg.round_tag != self.round_tag:
+                # First cards of a new round
+                self.round_tag = msg.round_tag
+                self.hands = {}
+                self.result = None
+            hand = self.hands.get(msg.seat)
+            if hand is None:
+                hand = self.hands[msg.seat] = Hand()
+            for rank, suit in msg.cards:
+                hand.add(make_card(rank, suit))
+            if msg.seat == self.my_seat:
+                self.awaiting_card = False
+                if msg.result != RESULT_NOT_OVER:
+                    self.result = msg.result
+                    self.my_turn = False
+        elif kind is Turn:
+            self.my_turn = msg.seat == self.my_seat
+        elif kind is SeatEvent:
+            if msg.event == SEAT_LEFT:
+                self.names.pop(msg.seat, None)
+            else:
+                self.names[msg.seat] = msg.team_name
+                if msg.event == SEAT_YOU:
+                    self.my_seat = msg.seat
+        elif kind is RoundEnd:
+            self.rounds_done += 1
+            self.my_turn = False
 
-    # If score is over 21, reduce Aces from 11 to 1 to avoid busting
-    while score > 21 and aces > 0:
-        score -= 10
-        aces -= 1
+    def wants_decision(self):
+        return self.my_turn and not self.awaiting_card
 
-    return score
+    def my_hand(self):
+        return self.hands[self.my_seat]
+
+    def upcard_rank(self):
+        return CARD_RANK[self.hands[DEALER_SEAT].cards[0]]
+
+    def describe(self, seat):
+        if seat == DEALER_SEAT:
+            return "Dealer"
+        if seat == self.my_seat:
+            return "You"
+        return f"'{self.names.get(seat, '?')}' (seat {seat})"
 
 class BlackjackClient:
     """
@@ -122,35 +188,174 @@ class BlackjackClient:
     - Handles the interactive game loop (UI, decisions, stats).
     """
 
-    def __init__(self, team_name):
+    def __init__(self, team_name, protocol_version=PROTOCOL_VERSION, table=False, renderer=None):
         self.team_name = team_name  # Set the name dynamically
+        # Everything the client shows goes through the renderer (see render.py)
+        self.renderer = renderer or make_renderer()
         self.udp_port = UDP_PORT
         self.buffer_size = BUFFER_SIZE
+        self.protocol_version = protocol_version
+        # Play at a shared table with other players (needs protocol v2)
+        self.table = table and protocol_version >= PROTOCOL_V2
+        # Servers heard from over UDP, and the one picked, reused until a connection to it fails
+        self.servers = ServerTable()
+        self.server = None
+        # TCP connection kept open between sessions (v2 keep-alive), its address and buffered reader
+        self.tcp_socket = None
+        self.connected_to = None
+        self.reader = None
+        # Card messages already received but not yet consumed (a v2 Batch holds several)
+        self.pending = deque()
+
+    def recv_payload(self):
+        """
+        Returns the next card message from the server as a v1-style Payload record.
+        A v2 Batch is split into the equivalent sequence of v1 Payloads, so the
+        game loop reads both protocol versions the same way.
+        Raises:
+            ServerBusy: If the server turned the session away.
+        """
+        if not self.pending:
+            # Show what was rendered before waiting on the server (not between messages already received)
+            if self.renderer.buffer and not self.reader.has_frame():
+                self.renderer.flush()
+            frame = self.reader.read_frame()
+            msg_type = frame[protocol.HEADER_SIZE - 1]
+
+            if msg_type == MSG_TYPE_PAYLOAD_BATCH:
+                batch = protocol.unpack_payload_batch_from(frame)
+                if not batch:
+                    raise Exception("Invalid batch message from server")
+                self.pending.extend(expand_batch(batch))
+            elif msg_type == MSG_TYPE_BUSY:
+                raise busy_error(frame)
+            else:
+                msg = protocol.unpack_payload_server_from(frame)
+                if not msg:
+                    raise Exception("Invalid payload message from server")
+                return msg
+
+        return self.pending.popleft()
+
+    def recv_table_message(self):
+        """
+        Returns the next message of a table session: a SeatEvent, Turn,
+        TableCards or RoundEnd record.
+        Raises:
+            ServerBusy: If the server turned the session away.
+        """
+        if self.renderer.buffer and not self.reader.has_frame():
+            self.renderer.flush()
+        frame = self.reader.read_frame()
+        msg_type = frame[protocol.HEADER_SIZE - 1]
+        unpack = protocol.TABLE_MESSAGE_UNPACKERS.get(msg_type)
+        msg = unpack(frame) if unpack else None
+        if msg is None:
+            if msg_type == MSG_TYPE_BUSY:
+                raise busy_error(frame)
+            raise Exception(f"Unexpected message {msg_type:#04x} at the table")
+        return msg
+
+    def recv_autoplay_message(self):
+        """
+        Returns the next message of an autoplay session: an AutoplayResults
+        record, or the AutoplaySummary that ends the session.
+        Raises:
+            ServerBusy: If the server turned the session away.
+        """
+        frame = self.reader.read_frame()
+        msg_type = frame[protocol.HEADER_SIZE - 1]
+        if msg_type == MSG_TYPE_AUTOPLAY_RESULTS:
+            msg = protocol.unpack_autoplay_results_from(frame)
+        elif msg_type == MSG_TYPE_AUTOPLAY_SUMMARY:
+            msg = protocol.unpack_autoplay_summary_from(frame)
+        elif msg_type == MSG_TYPE_BUSY:
+            raise busy_error(frame)
+        else:
+            msg = None
+        if msg is None:
+            raise Exception(f"Unexpected message {msg_type:#04x} in an autoplay session")
+        return msg
+
+    def pack_decision(self, round_num, decision):
+        """
+        Packs a Hit/Stand for the server: tagged with its round under protocol v2
+        (so decisions can be sent ahead), a plain v1 Payload otherwise.
+        """
+        if self.protocol_version >= PROTOCOL_V2:
+            return protocol.pack_decision(round_num, decision)
+        return protocol.pack_payload_client(decision)
 
-    def safe_recv(self, sock, size):
+    def find_server(self):
         """
-        Helper: Ensures exactly 'size' bytes are received from the socket.
-        Crucial for TCP because packets can be fragmented.
+        Returns the (server_ip, server_port) to play on: the cached server, or the
+        next one to send an offer when none is known (e.g. after a failed connection).
         """
-        data = b''
-        while len(data) < size:
-            # Receive whatever is available up to the remaining needed amount
-            chunk = sock.recv(size - len(data))
-            if not chunk:
-                raise Exception("Connection closed unexpectedly")
-            data += chunk
-        return data
-
-    def listen_for_offer(self):
+        if self.server is None:
+            self.server = self.listen_for_offer()
+        return self.server
+
+    def can_reuse(self, server_ip, server_port):
+        """
+        True if the connection kept from the last session goes to this server and
+        is still open. Between sessions the server sends nothing, so a readable
+        socket means it closed the connection (idle timeout, restart).
         """
-        Listens for UDP broadcast messages from a Blackjack server.
+        if self.tcp_socket is None or self.connected_to != (server_ip, server_port):
+            return False
+        readable, _, _ = select.select([self.tcp_socket], [], [], 0)
+        return not readable and not self.reader.buffered()
+
+    def open_connection(self, server_ip, server_port, timeout=None):
+        """
+        Returns a TCP connection to the server, reusing the one kept open by the
+        previous session when possible.
+        """
+        if self.can_reuse(server_ip, server_port):
+            return self.tcp_socket
+        self.close_connection()
+
+        tcp_socket = socket.create_connection((server_ip, server_port), timeout=timeout)
+        # Decisions are single small writes, each awaited: do not let Nagle hold them back
+        tcp_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.tcp_socket = tcp_socket
+        self.connected_to = (server_ip, server_port)
+        # Every message from the server is read through one buffered reader
+        self.reader = FrameReader(tcp_socket, protocol.server_frame_length)
+        return tcp_socket
+
+    def close_connection(self):
+        if self.tcp_socket is not None:
+            self.tcp_socket.close()
+        self.tcp_socket = self.connected_to = self.reader = None
+
+    def pack_request(self, rounds_to_play, keep_alive=True, flags=0):
+        """
+        Packs the Request for a session: v2 (asking to keep the connection open
+        afterwards when 'keep_alive' is set, and for a seat at a shared table when
+        'self.table' is) when we speak it, v1 otherwise.
+        """
+        if self.protocol_version >= PROTOCOL_V2:
+            if keep_alive:
+                flags |= FLAG_KEEP_ALIVE
+            if self.table:
+                flags |= FLAG_TABLE
+            return protocol.pack_request_v2(self.team_name, rounds_to_play, self.protocol_version, flags)
+        return protocol.pack_request(self.team_name, rounds_to_play)
+
+    def listen_for_offer(self, window=OFFER_WINDOW):
+        """
+        Listens for UDP broadcast offers from Blackjack servers. After the first
+        offer, keeps collecting for 'window' seconds, then picks the least-loaded
+        server heard from (see discovery.ServerTable).
         Returns:
-            (server_ip, server_port) tuple when a valid offer is found.
+            (server_ip, server_port) tuple of the chosen server.
         """
 
-        # 1. Get the real Wi-Fi IP to ensure we listen on the correct network adapter
-        my_ip = utils.get_local_ip()
-        print(f"--- Client started, listening for offers at {my_ip} on port {self.udp_port} ---")
+        # 1. Listen on every interface: a socket bound to one address does not receive
+        # the broadcasts sent to its network (see interfaces.py for what is attached)
+        addresses = ", ".join(interface.address for interface in interfaces.local_interfaces())
+        self.renderer.info(f"--- Client started, listening for offers at {addresses} on port {self.udp_port} ---")
 
         udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
@@ -161,190 +366,310 @@ class BlackjackClient:
             # Fallback for OS that don't support SO_REUSEPORT
             udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
-        # 2. Bind only to the real IP
-        try:
-            udp_socket.bind((my_ip, self.udp_port))
-        except:
-            print(Colors.loss(f"Warning: Could not bind to {my_ip}, falling back to all interfaces."))
-            udp_socket.bind(('', self.udp_port))
-
-        # Set a timeout so the loop wakes up every second to check for Ctrl+C
-        udp_socket.settimeout(1.0)
-
-        while True:
-            try:
-                # Wait for a packet (max 1 second)
-                data, addr = udp_socket.recvfrom(self.buffer_size)
+        # 2. Bind to all interfaces
+        udp_socket.bind(('', self.udp_port))
 
-                try:
-                    # Validate the packet magic cookie and type
-                    offer = protocol.unpack_offer(data)
-                    if offer:
-                        print(f"Received Offer from '{offer['server_name']}' at {addr[0]}")
-                        return addr[0], offer['server_port']
-                except Exception:
-                    pass # Ignore invalid packets (garbage data)
-
-            except socket.timeout:
-                # Loop again to check for interrupts
-                continue
-            except Exception as e:
-                print(f"Error: {e}")
-
-    def connect_to_server(self, server_ip, server_port, rounds_to_play):
-        """
-        Main Game Loop.
-        Connects via TCP, plays the requested rounds, and handles user input.
-        """
-        print(f"Connecting to {server_ip}:{server_port}...")
+        # Wake up at least every second to check for Ctrl+C
+        deadline = None
         try:
-            # Establish TCP connection
-            tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            tcp_socket.connect((server_ip, server_port))
-            print(Colors.win("Connected!"))
-
-            # Send the initial Request Packet (Name + Rounds)
-            request_packet = protocol.pack_request(self.team_name, rounds_to_play)
-            tcp_socket.sendall(request_packet)
-
-            wins = 0
-
-            # --- Start Rounds ---
-            for round_num in range(1, rounds_to_play + 1):
-                print(f"\n{'=' * 15} ROUND {round_num} / {rounds_to_play} {'=' * 15}")
-
-                my_hand_ranks = []
-                dealer_hand_ranks = []
-                round_over = False
-
-                # --- 1. Initial Deal (Player gets 2 cards) ---
-                for i in range(2):
-                    if round_over: break
-
-                    # Read exactly 9 bytes (Header + Payload)
-                    data = self.safe_recv(tcp_socket, 9)
-                    msg = protocol.unpack_payload_server(data)
+            while deadline is None or time.monotonic() < deadline:
+                udp_socket.settimeout(1.0 if deadline is None else max(0.001, deadline - time.monotonic()))
+                try:
+                    data, addr = udp_socket.recvfrom(self.buffer_size)
 
-                    # Store rank to calculate stats
-                    my_hand_ranks.append(msg['rank'])
-                    current_score = calculate_hand_score(my_hand_ranks)
+                    # Validate the packet magic cookie and type (load Offer first, then v1)
+                    offer = protocol.unpack_offer_load(data) or protocol.unpack_offer(data)
+                    if not offer:
+                        continue # Ignore invalid packets (garbage data)
 
-                    card_text = Colors.card(utils.get_card_name(msg['rank'], msg['suit']))
-                    print(f"My Card {i + 1}: {card_text}")
+                    if self.servers.update(addr[0], offer):
+                        self.renderer.info(f"Received Offer from '{offer.server_name}' at {addr[0]}")
+                    if deadline is None:
+                        deadline = time.monotonic() + window
 
-                if round_over:
+                except socket.timeout:
+                    # Loop again to check for interrupts
                     continue
+                except Exception as e:
+                    self.renderer.warning(f"Error: {e}")
+        finally:
+            udp_socket.close()
 
-                print(f"--> My Total: {Colors.win(str(current_score))}")
-
-                # --- 2. Dealer Initial Card ---
-                data = self.safe_recv(tcp_socket, 9)
-                msg = protocol.unpack_payload_server(data)
+        entry = self.servers.best()
+        self.renderer.info(f"Joining '{entry.name}' at {entry.ip} ({entry.describe()}, {len(self.servers)} server(s) known)")
+        return entry.ip, entry.port
 
-                dealer_hand_ranks.append(msg['rank'])
-                print(f"Dealer Shows: {Colors.card(utils.get_card_name(msg['rank'], msg['suit']))}")
+    def server_busy(self, server_ip, server_port, busy):
+        """
+        Handles a Busy reply: the connection is gone, and the server is skipped
+        by the next discovery until its retry hint has passed.
+        """
+        self.close_connection()
+        self.servers.mark_busy(server_ip, server_port, busy.retry_after)
+        self.server = None
 
-                # --- 3. Player Decision Loop ---
-                while True:
-                    # Calculate Probability of Busting vs Safe Hit
-                    bust_prob, safe_prob = calculate_stats(my_hand_ranks)
+    def play(self, rounds_to_play):
+        """
+        Plays one session on the chosen server. While servers answer Busy, moves
+        on to another server heard from, or waits (backoff with jitter) when all
+        of them are full.
+        """
+        attempt = 0
+        while True:
+            server_ip, server_port = self.find_server()
+            try:
+                self.connect_to_server(server_ip, server_port, rounds_to_play)
+                return
+            except ServerBusy as busy:
+                if self.servers.has_available():
+                    self.renderer.warning("Server is full, trying another server...")
+                    continue
+                delay = backoff_delay(attempt, busy.retry_after)
+                attempt += 1
+                self.renderer.warning(f"Server is full, retrying in {delay:.1f}s...")
+                time.sleep(delay)
 
-                    if current_score < 21:
-                        print(
-                            f"Stats: Bust Chance {Colors.loss(f'{bust_prob:.0f}%')} | Safe Hit Chance {Colors.win(f'{safe_prob:.0f}%')}")
+    def play_rounds(self, tcp_socket, rounds_to_play):
+        """
+        Plays a private session's rounds, asking the user for every move.
+        Returns:
+            int: Rounds won.
+        """
+        renderer = self.renderer
+        wins = 0
+
+        # --- Start Rounds ---
+        for round_num in range(1, rounds_to_play + 1):
+            renderer.round_start(round_num, rounds_to_play)
+
+            # Hands keep a running score: each card is O(1) to add and score
+            my_hand = Hand()
+            dealer_hand = Hand()
+
+            # --- 1. Initial Deal (Player gets 2 cards) ---
+            # Two cards can never bust, so the round always continues here
+            for _ in range(2):
+                msg = self.recv_payload()
+                current_score = my_hand.add(make_card(msg.rank, msg.suit))
+            renderer.player_cards(my_hand.cards, current_score)
+
+            # --- 2. Dealer Initial Card ---
+            msg = self.recv_payload()
+
+            card = make_card(msg.rank, msg.suit)
+            dealer_hand.add(card)
+            renderer.upcard(card)
+
+            # --- 3. Player Decision Loop ---
+            # Decisions typed ahead (e.g. 'hhs') are all sent at once; the server
+            # plays them in order and drops the rest if the round ends first.
+            planned = deque()
+            while True:
+                if not planned:
+                    # Probability of Busting vs Safe Hit, and the expected value of each move
+                    # against the Dealer's exact outcome odds (skipped when not shown)
+                    if renderer.wants_odds and current_score < 21:
+                        bust_prob, safe_prob = calculate_stats(my_hand.ranks(), dealer_hand.ranks()[0])
+                        renderer.odds(bust_prob, safe_prob, calculate_ev(my_hand.ranks(), dealer_hand.ranks()[0]))
+
+                    choice = renderer.prompt("Your move? (h)it or (s)tand (or plan ahead, e.g. 'hhs'): ")
+                    decisions = parse_decisions(choice)
+                    if not decisions:
+                        continue
+
+                    # Without round tags (v1) leftovers would leak into the next round
+                    if self.protocol_version < PROTOCOL_V2:
+                        decisions = decisions[:1]
+
+                    tcp_socket.sendall(b''.join(self.pack_decision(round_num, d) for d in decisions))
+                    planned.extend(decisions)
+
+                decision = planned.popleft()
+
+                # === Player Hits ===
+                if decision == ACTION_HIT:
+                    msg = self.recv_payload()
+
+                    # Update hand and score
+                    card = make_card(msg.rank, msg.suit)
+                    current_score = my_hand.add(card)
+
+                    # A result here means the server said we lost (Bust)
+                    busted = msg.result != RESULT_NOT_OVER
+                    renderer.hit(card, current_score, busted)
+                    if busted:
+                        renderer.result(RESULT_LOSS, busted=True)
+                        break
 
-                    choice = input("Your move? (h)it or (s)tand: ").lower()
+                # === Player Stands ===
+                else:
+                    renderer.stand(current_score)
+
+                    # Wait for Dealer to finish their turn
+                    while True:
+                        msg = self.recv_payload()
+                        if msg.result == RESULT_NOT_OVER:
+                            # Dealer drew a card but game isn't over
+                            card = make_card(msg.rank, msg.suit)
+                            dealer_hand.add(card)
+                            renderer.dealer_draw(card)
+                        else:
+                            # Game Over packet received
+                            renderer.result(msg.result, dealer_hand.total)
+                            if msg.result == RESULT_WIN:
+                                wins += 1
+                            break
+                    break
 
-                    # === Player Hits ===
-                    if choice in ['h', ACTION_HIT]:
-                        tcp_socket.sendall(protocol.pack_payload_client(ACTION_HIT))
+        return wins
 
-                        data = self.safe_recv(tcp_socket, 9)
-                        msg = protocol.unpack_payload_server(data)
+    def play_table(self, tcp_socket, rounds_to_play):
+        """
+        Plays a session at a shared table: shows every seat's cards as they are
+        dealt and asks the user for a move when it is this seat's turn.
+        Returns:
+            int: Rounds won.
+        """
+        renderer = self.renderer
+        state = TableState()
+        wins = 0
+        renderer.info("Waiting for a seat at a table...")
+
+        while state.rounds_done < rounds_to_play:
+            msg = self.recv_table_message()
+            new_round = type(msg) is TableCards and msg.round_tag != state.round_tag
+            state.apply(msg)
+
+            if type(msg) is SeatEvent:
+                renderer.seat_event(msg.event, msg.seat, msg.team_name)
+
+            elif type(msg) is TableCards:
+                if new_round:
+                    renderer.round_start(state.rounds_done + 1, rounds_to_play)
+                who = state.describe(msg.seat)
+                hand = state.hands[msg.seat]
+                if msg.cards:
+                    cards = [make_card(rank, suit) for rank, suit in msg.cards]
+                    renderer.table_cards(who, cards, hand.total, msg.seat == DEALER_SEAT and len(hand.cards) == 1)
+                if msg.result != RESULT_NOT_OVER:
+                    if msg.seat != state.my_seat:
+                        renderer.seat_result(who, 'BUSTED' if hand.total > BLACKJACK else RESULT_TEXT[msg.result])
+                    else:
+                        renderer.result(msg.result, busted=hand.total > BLACKJACK)
+                        if msg.result == RESULT_WIN:
+                            wins += 1
+
+            elif type(msg) is Turn and msg.seat != state.my_seat:
+                renderer.turn(state.describe(msg.seat))
+
+            if state.wants_decision():
+                decision = self.ask_table_decision(state)
+                tcp_socket.sendall(self.pack_decision(state.round_tag, decision))
+                if decision == ACTION_HIT:
+                    state.awaiting_card = True
+                else:
+                    renderer.stand(state.my_hand().total, dealer_turn=False)
+                    state.my_turn = False
+
+        return wins
+
+    def ask_table_decision(self, state):
+        """
+        Shows the odds for this seat's hand and asks for one move (at a table
+        moves are sent one at a time: the others wait for each card).
+        """
+        if self.renderer.wants_odds:
+            self.renderer.odds(*calculate_stats(state.my_hand().ranks(), state.upcard_rank()))
+        while True:
+            decisions = parse_decisions(self.renderer.prompt("Your move? (h)it or (s)tand: "))
+            if decisions:
+                return decisions[0]
 
-                        # Update hand and score
-                        my_hand_ranks.append(msg['rank'])
-                        current_score = calculate_hand_score(my_hand_ranks)
-                        card_name = utils.get_card_name(msg['rank'], msg['suit'])
+    def connect_to_server(self, server_ip, server_port, rounds_to_play):
+        """
+        Main Game Loop.
+        Plays the requested rounds over TCP and handles user input. The connection
+        stays open for the next session (v2); if it fails, it is closed and the
+        cached server forgotten, so the next session starts with discovery again.
+        Raises:
+            ServerBusy: If the server is full (see play()).
+        """
+        try:
+            if self.can_reuse(server_ip, server_port):
+                self.renderer.info(f"Reusing connection to {server_ip}:{server_port}")
+                tcp_socket = self.tcp_socket
+            else:
+                self.renderer.info(f"Connecting to {server_ip}:{server_port}...")
+                tcp_socket = self.open_connection(server_ip, server_port)
+                self.renderer.success("Connected!")
 
-                        if msg['result'] == RESULT_NOT_OVER:
-                            print(f"Dealt: {Colors.card(card_name)} | Total: {Colors.win(str(current_score))}")
-                        else:
-                            # Server said we lost (Bust)
-                            print(f"Dealt: {Colors.card(card_name)} | Total: {Colors.loss(str(current_score))}")
-                            print(Colors.loss("👮‍♂️ YOU BUSTED! 👮‍♂️"))
-                            break
+            # Send the Request Packet (Name + Rounds), offering v2 when we speak it
+            tcp_socket.sendall(self.pack_request(rounds_to_play))
+            self.pending.clear()
 
-                    # === Player Stands ===
-                    elif choice in ['s', ACTION_STAND]:
-                        tcp_socket.sendall(protocol.pack_payload_client(ACTION_STAND))
-                        print(f"Standing on {current_score}. Dealer's turn...")
-
-                        # Wait for Dealer to finish their turn
-                        while True:
-                            data = self.safe_recv(tcp_socket, 9)
-                            msg = protocol.unpack_payload_server(data)
-                            card_name = utils.get_card_name(msg['rank'], msg['suit'])
-
-                            if msg['result'] == RESULT_NOT_OVER:
-                                # Dealer drew a card but game isn't over
-                                dealer_hand_ranks.append(msg['rank'])
-                                dealer_score = calculate_hand_score(dealer_hand_ranks)
-                                print(f"Dealer draws: {Colors.card(card_name)}")
-                            else:
-                                # Game Over packet received
-                                dealer_score = calculate_hand_score(dealer_hand_ranks)
-                                print(f"Dealer's Final Total: {dealer_score}")
-
-                                if msg['result'] == RESULT_WIN:
-                                    print(Colors.win("✴✴ YOU WIN! ✴✴"))
-                                    wins += 1
-                                elif msg['result'] == RESULT_LOSS:
-                                    print(Colors.loss("🤬 YOU LOST! 🤬"))
-                                elif msg['result'] == RESULT_TIE:
-                                    print("☞ IT'S A TIE! ☜")
-                                break
-                        break
+            if self.table:
+                wins = self.play_table(tcp_socket, rounds_to_play)
+            else:
+                wins = self.play_rounds(tcp_socket, rounds_to_play)
 
             # --- Session Summary ---
-            if rounds_to_play > 0:
-                win_rate = (wins / rounds_to_play) * 100
-            else:
-                win_rate = 0.0
-            print(f"\n{'=== SESSION SUMMARY ==='}")
-            print(f"Finished {rounds_to_play} rounds. Win Rate: {Colors.win(f'{win_rate:.1f}%')}")
+            self.renderer.session_summary(rounds_to_play, wins)
+            self.renderer.flush()
 
-        except Exception as e:
-            print(f"Error: {e}")
+        except ServerBusy as busy:
+            self.server_busy(server_ip, server_port, busy)
+            raise
 
-        finally:
-            if tcp_socket: tcp_socket.close()
-            print(Colors.loss("--- Disconnected ---"))
+        except Exception as e:
+            self.renderer.flush()
+            self.renderer.warning(f"Error: {e}")
+            self.close_connection()
+            # Forget this server until it is heard from again
+            self.servers.remove(server_ip, server_port)
+            self.server = None
+            self.renderer.warning("--- Disconnected ---")
+
+        else:
+            # Only v2 servers keep the connection open after a session
+            if self.protocol_version < PROTOCOL_V2:
+                self.close_connection()
+                self.renderer.warning("--- Disconnected ---")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Blackjack against a server found on the LAN.")
+    parser.add_argument("--output", choices=sorted(RENDERERS), default="ansi",
+                        help="ansi: colored text; quiet: warnings and summaries only; json: one JSON object per line")
+    parser.add_argument("--odds", dest="odds", action="store_true", default=None,
+                        help="Show bust odds and EVs before each move (default: in ansi output only)")
+    parser.add_argument("--no-odds", dest="odds", action="store_false")
+    args = parser.parse_args()
+    renderer = make_renderer(args.output, odds=args.odds)
+
     # 1. Ask for Team Name once at the start
-    my_name = input("Enter your team name: ")
+    my_name = renderer.prompt("Enter your team name: ")
     if not my_name.strip():
         my_name = ""  # Default fallback
-        print(f"Defaulting to '{my_name}'")
+        renderer.info(f"Defaulting to '{my_name}'")
 
-    # 2. Initialize client with the name
-    client = BlackjackClient(my_name)
+    # 2. Initialize client with the name (and a seat at a shared table if wanted)
+    at_table = renderer.prompt("Play at a shared table with other players? (y/N): ").strip().lower() in ("y", "yes")
+    client = BlackjackClient(my_name, table=at_table, renderer=renderer)
 
     while True:
         try:
             # --- CHECK FOR EXIT COMMAND HERE ---
-            user_input = input("\nHow many rounds do you want to play? (type 'exit' for exit): ")
+            user_input = renderer.prompt("\nHow many rounds do you want to play? (type 'exit' for exit): ")
 
             if user_input.lower() == 'exit':
-                print(Colors.card("Goodbye!"))
+                client.close_connection()
+                renderer.info("Goodbye!")
                 sys.exit()
 
             user_rounds = int(user_input)
 
         except ValueError:
             user_rounds = 3
-            print(Colors.loss("Invalid number, defaulting to 3 rounds."))
+            renderer.warning("Invalid number, defaulting to 3 rounds.")
 
-        server_ip, server_port = client.listen_for_offer()
-        client.connect_to_server(server_ip, server_port, user_rounds)
\ No newline at end of file
+        # Discovery only runs for the first session, after a connection failure and when the server is full
+        client.play(user_rounds)
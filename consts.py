@@ -6,6 +6,13 @@ Constants used throughout the Blackjack project.
 UDP_PORT = 13122
 BUFFER_SIZE = 1024
 BROADCAST_IP = '<broadcast>'
+TCP_BACKLOG = 1024  # Pending connections queued by listen()
+KEEP_ALIVE_TIMEOUT = 60.0  # Seconds a kept-alive connection may sit idle between sessions
+IDLE_CHECK_INTERVAL = 1.0  # Seconds between checks for kept-alive connections idle past KEEP_ALIVE_TIMEOUT
+BUSY_RETRY_AFTER_MS = 1000  # Longest retry hint sent with a Busy reply
+MIN_RETRY_AFTER_MS = 10  # Shortest retry hint sent with a Busy reply
+TABLE_TURN_TIMEOUT = 30.0  # Seconds a seated player may take per decision before standing automatically
+TABLE_WRITE_BUFFER_LIMIT = 64 * 1024  # Unsent bytes an asyncio table lets pile up for a seat before dropping it
 
 # --- Protocol Constants ---
 MAGIC_COOKIE = 0xabcddcba
@@ -14,12 +21,56 @@ MAGIC_COOKIE = 0xabcddcba
 MSG_TYPE_OFFER = 0x02    # Server -> Client (UDP)
 MSG_TYPE_REQUEST = 0x03  # Client -> Server (TCP)
 MSG_TYPE_PAYLOAD = 0x04  # Bidirectional (TCP)
+MSG_TYPE_REQUEST_V2 = 0x05     # Client -> Server (TCP), Request carrying a protocol version
+MSG_TYPE_PAYLOAD_BATCH = 0x06  # Server -> Client (TCP, v2 only), several cards + result
+MSG_TYPE_DECISION = 0x07       # Client -> Server (TCP, v2 only), Hit/Stand tagged with its round
+MSG_TYPE_OFFER_LOAD = 0x08     # Server -> Client (UDP), Offer + active sessions and capacity
+MSG_TYPE_BUSY = 0x09           # Server -> Client (TCP), sent instead of a game when the server is full
+MSG_TYPE_SEAT = 0x0A           # Server -> Client (TCP, table), a player took or left a seat
+MSG_TYPE_TURN = 0x0B           # Server -> Client (TCP, table), whose turn it is
+MSG_TYPE_TABLE_CARDS = 0x0C    # Server -> Client (TCP, table), cards (and result) of one seat or the dealer
+MSG_TYPE_ROUND_END = 0x0D      # Server -> Client (TCP, table), every seat of the round is settled
+MSG_TYPE_AUTOPLAY = 0x0E          # Client -> Server (TCP, v2), Request with a decision policy: the server plays every round
+MSG_TYPE_AUTOPLAY_RESULTS = 0x0F  # Server -> Client (TCP, autoplay), results of consecutive rounds, one byte each
+MSG_TYPE_AUTOPLAY_SUMMARY = 0x10  # Server -> Client (TCP, autoplay), the session's totals, sent last
+
+# Protocol Versions
+PROTOCOL_V1 = 1  # One card per Payload message
+PROTOCOL_V2 = 2  # Opening deal and dealer turn sent as a single Batch message
+PROTOCOL_VERSION = PROTOCOL_V2  # Highest version this code speaks
+
+# Request Flags (v2)
+FLAG_TURBO = 0x01  # Ask the server to skip all pacing delays (bots, load tests)
+FLAG_KEEP_ALIVE = 0x02  # Keep the connection open after the session for another Request
+FLAG_TABLE = 0x04  # Play at a shared table (several players, one dealer and shoe) instead of alone
+
+# Shared Tables (v2)
+TABLE_SEATS = 5        # Default seats per table
+MAX_TABLE_SEATS = 254  # Seat numbers are one byte, and 0xFF is the dealer
+DEALER_SEAT = 0xFF     # Seat number of the dealer in Table Cards messages
+SEAT_YOU = 0           # Seat event: this is your seat
+SEAT_JOINED = 1        # Seat event: another player sat down
+SEAT_LEFT = 2          # Seat event: a player left the table
+
+# Autoplay (v2)
+POLICY_STAND_ON = 0  # Hit below hard_stand (hard hands) or soft_stand (soft hands), stand from there on
+POLICY_TABLE = 1     # Hit table: one row per total 12-21 (hard rows, then soft), one bit per upcard 2-A
+POLICY_TABLE_FIRST_TOTAL = 12  # Below this, a table policy always hits (no card can bust the hand)
+POLICY_TABLE_ROWS = 20
+MAX_AUTOPLAY_ROUNDS = 0xFFFFFFFF  # Rounds are four bytes in an Autoplay request (MAX_FIELD_U32)
+AUTOPLAY_CHUNK_ROUNDS = 4096      # Round results per Autoplay Results message
+AUTOPLAY_ASYNC_CHUNK_ROUNDS = 256  # The same in asyncio mode, where a chunk holds up the event loop
 
 # Field Lengths (in bytes)
 SERVER_NAME_LEN = 32
 TEAM_NAME_LEN = 32
 MSG_TYPE_LEN = 1
 PORT_LEN = 2
+MAX_BATCH_CARDS = 255  # Card count is a single byte
+MAX_ROUNDS = 255  # Rounds per session are a single byte in the Request
+ROUND_TAG_MASK = 0xFFFF  # Decisions carry the round number modulo 2^16
+MAX_FIELD_U16 = 0xFFFF  # Largest value of a 2-byte field (load Offer counts are capped to it)
+MAX_FIELD_U32 = 0xFFFFFFFF  # Largest value of a 4-byte field
 
 # --- Game Constants ---
 # Card Suits
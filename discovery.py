@@ -0,0 +1,140 @@
+"""
+Client-side table of servers heard from over UDP, and the choice of which one
+to join.
+
+Servers broadcast every second: a v1 Offer (port and name) and a load Offer
+(the same plus active sessions and capacity). The table keeps the latest offer
+from each server and forgets servers that stopped broadcasting. The best server
+is the one with the most free session slots.
+
+A server that answered a connection with a Busy reply is skipped until its
+retry hint has passed; with no other server to go to, the client backs off
+(backoff_delay) before trying again.
+"""
+import random
+import time
+
+from protocol import LoadOffer
+
+OFFER_WINDOW = 0.3  # Seconds to keep collecting offers after the first one arrives
+OFFER_TTL = 3.0     # A server that sent nothing for this long is dropped (it broadcasts every second)
+
+UNLIMITED = 0xFFFF  # Free slots of a server that advertises no capacity limit
+UNKNOWN_FREE = 1    # Free slots assumed for a server that only sends v1 Offers (ranks just above full ones)
+
+BACKOFF_BASE = 0.25  # Seconds of jitter range for the first retry after a Busy reply, doubled per attempt
+BACKOFF_MAX = 8.0    # Cap on the jitter range
+
+class ServerEntry:
+    """
+    What the table knows about one server.
+    """
+
+    __slots__ = ("ip", "port", "name", "sessions", "capacity", "seen", "busy_until")
+
+    def __init__(self, ip, port, name):
+        self.ip = ip
+        self.port = port
+        self.name = name
+        self.sessions = None  # Unknown until a load Offer arrives
+        self.capacity = None
+        self.seen = 0.0
+        self.busy_until = 0.0  # Monotonic time until which the server said it is full
+
+    def is_busy(self, now):
+        return now < self.busy_until
+
+    def free_slots(self):
+        if self.sessions is None:
+            return UNKNOWN_FREE
+        if not self.capacity:
+            return UNLIMITED - self.sessions
+        return max(0, self.capacity - self.sessions)
+
+    def describe(self):
+        if self.sessions is None:
+            return "load unknown"
+        if not self.capacity:
+            return f"{self.sessions} sessions"
+        return f"{self.sessions}/{self.capacity} sessions"
+
+class ServerTable:
+    """
+    Known servers by (ip, port), refreshed by every offer received.
+    """
+
+    def __init__(self, ttl=OFFER_TTL):
+        self.ttl = ttl
+        self.entries = {}
+
+    def update(self, ip, offer, now=None):
+        """
+        Records an Offer or LoadOffer from 'ip'.
+        Returns:
+            bool: True if the server was not in the table yet.
+        """
+        key = (ip, offer.server_port)
+        entry = self.entries.get(key)
+        is_new = entry is None
+        if is_new:
+            entry = self.entries[key] = ServerEntry(ip, offer.server_port, offer.server_name)
+        if type(offer) is LoadOffer:
+            entry.sessions = offer.sessions
+            entry.capacity = offer.capacity
+        entry.seen = time.monotonic() if now is None else now
+        return is_new
+
+    def remove(self, ip, port):
+        self.entries.pop((ip, port), None)
+
+    def mark_busy(self, ip, port, seconds, now=None):
+        """
+        Records a Busy reply: best() passes over this server for 'seconds'.
+        """
+        entry = self.entries.get((ip, port))
+        if entry is not None:
+            entry.busy_until = (time.monotonic() if now is None else now) + seconds
+
+    def expire(self, now=None):
+        """
+        Drops servers not heard from within the TTL.
+        """
+        now = time.monotonic() if now is None else now
+        for key in [key for key, entry in self.entries.items() if now - entry.seen > self.ttl]:
+            del self.entries[key]
+
+    def best(self, now=None):
+        """
+        Returns:
+            ServerEntry: The live server with the most free slots (fewest sessions
+                         on a tie), preferring servers not marked busy, or None if
+                         the table is empty.
+        """
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        if not self.entries:
+            return None
+        return max(self.entries.values(),
+                   key=lambda entry: (not entry.is_busy(now), entry.free_slots(), -(entry.sessions or 0)))
+
+    def has_available(self, now=None):
+        """
+        True if some live server is not marked busy.
+        """
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        return any(not entry.is_busy(now) for entry in self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+def backoff_delay(attempt, retry_after=0.0, rng=random):
+    """
+    Seconds to wait before retry number 'attempt' (0-based) after a Busy reply:
+    the server's retry hint plus a random share of an exponentially growing range,
+    so rejected clients do not all come back at the same moment. The range starts
+    at the hint when that is shorter than BACKOFF_BASE (a server whose places free
+    up quickly sends a short one).
+    """
+    base = min(BACKOFF_BASE, retry_after) if retry_after > 0 else BACKOFF_BASE
+    return retry_after + rng.uniform(0, min(BACKOFF_MAX, base * 2 ** attempt))
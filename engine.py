@@ -0,0 +1,290 @@
+"""
+Sans-I/O round engine: the rules of a private Blackjack session as a state
+machine.
+
+The engine is driven by events (join, start_round, hit, stand) and answers
+each one with the outbound records it produced: the cards dealt (Dealt) and
+the outcome of the round (Settled). It never touches a socket, a clock, a log
+or a sleep. The threaded server, the asyncio server and the offline simulator
+all play by this one copy of the rules; each driver turns the records into
+whatever it needs (wire messages, trace lines, counts).
+
+States:
+    IDLE            no session: before join() and after the last round
+    BETWEEN_ROUNDS  joined, the next round is not dealt yet
+    PLAYER_TURN     cards dealt, waiting for hit() or stand()
+
+A round deals in the server's order: two cards to the player, then the
+dealer's upcard and hole card. A hit that busts loses at once. On a stand the
+dealer reveals the hole card and hits below 17 (standing on every 17).
+No natural bonus; equal totals tie.
+
+    engine = RoundEngine(Shoe())
+    engine.join(3)
+    while engine.state is BETWEEN_ROUNDS:
+        send(engine.start_round())
+        while engine.state is PLAYER_TURN:
+            send(engine.decide(read_decision()))
+
+TableEngine plays the same rules for the several seats of a shared table
+(table.py) against one dealer.
+"""
+from collections import namedtuple
+
+from cards import *
+from consts import *
+
+# --- States ---
+IDLE = "idle"
+BETWEEN_ROUNDS = "between_rounds"
+PLAYER_TURN = "player_turn"
+
+# --- Outbound Records ---
+# Who a Dealt card goes to
+PLAYER = 0         # A player card (the opening two, then each hit)
+DEALER_UPCARD = 1  # The dealer's face-up card, dealt with the opening cards
+DEALER_HOLE = 2    # The dealer's face-down card, revealed when the player stands
+DEALER_DRAW = 3    # A card the dealer draws after the reveal
+
+Dealt = namedtuple("Dealt", ["to", "card"])
+Settled = namedtuple("Settled", ["result", "player_total", "dealer_total"])
+
+# Builds a record straight from a tuple of field values (as in protocol.py)
+_new_record = tuple.__new__
+
+class InvalidEvent(Exception):
+    """
+    An event the engine does not accept in its current state (e.g. a hit
+    between rounds).
+    """
+
+def play_dealer(shoe, dealer_hand):
+    """
+    The dealer's rule: draws until the hand reaches DEALER_STANDS_ON.
+    Returns:
+        list: The cards drawn (empty if the dealer already stands).
+    """
+    drawn = []
+    draw = shoe.draw_card
+    while dealer_hand.total < DEALER_STANDS_ON:
+        card = draw()
+        dealer_hand.add(card)
+        drawn.append(card)
+    return drawn
+
+class RoundEngine:
+    """
+    One player's session against the dealer, dealt from 'shoe'. Event methods
+    return the list of records they produced; the player's and dealer's hands
+    and the last result can be read at any time.
+    """
+
+    __slots__ = ("shoe", "state", "rounds_left", "round_num", "player_hand", "dealer_hand", "result")
+
+    def __init__(self, shoe):
+        self.shoe = shoe
+        self.state = IDLE
+        self.rounds_left = 0
+        self.round_num = 0     # Rounds dealt in the current session
+        self.player_hand = Hand()
+        self.dealer_hand = Hand()
+        self.result = None     # Outcome of the current round (RESULT_NOT_OVER while it runs)
+
+    def _reject(self, event):
+        raise InvalidEvent(f"'{event}' is not accepted in state '{self.state}'")
+
+    def join(self, rounds):
+        """
+        Starts a session of 'rounds' rounds (a session of 0 rounds ends at once).
+        """
+        if self.state is not IDLE:
+            self._reject("join")
+        self.rounds_left = rounds
+        self.round_num = 0
+        self.result = None
+        self.state = BETWEEN_ROUNDS if rounds > 0 else IDLE
+        return []
+
+    def start_round(self):
+        """
+        Deals the next round.
+        Returns:
+            list: Dealt records for the player's two cards and the dealer's upcard
+                  (the hole card is dealt but not shown).
+        """
+        if self.state is not BETWEEN_ROUNDS:
+            self._reject("start_round")
+        shoe = self.shoe
+        shoe.start_round()
+        draw = shoe.draw_card
+        first, second, upcard = draw(), draw(), draw()
+
+        player_hand = self.player_hand
+        dealer_hand = self.dealer_hand
+        player_hand.clear()
+        dealer_hand.clear()
+        player_hand.add(first)
+        player_hand.add(second)
+        dealer_hand.add(upcard)
+        dealer_hand.add(draw())
+        # Two cards can never bust (two Aces count 12), so the player always gets a turn
+
+        self.round_num += 1
+        self.rounds_left -= 1
+        self.result = RESULT_NOT_OVER
+        self.state = PLAYER_TURN
+        return [_new_record(Dealt, (PLAYER, first)), _new_record(Dealt, (PLAYER, second)),
+                _new_record(Dealt, (DEALER_UPCARD, upcard))]
+
+    def hit(self):
+        """
+        Returns:
+            list: The Dealt card, followed by a RESULT_LOSS Settled if it busted the player.
+        """
+        if self.state is not PLAYER_TURN:
+            self._reject("hit")
+        card = self.shoe.draw_card()
+        events = [_new_record(Dealt, (PLAYER, card))]
+        if self.player_hand.add(card) > BLACKJACK:
+            events.append(self._settle(RESULT_LOSS))
+        return events
+
+    def stand(self):
+        """
+        Plays the dealer's turn and settles the round.
+        Returns:
+            list: The revealed hole card, the dealer's draws, then Settled.
+        """
+        if self.state is not PLAYER_TURN:
+            self._reject("stand")
+        dealer_hand = self.dealer_hand
+        events = [_new_record(Dealt, (DEALER_HOLE, dealer_hand.cards[1]))]
+        for card in play_dealer(self.shoe, dealer_hand):
+            events.append(_new_record(Dealt, (DEALER_DRAW, card)))
+        events.append(self._settle(round_result(self.player_hand.total, dealer_hand.total)))
+        return events
+
+    def decide(self, decision):
+        """
+        Applies a decision as it arrives from a client (ACTION_HIT / ACTION_STAND).
+        Returns:
+            list: The records of hit() or stand(); empty for an unknown decision.
+        """
+        if decision == ACTION_HIT:
+            return self.hit()
+        if decision == ACTION_STAND:
+            return self.stand()
+        return []
+
+    def _settle(self, result):
+        self.result = result
+        self.state = BETWEEN_ROUNDS if self.rounds_left > 0 else IDLE
+        return _new_record(Settled, (result, self.player_hand.total, self.dealer_hand.total))
+
+class TableEngine:
+    """
+    The rules of a shared table: the hands of seats numbered 0 to size-1
+    against one dealer, dealt from 'shoe'.
+
+    A round deals two cards to every seat in seat order, then the dealer's
+    upcard and hole card. Seats then hit in turn (or forfeit, when they leave
+    mid-round); a seat that stops hitting stands. settle() plays one dealer
+    turn for every seat still in (none if every seat busted) and decides them.
+
+    Records are returned per seat, so that each seat's records read exactly as
+    a RoundEngine's would for a private round: its own cards and the upcard,
+    its hits, then the dealer's cards and its Settled (a bust settles at once).
+    """
+
+    __slots__ = ("shoe", "state", "seats", "hands", "out", "dealer_hand")
+
+    def __init__(self, shoe, size):
+        self.shoe = shoe
+        self.state = BETWEEN_ROUNDS
+        self.seats = []  # Seat numbers dealt into the current round, in seat order
+        self.hands = [Hand() for _ in range(size)]
+        self.out = [False] * size  # Busted or forfeited this round
+        self.dealer_hand = Hand()
+
+    def _reject(self, event):
+        raise InvalidEvent(f"'{event}' is not accepted in state '{self.state}'")
+
+    def start_round(self, seats):
+        """
+        Deals a round to 'seats' (seat numbers, in seat order).
+        Returns:
+            dict: {seat: Dealt records for its two cards and the dealer's upcard}
+        """
+        if self.state is not BETWEEN_ROUNDS:
+            self._reject("start_round")
+        shoe = self.shoe
+        shoe.start_round()
+        draw = shoe.draw_card
+        hands, out = self.hands, self.out
+        self.seats = seats = list(seats)
+        dealt = {}
+        for seat in seats:
+            first, second = draw(), draw()
+            hand = hands[seat]
+            hand.clear()
+            hand.add(first)
+            hand.add(second)
+            out[seat] = False
+            dealt[seat] = [_new_record(Dealt, (PLAYER, first)), _new_record(Dealt, (PLAYER, second))]
+
+        dealer_hand = self.dealer_hand
+        dealer_hand.clear()
+        upcard = draw()
+        dealer_hand.add(upcard)
+        dealer_hand.add(draw())
+        shown = _new_record(Dealt, (DEALER_UPCARD, upcard))
+        for events in dealt.values():
+            events.append(shown)
+        self.state = PLAYER_TURN
+        return dealt
+
+    def hit(self, seat):
+        """
+        Returns:
+            list: The Dealt card, followed by a RESULT_LOSS Settled if it busted the seat.
+        """
+        if self.state is not PLAYER_TURN or self.out[seat] or seat not in self.seats:
+            self._reject("hit")
+        card = self.shoe.draw_card()
+        hand = self.hands[seat]
+        events = [_new_record(Dealt, (PLAYER, card))]
+        if hand.add(card) > BLACKJACK:
+            self.out[seat] = True
+            events.append(_new_record(Settled, (RESULT_LOSS, hand.total, self.dealer_hand.total)))
+        return events
+
+    def forfeit(self, seat):
+        """
+        Takes a seat out of the current round without a result (its player left).
+        """
+        if self.state is PLAYER_TURN:
+            self.out[seat] = True
+
+    def settle(self):
+        """
+        Plays the dealer's turn and decides every seat still in the round.
+        Returns:
+            (list, dict): The revealed hole card and the dealer's draws, and
+                          {seat: Settled} for the seats that were still in.
+        """
+        if self.state is not PLAYER_TURN:
+            self._reject("settle")
+        dealer_hand = self.dealer_hand
+        out = self.out
+        standing = [seat for seat in self.seats if not out[seat]]
+        dealer_events = [_new_record(Dealt, (DEALER_HOLE, dealer_hand.cards[1]))]
+        if standing:
+            for card in play_dealer(self.shoe, dealer_hand):
+                dealer_events.append(_new_record(Dealt, (DEALER_DRAW, card)))
+        dealer_total = dealer_hand.total
+        settled = {}
+        for seat in standing:
+            total = self.hands[seat].total
+            settled[seat] = _new_record(Settled, (round_result(total, dealer_total), total, dealer_total))
+        self.state = BETWEEN_ROUNDS
+        return dealer_events, settled
@@ -0,0 +1,149 @@
+"""
+Buffered message framing for TCP sockets, shared by the client and the server.
+"""
+import asyncio
+
+# Initial receive buffer size. Every protocol message but an Autoplay Results
+# chunk is far smaller, so one recv_into usually brings in several whole messages
+# at once (the buffer grows for the chunks).
+DEFAULT_CAPACITY = 4096
+
+class FrameReader:
+    """
+    Reads whole protocol messages ("frames") from a stream socket.
+
+    Bytes are received with recv_into straight into one preallocated bytearray,
+    and each frame is handed out as a memoryview over that buffer (no copy).
+    When a single recv brings in several messages, the following read_frame
+    calls return them without touching the socket again.
+
+    A returned frame is only valid until the next read_frame call: the buffer
+    is reused (compacted) in place.
+    """
+
+    def __init__(self, sock, frame_length, capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            sock (socket): Connected stream socket to read from.
+            frame_length (callable): frame_length(buffer, offset, available) returns the
+                full size of the message starting at 'offset', or None when more bytes
+                are needed to tell (see protocol.server_frame_length / client_frame_length).
+            capacity (int): Initial buffer size in bytes (grows if a message is larger).
+        """
+        self.sock = sock
+        self.frame_length = frame_length
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # First byte not yet handed out
+        self.end = 0    # One past the last byte received
+
+    def buffered(self):
+        """
+        Returns the number of received bytes not yet handed out as frames.
+        """
+        return self.end - self.start
+
+    def has_frame(self):
+        """
+        True if a whole frame is already buffered (read_frame will not block).
+        """
+        available = self.end - self.start
+        if not available:
+            return False
+        length = self.frame_length(self.buffer, self.start, available)
+        return length is not None and length <= available
+
+    def read_frame(self):
+        """
+        Returns the next whole message as a memoryview, receiving more data only
+        when the buffer does not already hold it.
+        Raises:
+            ConnectionError: If the peer closes the connection mid-stream.
+        """
+        while True:
+            available = self.end - self.start
+            length = None
+            if available:
+                length = self.frame_length(self.buffer, self.start, available)
+                if length is not None and length <= available:
+                    frame = self.view[self.start:self.start + length]
+                    self.start += length
+                    return frame
+            self._fill(length)
+
+    def _fill(self, needed):
+        """
+        Receives more bytes, making room for a frame of 'needed' bytes first
+        (None = size not known yet).
+        """
+        if self.start == self.end:
+            # Everything was consumed: rewind for free
+            self.start = self.end = 0
+
+        capacity = len(self.buffer)
+        if needed is not None and needed > capacity:
+            self._grow(needed)
+        elif self.end == capacity or (needed is not None and self.start + needed > capacity):
+            self._compact()
+
+        received = self.sock.recv_into(self.view[self.end:])
+        if not received:
+            raise ConnectionError("Connection closed unexpectedly")
+        self.end += received
+
+    def _compact(self):
+        # Move the unread tail to the front of the buffer
+        pending = self.end - self.start
+        self.buffer[:pending] = self.buffer[self.start:self.end]
+        self.start, self.end = 0, pending
+
+    def _grow(self, needed):
+        # A message larger than the buffer: allocate a bigger one (rare)
+        pending = self.end - self.start
+        buffer = bytearray(max(needed, 2 * len(self.buffer)))
+        buffer[:pending] = self.buffer[self.start:self.end]
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        self.start, self.end = 0, pending
+
+async def read_frame_async(stream, frame_length, header_size, timeout=None):
+    """
+    Reads the next whole message from an asyncio StreamReader.
+    The StreamReader already buffers everything the socket delivered, so queued
+    messages are consumed from memory without waiting on the network.
+
+    'timeout' limits the wait for the message to begin and then, separately,
+    for the rest of it. A timeout before the message begins consumes nothing
+    (readexactly takes no bytes until it has them all), so the caller may read
+    again. Once part of a message has been consumed, the stream cannot be
+    brought back in step, so a timeout there is raised as a ConnectionError.
+    Args:
+        stream (asyncio.StreamReader): Stream to read from.
+        frame_length (callable): Same contract as for FrameReader.
+        header_size (int): Bytes to read before frame_length is first asked.
+        timeout (float): Seconds to wait (None: no limit).
+    Returns:
+        bytes: The whole message.
+    Raises:
+        asyncio.IncompleteReadError: If the peer closes the connection mid-stream.
+        asyncio.TimeoutError: If no message began within 'timeout'.
+        ConnectionError: If a message that began was not completed within 'timeout'.
+    """
+    data = await _readexactly(stream, header_size, timeout)
+    try:
+        length = frame_length(data, 0, len(data))
+        while length is None:
+            # Header longer than the common one (e.g. a Batch): read one more byte
+            data += await _readexactly(stream, 1, timeout)
+            length = frame_length(data, 0, len(data))
+
+        if length > len(data):
+            data += await _readexactly(stream, length - len(data), timeout)
+    except asyncio.TimeoutError:
+        raise ConnectionError("Timed out in the middle of a message") from None
+    return data
+
+async def _readexactly(stream, size, timeout):
+    if timeout is None:
+        return await stream.readexactly(size)
+    return await asyncio.wait_for(stream.readexactly(size), timeout)
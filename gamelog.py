@@ -0,0 +1,150 @@
+"""
+Server logging: leveled, structured events, formatted and written by a
+background thread.
+
+Session threads (or the event loop) only put a LogRecord on a queue; a
+QueueListener thread formats it and writes it to stdout. Records travel
+unformatted: the message template and its fields are applied on the listener
+thread, not on the hot path.
+
+Levels:
+    INFO   server and session lifecycle (listening, joined, finished)
+    TRACE  every card, decision and result (off by default; --trace, or
+           SIGUSR1 to toggle while the server runs)
+
+Every event has a name and fields: the "text" format prints the message as the
+server always has, the "json" format prints one JSON object per line:
+    {"ts": 1700000000.123, "level": "TRACE", "event": "player_card", "card": "A♡", ...}
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+LOG_FORMATS = ("text", "json")
+
+logger = logging.getLogger("blackjack")
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+# Read by trace() before it builds a record; a plain global is cheaper than logger.isEnabledFor
+tracing = False
+
+_listener = None
+_format = "text"
+
+class TextFormatter(logging.Formatter):
+    """
+    The message alone, as the server printed it before.
+    """
+
+    def format(self, record):
+        return record.getMessage()
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, event, the event's fields and msg.
+    """
+
+    def format(self, record):
+        entry = {"ts": round(record.created, 6), "level": record.levelname,
+                 "event": getattr(record, "event", None)}
+        if isinstance(record.args, dict):
+            entry.update(record.args)
+        entry["msg"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues records as they are. The stock QueueHandler formats the message in
+    the caller's thread; event fields are immutable values (ints, strings), so
+    formatting can wait for the listener.
+    """
+
+    def prepare(self, record):
+        return record
+
+# --- Setup ---
+def setup(fmt="text", trace=False, stream=None):
+    """
+    (Re)starts the background writer. Call once per process before serving; a
+    forked worker process must call it again (threads do not survive a fork).
+    Args:
+        fmt (str): "text" or "json".
+        trace (bool): Start with per-card trace events on.
+        stream: Where records are written (default sys.stdout).
+    """
+    global _listener, _format
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}' (expected one of {', '.join(LOG_FORMATS)})")
+    if _listener is not None:
+        stop()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    records = queue.SimpleQueue()
+    logger.handlers = [DeferredQueueHandler(records)]
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    _format = fmt
+    set_trace(trace)
+
+def stop():
+    """
+    Writes every queued record and stops the background writer.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop)
+
+def settings():
+    """
+    Current setup() arguments, to start the same logging in another process.
+    """
+    return {"fmt": _format, "trace": tracing}
+
+def set_trace(enabled):
+    global tracing
+    tracing = bool(enabled)
+    logger.setLevel(TRACE if tracing else logging.INFO)
+
+def toggle_trace(*_signal_args):
+    """
+    Flips trace events on/off (usable as a signal handler).
+    """
+    set_trace(not tracing)
+    info("trace_toggled", "Trace logging %(state)s", state="on" if tracing else "off")
+
+# --- Events ---
+def _log(level, event, message, fields):
+    if fields:
+        logger.log(level, message, fields, extra={"event": event})
+    else:
+        # An empty dict would still be applied to the template
+        logger.log(level, message, extra={"event": event})
+
+def info(event, message, **fields):
+    """
+    Logs an INFO event. 'message' is a %-template over the fields, e.g.
+    info("joined", "Team '%(team)s' joined", team=name).
+    """
+    _log(logging.INFO, event, message, fields)
+
+def warning(event, message, **fields):
+    _log(logging.WARNING, event, message, fields)
+
+def trace(event, message, **fields):
+    """
+    Logs a TRACE event; returns at once while tracing is off.
+    """
+    if tracing:
+        _log(TRACE, event, message, fields)
@@ -0,0 +1,153 @@
+"""
+Local IPv4 interfaces and their broadcast addresses, read straight from the
+kernel instead of probed through a route to the internet.
+
+On Linux the interface list comes from the SIOCGIFCONF ioctl, and each
+interface's flags, netmask and broadcast address from SIOCGIF* ioctls on one
+UDP socket: no packet is sent and no route is needed, so discovery works the
+same on a network with no internet access. Elsewhere (or if the ioctls fail)
+the addresses the host name resolves to are used, with the limited broadcast
+address.
+
+The list is cached for REFRESH_INTERVAL seconds, so callers can ask on every
+offer they send or wait for without re-reading it.
+
+    python interfaces.py       # what the server would broadcast on
+"""
+import array
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: enumerate by host name instead
+    fcntl = None
+
+# --- Kernel Interface (Linux) ---
+SIOCGIFCONF = 0x8912
+SIOCGIFFLAGS = 0x8913
+SIOCGIFBRDADDR = 0x8919
+SIOCGIFNETMASK = 0x891B
+
+IFF_UP = 0x1
+IFF_BROADCAST = 0x2
+IFF_LOOPBACK = 0x8
+
+IFNAMSIZ = 16
+# struct ifreq: the name, then a union whose largest member (struct ifmap) holds pointers
+IFREQ_SIZE = 40 if struct.calcsize("P") == 8 else 32
+ADDRESS_OFFSET = IFNAMSIZ + 4  # sin_addr inside the ifreq's sockaddr_in (after family and port)
+MAX_INTERFACES = 128
+
+# --- Addresses ---
+LOOPBACK_ADDRESS = "127.0.0.1"
+LOOPBACK_BROADCAST = "127.255.255.255"  # Reaches every listener on this host when there is no network at all
+LIMITED_BROADCAST = "255.255.255.255"
+
+REFRESH_INTERVAL = 30.0  # Seconds a read interface list is reused before the next read
+
+# broadcast is None for an interface that cannot broadcast (loopback, point-to-point links)
+Interface = namedtuple("Interface", ["name", "address", "netmask", "broadcast", "flags"])
+
+def _ioctl_address(sock, request, name):
+    ifreq = fcntl.ioctl(sock.fileno(), request, struct.pack(f"{IFREQ_SIZE}s", name))
+    return socket.inet_ntoa(ifreq[ADDRESS_OFFSET:ADDRESS_OFFSET + 4])
+
+def _read_ioctl():
+    """
+    Enumerates the IPv4 interfaces with SIOCGIFCONF (Linux).
+    Raises:
+        OSError: If an ioctl is not supported.
+    """
+    interfaces = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        buffer = array.array("B", bytes(MAX_INTERFACES * IFREQ_SIZE))
+        buffer_address, buffer_size = buffer.buffer_info()
+        # struct ifconf: the buffer's length, then a pointer to it
+        ifconf = fcntl.ioctl(sock.fileno(), SIOCGIFCONF, struct.pack("iP", buffer_size, buffer_address))
+        used = struct.unpack("iP", ifconf)[0]
+        records = buffer.tobytes()
+
+        for offset in range(0, used, IFREQ_SIZE):
+            name = records[offset:offset + IFNAMSIZ].split(b"\0", 1)[0]
+            address = socket.inet_ntoa(records[offset + ADDRESS_OFFSET:offset + ADDRESS_OFFSET + 4])
+            ifreq = fcntl.ioctl(sock.fileno(), SIOCGIFFLAGS, struct.pack(f"{IFREQ_SIZE}s", name))
+            flags = struct.unpack_from("H", ifreq, IFNAMSIZ)[0]
+            netmask = _ioctl_address(sock, SIOCGIFNETMASK, name)
+            broadcast = _ioctl_address(sock, SIOCGIFBRDADDR, name) if flags & IFF_BROADCAST else None
+            interfaces.append(Interface(name.decode(errors="replace"), address, netmask, broadcast, flags))
+    return interfaces
+
+def _read_hostname():
+    """
+    Fallback enumeration: the host name's IPv4 addresses, as broadcast-capable
+    interfaces with unknown masks.
+    """
+    try:
+        infos = socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET, socket.SOCK_DGRAM)
+    except OSError:
+        infos = []
+    addresses = dict.fromkeys(info[4][0] for info in infos)
+    interfaces = [Interface("lo", LOOPBACK_ADDRESS, "255.0.0.0", None, IFF_UP | IFF_LOOPBACK)]
+    for address in addresses:
+        if not address.startswith("127."):
+            interfaces.append(Interface(address, address, None, LIMITED_BROADCAST, IFF_UP | IFF_BROADCAST))
+    return interfaces
+
+def read_interfaces():
+    """
+    Reads the host's IPv4 interfaces that are up, bypassing the cache.
+    Returns:
+        tuple of Interface, in the kernel's order.
+    """
+    interfaces = None
+    if fcntl is not None:
+        try:
+            interfaces = _read_ioctl()
+        except OSError:
+            interfaces = None
+    if interfaces is None:
+        interfaces = _read_hostname()
+    return tuple(interface for interface in interfaces if interface.flags & IFF_UP)
+
+# --- Cache ---
+_lock = threading.Lock()
+_cached = ()
+_read_at = None  # Monotonic time of the cached read
+
+def local_interfaces(max_age=REFRESH_INTERVAL):
+    """
+    Returns the host's IPv4 interfaces that are up (see read_interfaces),
+    re-read only when the cached list is older than 'max_age' seconds.
+    """
+    global _cached, _read_at
+    with _lock:
+        now = time.monotonic()
+        if _read_at is None or now - _read_at >= max_age:
+            _cached = read_interfaces()
+            _read_at = now
+        return _cached
+
+def broadcast_targets(max_age=REFRESH_INTERVAL):
+    """
+    Where to send a broadcast so that it reaches every attached network.
+    Returns:
+        list of (interface address, broadcast address), one per broadcast-capable
+        interface; on a host with no network, the loopback broadcast only (so
+        clients on this host still hear it).
+    """
+    targets = [(interface.address, interface.broadcast) for interface in local_interfaces(max_age)
+               if interface.broadcast and not interface.flags & IFF_LOOPBACK]
+    return targets or [(LOOPBACK_ADDRESS, LOOPBACK_BROADCAST)]
+
+def main():
+    for interface in read_interfaces():
+        kind = "loopback" if interface.flags & IFF_LOOPBACK else "broadcast " + (interface.broadcast or "-")
+        print(f"{interface.name:<12} {interface.address:<16} mask {interface.netmask or '?':<16} {kind}")
+    print("Broadcast targets:", ", ".join(broadcast for _, broadcast in broadcast_targets()))
+
+if __name__ == "__main__":
+    main()
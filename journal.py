@@ -0,0 +1,380 @@
+"""
+Append-only game journal: every session, card, decision and result a server
+plays, as fixed-width binary records.
+
+Sessions append plain tuples to an in-memory queue; a background thread packs
+them and writes them out every FLUSH_INTERVAL seconds, so the game never waits
+on the disk. If the process is killed, at most the last interval of records is lost.
+A torn record at the end of a file is ignored by the reader.
+
+File layout (little-endian, so NumPy can view the records in place):
+    header   16 bytes: magic, format version, record size, start time (Unix seconds)
+    records  20 bytes each: session, round, ms (8 bytes), kind, who, value, extra
+
+    kind             who                  value                 round / extra
+    KIND_SESSION     SESSION_* (played by)  protocol version    rounds asked / Request flags
+    KIND_CARD        engine.PLAYER ...    card int (0-51)       round
+    KIND_DECISION    -                    DECISION_HIT / STAND  round
+    KIND_RESULT      -                    RESULT_*              round
+    KIND_SESSION_END -                    1 if it ended on an error   rounds played
+
+'ms' is the time of the record in milliseconds since the journal was created.
+Session ids are unique within one file.
+
+Read a journal:
+    python journal.py summary server.journal          # counts and win rate by upcard
+    python journal.py dump server.journal --limit 40
+Replay its decisions against a server: python -m benchmarks.replay
+"""
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from itertools import count
+
+import gamelog
+from consts import *
+from cards import *
+from engine import Settled, DEALER_UPCARD
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the analytics fall back to a loop over the records
+    np = None
+
+# --- Format ---
+JOURNAL_MAGIC = b"BJJL"
+JOURNAL_FORMAT = 2  # 2: 'ms' widened to 8 bytes (4 bytes ran out 49.7 days after the journal was created)
+HEADER_STRUCT = struct.Struct("<4sHHd")     # magic, format, record size, start time
+RECORD_STRUCT = struct.Struct("<IIQBBBB")   # session, round, ms, kind, who, value, extra
+HEADER_SIZE = HEADER_STRUCT.size
+RECORD_SIZE = RECORD_STRUCT.size
+
+KIND_SESSION = 0
+KIND_CARD = 1
+KIND_DECISION = 2
+KIND_RESULT = 3
+KIND_SESSION_END = 4
+KIND_NAMES = ("session", "card", "decision", "result", "session_end")
+
+DECISION_OTHER = 0  # A decision that was neither Hit nor Stand
+DECISION_HIT = 1
+DECISION_STAND = 2
+DECISION_CODES = {ACTION_HIT: DECISION_HIT, ACTION_STAND: DECISION_STAND}
+DECISION_ACTIONS = {DECISION_HIT: ACTION_HIT, DECISION_STAND: ACTION_STAND}
+
+SESSION_PLAYER = 0    # The client decided every round
+SESSION_AUTOPLAY = 1  # The server decided by the client's Autoplay policy
+
+FLUSH_INTERVAL = 0.25  # Seconds between two writes of the queued records
+
+Record = namedtuple("Record", ["session", "round", "ms", "kind", "who", "value", "extra"])
+
+# Builds a record straight from a tuple of field values (as in protocol.py)
+_new_record = tuple.__new__
+
+class JournalError(Exception):
+    """
+    A file that is not a journal, or one written in another format.
+    """
+
+def read_header(data, path):
+    """
+    Returns:
+        float: The journal's start time (Unix seconds).
+    Raises:
+        JournalError: If 'data' does not start with a journal header.
+    """
+    if len(data) < HEADER_SIZE:
+        raise JournalError(f"{path}: too short for a journal header")
+    magic, fmt, record_size, started = HEADER_STRUCT.unpack_from(data)
+    if magic != JOURNAL_MAGIC:
+        raise JournalError(f"{path}: not a journal")
+    if fmt != JOURNAL_FORMAT or record_size != RECORD_SIZE:
+        raise JournalError(f"{path}: journal format {fmt} with {record_size}-byte records is not supported")
+    return started
+
+# --- Writer ---
+class Journal:
+    """
+    Appends records to a journal file from any thread (or the event loop).
+    Opening an existing journal continues it.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.file = open(path, "ab")
+        size = self.file.tell()
+        if size == 0:
+            self.started = time.time()
+            self.file.write(HEADER_STRUCT.pack(JOURNAL_MAGIC, JOURNAL_FORMAT, RECORD_SIZE, self.started))
+            size = HEADER_SIZE
+        else:
+            with open(path, "rb") as existing:
+                self.started = read_header(existing.read(HEADER_SIZE), path)
+            # Drop a record torn by an earlier crash, so new records stay aligned
+            size -= (size - HEADER_SIZE) % RECORD_SIZE
+            self.file.truncate(size)
+        # Every session writes at least one record, so numbering from the record
+        # count keeps ids unique across restarts
+        self.session_ids = count((size - HEADER_SIZE) // RECORD_SIZE + 1)
+
+        self.pending = deque()  # Record tuples not written yet (append and popleft are thread-safe)
+        self.stopped = threading.Event()
+        self.flush_interval = flush_interval
+        self.writer = threading.Thread(target=self.run_writer, name="journal-writer")
+        self.writer.daemon = True
+        self.writer.start()
+
+    def now_ms(self):
+        return int((time.time() - self.started) * 1000)
+
+    def start_session(self, version, rounds, flags, autoplay=False):
+        """
+        Records a new session (its Request, or Autoplay request if 'autoplay').
+        Returns:
+            int: The session id to pass with the session's other records.
+        """
+        session = next(self.session_ids)
+        played_by = SESSION_AUTOPLAY if autoplay else SESSION_PLAYER
+        self.pending.append((session, rounds, self.now_ms(), KIND_SESSION, played_by, version, flags))
+        return session
+
+    def record_events(self, session, round_num, events, decision=None):
+        """
+        Records the cards and the result returned by one engine.RoundEngine
+        event, after the client's decision that caused it (if given).
+        """
+        ms = self.now_ms()
+        append = self.pending.append
+        if decision is not None:
+            append((session, round_num, ms, KIND_DECISION, 0, DECISION_CODES.get(decision, DECISION_OTHER), 0))
+        for event in events:
+            if type(event) is Settled:
+                append((session, round_num, ms, KIND_RESULT, 0, event.result, 0))
+            else:
+                append((session, round_num, ms, KIND_CARD, event.to, event.card, 0))
+
+    def end_session(self, session, rounds_played, failed=False):
+        self.pending.append((session, rounds_played, self.now_ms(), KIND_SESSION_END, 0, int(failed), 0))
+
+    def flush(self):
+        """
+        Writes every queued record (one write for the whole batch).
+        Raises:
+            OSError / struct.error: If the batch could not be written (it is dropped).
+        """
+        pending = self.pending
+        if not pending:
+            return
+        pack = RECORD_STRUCT.pack
+        popleft = pending.popleft
+        # Records appended while this runs wait for the next flush
+        self.file.write(b"".join([pack(*popleft()) for _ in range(len(pending))]))
+        self.file.flush()
+
+    def run_writer(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except (OSError, struct.error) as e:
+                # Lose this batch, not the journal: later records are written as usual
+                gamelog.warning("journal_error", "Journal write to %(path)s failed: %(error)s",
+                    path=self.path, error=str(e))
+
+    def close(self):
+        """
+        Stops the writer thread, writes what is left and closes the file.
+        """
+        self.stopped.set()
+        self.writer.join()
+        self.flush()
+        self.file.close()
+
+# --- Reader ---
+class JournalReader:
+    """
+    A journal file mapped into memory. Iterating yields Record tuples unpacked
+    straight from the mapping; array() is a NumPy view of all the records, with
+    no copy. Close the reader only after dropping any views of it.
+
+        with JournalReader("server.journal") as journal:
+            for record in journal:
+                ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise JournalError(f"{path}: too short for a journal header")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.file.close()
+            raise
+        self.started = read_header(self.map, path)
+        # A torn record at the end (the writer was killed mid-write) is left out
+        self.count = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        records = memoryview(self.map)[HEADER_SIZE:HEADER_SIZE + self.count * RECORD_SIZE]
+        try:
+            for values in RECORD_STRUCT.iter_unpack(records):
+                yield _new_record(Record, values)
+        finally:
+            records.release()
+
+    def array(self):
+        """
+        Returns:
+            numpy structured array: Every record, viewed in place (read-only).
+        Raises:
+            RuntimeError: Without NumPy.
+        """
+        if np is None:
+            raise RuntimeError("JournalReader.array needs NumPy")
+        return np.frombuffer(self.map, dtype=RECORD_DTYPE, count=self.count, offset=HEADER_SIZE)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([("session", "<u4"), ("round", "<u4"), ("ms", "<u8"), ("kind", "u1"),
+                             ("who", "u1"), ("value", "u1"), ("extra", "u1")])
+    assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+# --- Analytics ---
+UPCARD_VALUES = range(2, ACE_VALUE + 1)
+
+def upcard_outcomes(journal):
+    """
+    Counts the results of finished rounds by the dealer's upcard (2-11, Ace = 11),
+    vectorized when NumPy is installed.
+    Returns:
+        dict: {upcard value: (rounds, wins, losses, ties)}
+    """
+    if np is None:
+        return _upcard_outcomes_loop(journal)
+
+    records = journal.array()
+    # One key per (session, round): the upcard and the result of a round share it
+    keys = (records["session"].astype(np.uint64) << np.uint64(32)) | records["round"]
+    kinds = records["kind"]
+    is_upcard = (kinds == KIND_CARD) & (records["who"] == DEALER_UPCARD)
+    is_result = kinds == KIND_RESULT
+
+    upcard_keys = keys[is_upcard]
+    order = np.argsort(upcard_keys, kind="stable")
+    upcard_keys = upcard_keys[order]
+    upcard_values = np.asarray(CARD_VALUE, dtype=np.uint8)[records["value"][is_upcard][order]]
+
+    result_keys = keys[is_result]
+    results = records["value"][is_result]
+    found = np.searchsorted(upcard_keys, result_keys)
+    found[found == len(upcard_keys)] = 0
+    matched = (upcard_keys[found] == result_keys) if len(upcard_keys) else np.zeros(len(result_keys), bool)
+
+    table = np.zeros((ACE_VALUE + 1, RESULT_WIN + 1), dtype=np.int64)
+    np.add.at(table, (upcard_values[found[matched]], results[matched]), 1)
+    return {value: (int(table[value].sum()), int(table[value, RESULT_WIN]), int(table[value, RESULT_LOSS]),
+                    int(table[value, RESULT_TIE]))
+            for value in UPCARD_VALUES}
+
+def _upcard_outcomes_loop(journal):
+    upcards = {}
+    table = {value: [0, 0, 0, 0] for value in UPCARD_VALUES}
+    column = {RESULT_WIN: 1, RESULT_LOSS: 2, RESULT_TIE: 3}
+    for record in journal:
+        if record.kind == KIND_CARD and record.who == DEALER_UPCARD:
+            upcards[record.session, record.round] = CARD_VALUE[record.value]
+        elif record.kind == KIND_RESULT:
+            value = upcards.pop((record.session, record.round), None)
+            if value is not None:
+                row = table[value]
+                row[0] += 1
+                row[column[record.value]] += 1
+    return {value: tuple(row) for value, row in table.items()}
+
+def summary(journal):
+    """
+    Returns:
+        dict: records, sessions, rounds (finished), cards and decisions.
+    """
+    if np is not None:
+        kinds = np.bincount(journal.array()["kind"], minlength=len(KIND_NAMES))
+    else:
+        kinds = [0] * len(KIND_NAMES)
+        for record in journal:
+            kinds[record.kind] += 1
+    return {"records": len(journal), "sessions": int(kinds[KIND_SESSION]), "rounds": int(kinds[KIND_RESULT]),
+            "cards": int(kinds[KIND_CARD]), "decisions": int(kinds[KIND_DECISION])}
+
+# --- Reading Tool ---
+def describe(record):
+    kind = record.kind
+    if kind == KIND_SESSION:
+        detail = f"{record.round} rounds, protocol v{record.value}, flags {record.extra:#04x}"
+        if record.who == SESSION_AUTOPLAY:
+            detail += ", autoplay"
+    elif kind == KIND_SESSION_END:
+        detail = f"{record.round} rounds played" + (", error" if record.value else "")
+    elif kind == KIND_CARD:
+        detail = f"round {record.round}: {('player', 'upcard', 'hole', 'dealer')[record.who]} {CARD_NAME[record.value]}"
+    elif kind == KIND_DECISION:
+        detail = f"round {record.round}: " + ("other", "hit", "stand")[record.value]
+    else:
+        detail = f"round {record.round}: " + {RESULT_WIN: "win", RESULT_LOSS: "loss", RESULT_TIE: "tie"}.get(record.value, "?")
+    return f"{record.ms / 1e3:>10.3f}s  session {record.session:<7} {KIND_NAMES[kind]:<12} {detail}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Read Blackjack server journals")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser("summary", help="Record counts and win rate by the dealer's upcard")
+    summary_parser.add_argument("paths", nargs="+")
+    dump_parser = commands.add_parser("dump", help="Print the records of a journal")
+    dump_parser.add_argument("path")
+    dump_parser.add_argument("--limit", type=int, help="Only the first N records")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        with JournalReader(args.path) as journal:
+            for index, record in enumerate(journal):
+                if index == args.limit:
+                    break
+                print(describe(record))
+        return
+
+    totals = dict.fromkeys(("records", "sessions", "rounds", "cards", "decisions"), 0)
+    outcomes = {value: [0, 0, 0, 0] for value in UPCARD_VALUES}
+    for path in args.paths:
+        with JournalReader(path) as journal:
+            for key, value in summary(journal).items():
+                totals[key] += value
+            for value, row in upcard_outcomes(journal).items():
+                outcomes[value] = [a + b for a, b in zip(outcomes[value], row)]
+    print(", ".join(f"{value:,} {key}" for key, value in totals.items()))
+    print(f"{'upcard':>6}{'rounds':>10}{'win':>8}{'loss':>8}{'tie':>8}")
+    for value, (rounds, wins, losses, ties) in outcomes.items():
+        name = "A" if value == ACE_VALUE else str(value)
+        if rounds:
+            print(f"{name:>6}{rounds:>10,}{wins / rounds:>8.1%}{losses / rounds:>8.1%}{ties / rounds:>8.1%}")
+        else:
+            print(f"{name:>6}{0:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Live server metrics: counters and latency histograms, plus a localhost HTTP
+endpoint that serves a JSON snapshot of them.
+
+Sessions add up their bytes and decision waits locally and hand them over once
+per round (ServerMetrics.record_round), so the hot path takes the metrics lock
+a few times per round, not once per card.
+
+Query a running server (started with --metrics-port):
+    curl http://127.0.0.1:9100/metrics
+    python metrics.py --port 9100 --watch 1     # per-second rates
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Counters ---
+COUNTER_KEYS = (
+    "sessions_started",   # Valid Request received (handshake done)
+    "sessions_finished",  # Session ended, normally or not
+    "rounds_played",
+    "bytes_in",           # Game TCP bytes received from clients (Requests and decisions)
+    "bytes_out",          # Game TCP bytes sent to clients
+    "session_errors",     # Sessions that ended on an error or a dropped connection
+    "sessions_rejected",  # Connections turned away with a Busy reply (server full)
+)
+
+# --- Histograms ---
+# Bucket upper bounds in seconds: 50 us doubling up to ~105 s, then +inf
+HISTOGRAM_BOUNDS = tuple(50e-6 * 2 ** i for i in range(22))
+PERCENTILES = (0.50, 0.95, 0.99)
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram. Not thread-safe on its own: ServerMetrics
+    updates it under its lock.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket: above every bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the bucket holding the given fraction of the samples
+        (an overestimate by at most 2x, never above the largest sample).
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: count, mean_ms, max_ms, p50_ms / p95_ms / p99_ms and the non-empty
+                  buckets as {"le_ms": upper bound, "count": n}.
+        """
+        result = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "max_ms": self.max * 1e3,
+        }
+        for fraction in PERCENTILES:
+            result[f"p{round(fraction * 100)}_ms"] = self.percentile(fraction) * 1e3
+        result["buckets"] = [
+            {"le_ms": self.bounds[i] * 1e3 if i < len(self.bounds) else None, "count": n}
+            for i, n in enumerate(self.counts) if n
+        ]
+        return result
+
+class ServerMetrics:
+    """
+    Every metric of one server process, safe to update from any session thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = dict.fromkeys(COUNTER_KEYS, 0)
+        self.round_time = Histogram()     # Deal to result of one round (pacing delays included)
+        self.decision_wait = Histogram()  # Card sent until the client's Hit/Stand arrived
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def record_round(self, seconds, bytes_in, bytes_out, decision_waits):
+        """
+        Adds one finished round, with the traffic and decision waits the session
+        collected since its last call, under a single lock acquisition.
+        """
+        with self.lock:
+            counters = self.counters
+            counters["rounds_played"] += 1
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+            self.round_time.observe(seconds)
+            observe = self.decision_wait.observe
+            for wait in decision_waits:
+                observe(wait)
+
+    def record_rounds(self, rounds, bytes_in, bytes_out):
+        """
+        Adds rounds the server played by itself (autoplay): counted, but with no
+        round time or decision waits to observe.
+        """
+        with self.lock:
+            counters = self.counters
+            counters["rounds_played"] += rounds
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+
+    def record_traffic(self, bytes_in, bytes_out):
+        """
+        Adds traffic not yet covered by record_round (e.g. a session that ended mid-round).
+        """
+        if bytes_in or bytes_out:
+            with self.lock:
+                self.counters["bytes_in"] += bytes_in
+                self.counters["bytes_out"] += bytes_out
+
+    def active_sessions(self):
+        with self.lock:
+            return self.counters["sessions_started"] - self.counters["sessions_finished"]
+
+    def counter_values(self, keys=COUNTER_KEYS):
+        """
+        Returns the current values of 'keys' as a list, read together.
+        """
+        with self.lock:
+            return [self.counters[key] for key in keys]
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: JSON-ready view: uptime_s, active_sessions, counters and histograms.
+        """
+        with self.lock:
+            counters = dict(self.counters)
+            round_time = self.round_time.snapshot()
+            decision_wait = self.decision_wait.snapshot()
+        return {
+            "uptime_s": time.time() - self.started,
+            "active_sessions": counters["sessions_started"] - counters["sessions_finished"],
+            "counters": counters,
+            "histograms": {"round_time": round_time, "decision_wait": decision_wait},
+        }
+
+# --- HTTP Endpoint ---
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    GET /metrics returns ServerMetrics.snapshot() as JSON.
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.metrics.snapshot(), indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Polling would otherwise print a line per request
+        pass
+
+def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """
+    Serves 'metrics' over HTTP from a background thread (localhost only by default).
+    Returns:
+        ThreadingHTTPServer: The running server (server_address holds the real port).
+    """
+    http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+    http_server.daemon_threads = True
+    http_server.metrics = metrics
+    thread = threading.Thread(target=http_server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return http_server
+
+# --- Query Tool ---
+def fetch(port, host="127.0.0.1", timeout=5.0):
+    """
+    Returns the snapshot served by a running server's metrics endpoint.
+    """
+    with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=timeout) as response:
+        return json.load(response)
+
+def print_rates(previous, current):
+    seconds = current["uptime_s"] - previous["uptime_s"]
+    old, new = previous["counters"], current["counters"]
+    rate = lambda key: (new[key] - old[key]) / seconds
+    wait = current["histograms"]["decision_wait"]
+    print(f"active {current['active_sessions']:>5} | handshakes/s {rate('sessions_started'):>8.1f} | "
+          f"rounds/s {rate('rounds_played'):>9.1f} | in {rate('bytes_in') / 1024:>8.1f} KiB/s | "
+          f"out {rate('bytes_out') / 1024:>8.1f} KiB/s | decision wait p50 {wait['p50_ms']:.2f} ms "
+          f"p99 {wait['p99_ms']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a Blackjack server's live metrics")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True, help="The server's --metrics-port")
+    parser.add_argument("--watch", type=float, help="Print per-second rates every N seconds")
+    args = parser.parse_args()
+
+    snapshot = fetch(args.port, args.host)
+    if not args.watch:
+        print(json.dumps(snapshot, indent=2))
+        return
+    try:
+        while True:
+            time.sleep(args.watch)
+            current = fetch(args.port, args.host)
+            print_rates(snapshot, current)
+            snapshot = current
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+# --- Delay Kinds ---
+DELAY_DEALER_DRAW = "dealer_draw"  # Before each card the dealer draws
+DELAY_ROUND_END = "round_end"      # After the final result of a round
+
+class Pacing:
+    """
+    Delay policy for a game session.
+    Humans get short pauses so the dealer's turn is readable; bots and load
+    tests use "turbo" (no delays at all).
+    """
+
+    def __init__(self, name, dealer_draw=0.0, round_end=0.0):
+        self.name = name
+        self.delays = {
+            DELAY_DEALER_DRAW: dealer_draw,
+            DELAY_ROUND_END: round_end,
+        }
+
+    def delay(self, kind):
+        """
+        Returns the delay (in seconds) for the given kind of pause.
+        """
+        return self.delays[kind]
+
+    def wait(self, kind):
+        """
+        Blocking pause (threaded mode). Returns immediately when the delay is zero.
+        """
+        seconds = self.delays[kind]
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def wait_async(self, kind):
+        """
+        Non-blocking pause (asyncio mode). The session is parked on the event loop's
+        timer queue, so a waiting session holds no thread.
+        """
+        seconds = self.delays[kind]
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def __repr__(self):
+        return f"Pacing({self.name!r}, {self.delays})"
+
+# --- Presets ---
+HUMAN = Pacing("human", dealer_draw=0.5, round_end=1.0)
+TURBO = Pacing("turbo")
+
+PRESETS = {
+    HUMAN.name: HUMAN,
+    TURBO.name: TURBO,
+}
+
+def get_pacing(name):
+    """
+    Looks up a preset by name ("human" or "turbo").
+    """
+    try:
+        return PRESETS[name]
+    except KeyError:
+        raise ValueError(f"Unknown pacing '{name}', expected one of {sorted(PRESETS)}")
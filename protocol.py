@@ -1,11 +1,88 @@
 # Constants
 import struct
+from collections import namedtuple
+from functools import lru_cache
 from consts import *
 
+# --- Precompiled Message Layouts ---
+# ! = Network Endian. Compiled once at import; pack/unpack never re-parse a format string.
+HEADER_STRUCT = struct.Struct('!IB')             # Magic Cookie (4) + Message Type (1), common to all messages
+OFFER_STRUCT = struct.Struct('!IBH32s')          # + Server Port (2) + Server Name (32)
+OFFER_LOAD_STRUCT = struct.Struct('!IBH32sHH')   # Offer fields + Active Sessions (2) + Capacity (2)
+SESSIONS_FIELD_STRUCT = struct.Struct('!H')      # The Active Sessions field alone, patched in place
+REQUEST_STRUCT = struct.Struct('!IBB32s')        # + Rounds (1) + Team Name (32)
+REQUEST_V2_STRUCT = struct.Struct('!IBBBB32s')   # + Version (1) + Flags (1) + Rounds (1) + Team Name (32)
+PAYLOAD_SERVER_STRUCT = struct.Struct('!IBBHB')  # + Result (1) + Card Rank (2) + Card Suit (1)
+PAYLOAD_CLIENT_STRUCT = struct.Struct('!IB5s')   # + Decision (5)
+DECISION_STRUCT = struct.Struct('!IBH5s')        # + Round Tag (2) + Decision (5)
+BATCH_HEADER_STRUCT = struct.Struct('!IBBB')     # + Result (1) + Card Count (1)
+BATCH_CARD_STRUCT = struct.Struct('!HB')         # Card Rank (2) + Card Suit (1), repeated Card Count times
+BUSY_STRUCT = struct.Struct('!IBH')              # + Retry After in milliseconds (2)
+SEAT_STRUCT = struct.Struct('!IBBB32s')          # + Seat (1) + Event (1) + Team Name (32)
+TURN_STRUCT = struct.Struct('!IBHB')             # + Round Tag (2) + Seat (1)
+TABLE_CARDS_HEADER_STRUCT = struct.Struct('!IBHBBB')  # + Round Tag (2) + Seat (1) + Result (1) + Card Count (1)
+ROUND_END_STRUCT = struct.Struct('!IBH')         # + Round Tag (2)
+# + Version (1) + Flags (1) + Rounds (4) + Team Name (32) + Policy (1) + Hard Stand (1) + Soft Stand (1) + Hit Table (20 x 2)
+AUTOPLAY_STRUCT = struct.Struct(f'!IBBBI32sBBB{POLICY_TABLE_ROWS}H')
+AUTOPLAY_RESULTS_HEADER_STRUCT = struct.Struct('!IBIH')  # + First Round (4) + Count (2), then Count result bytes
+AUTOPLAY_SUMMARY_STRUCT = struct.Struct('!IBIIIII')      # + Rounds (4) + Wins (4) + Losses (4) + Ties (4) + Elapsed ms (4)
+
+# Bound methods for the per-card hot path (skip the attribute lookup on every call)
+_unpack_payload_server = PAYLOAD_SERVER_STRUCT.unpack
+_unpack_payload_server_from = PAYLOAD_SERVER_STRUCT.unpack_from
+_unpack_payload_client = PAYLOAD_CLIENT_STRUCT.unpack
+_unpack_payload_client_from = PAYLOAD_CLIENT_STRUCT.unpack_from
+
+# Message sizes (in bytes), used to read whole messages from the TCP stream
+HEADER_SIZE = HEADER_STRUCT.size
+OFFER_SIZE = OFFER_STRUCT.size
+OFFER_LOAD_SIZE = OFFER_LOAD_STRUCT.size
+OFFER_SESSIONS_OFFSET = OFFER_STRUCT.size  # Active Sessions follows the v1 Offer fields
+REQUEST_SIZE = REQUEST_STRUCT.size
+REQUEST_V2_SIZE = REQUEST_V2_STRUCT.size
+PAYLOAD_SERVER_SIZE = PAYLOAD_SERVER_STRUCT.size
+PAYLOAD_CLIENT_SIZE = PAYLOAD_CLIENT_STRUCT.size
+DECISION_SIZE = DECISION_STRUCT.size
+BATCH_HEADER_SIZE = BATCH_HEADER_STRUCT.size
+BATCH_CARD_SIZE = BATCH_CARD_STRUCT.size
+BUSY_SIZE = BUSY_STRUCT.size
+SEAT_SIZE = SEAT_STRUCT.size
+TURN_SIZE = TURN_STRUCT.size
+TABLE_CARDS_HEADER_SIZE = TABLE_CARDS_HEADER_STRUCT.size
+ROUND_END_SIZE = ROUND_END_STRUCT.size
+AUTOPLAY_SIZE = AUTOPLAY_STRUCT.size
+AUTOPLAY_RESULTS_HEADER_SIZE = AUTOPLAY_RESULTS_HEADER_STRUCT.size
+AUTOPLAY_SUMMARY_SIZE = AUTOPLAY_SUMMARY_STRUCT.size
+
+# --- Decoded Messages ---
+# Lightweight immutable records (fields are read as msg.rank, msg.result, ...)
+Offer = namedtuple("Offer", ["server_port", "server_name"])
+LoadOffer = namedtuple("LoadOffer", ["server_port", "server_name", "sessions", "capacity"])
+Request = namedtuple("Request", ["version", "flags", "rounds", "team_name"])
+PayloadServer = namedtuple("PayloadServer", ["result", "rank", "suit"])
+PayloadClient = namedtuple("PayloadClient", ["decision"])
+Decision = namedtuple("Decision", ["round_tag", "decision"])  # round_tag is None for a v1 Payload
+PayloadBatch = namedtuple("PayloadBatch", ["result", "cards"])
+Busy = namedtuple("Busy", ["retry_after_ms"])
+SeatEvent = namedtuple("SeatEvent", ["seat", "event", "team_name"])
+Turn = namedtuple("Turn", ["round_tag", "seat"])
+TableCards = namedtuple("TableCards", ["round_tag", "seat", "result", "cards"])
+RoundEnd = namedtuple("RoundEnd", ["round_tag"])
+# An Autoplay request has the fields of a Request, then the policy (hit_rows: POLICY_TABLE_ROWS ints)
+Autoplay = namedtuple("Autoplay", ["version", "flags", "rounds", "team_name", "policy", "hard_stand", "soft_stand",
+                                   "hit_rows"])
+AutoplayResults = namedtuple("AutoplayResults", ["first_round", "results"])  # results: bytes, one RESULT_* per round
+AutoplaySummary = namedtuple("AutoplaySummary", ["rounds", "wins", "losses", "ties", "elapsed_ms"])
+
+# Builds a record straight from a tuple of field values (skips the namedtuple __new__ wrapper)
+_new_record = tuple.__new__
+
+@lru_cache(maxsize=256)
 def pad_string(text, length=TEAM_NAME_LEN):
     """
     Ensures a string is exactly 'length' bytes.
     Pads with null bytes (\x00) if short, truncates if long.
+    Cached: a server/team name is padded once, not once per message.
     """
     # Encode string to bytes first
     encoded = text.encode('utf-8')
@@ -17,12 +94,19 @@ def pad_string(text, length=TEAM_NAME_LEN):
         # Truncate
         return encoded[:length]
 
+@lru_cache(maxsize=256)
 def decode_string(bytes_data):
     """
     Decodes bytes to string and removes null padding.
+    Cached: the same padded name is decoded once.
     """
     return bytes_data.decode('utf-8').rstrip('\x00')
 
+# Decisions are one of two fixed 5-byte strings: packed once, mapped back without decoding
+_DECISIONS = {action.encode('utf-8'): action for action in (ACTION_HIT, ACTION_STAND)}
+_PACKED_DECISIONS = {action: PAYLOAD_CLIENT_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_PAYLOAD, encoded)
+                     for encoded, action in _DECISIONS.items()}
+
 def pack_offer(server_port, server_name):
     """
     Packs the Offer message.
@@ -32,41 +116,80 @@ def pack_offer(server_port, server_name):
     Returns:
         bytes: The packed binary message.
     """
-    padded_name = pad_string(server_name)
-
-    # ! = Network Endian
-    # I = Magic Cookie (4 bytes)
-    # B = Message Type (1 byte)
-    # H = Server Port (2 bytes)
-    # 32s = Server Name (32 bytes)
-    packed_data = struct.pack('!IBH32s', MAGIC_COOKIE, MSG_TYPE_OFFER, server_port, padded_name)
-    return packed_data
+    return OFFER_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_OFFER, server_port, pad_string(server_name))
 
 def unpack_offer(data):
     """
     Unpacks the Offer message (Used by Client).
+    Returns:
+        Offer or None if the datagram is not a valid Offer.
     """
     try:
-        # Unpack returns a tuple
-        cookie, msg_type, server_port, server_name_bytes = struct.unpack('!IBH32s', data)
+        fields = OFFER_STRUCT.unpack(data)
+    # Parsing failed (wrong size)
+    except struct.error:
+        return None
 
-        # Invalid packet
-        if cookie != MAGIC_COOKIE:
-            return None
-        # Wrong message type
-        if msg_type != MSG_TYPE_OFFER:
-            return None
+    # Invalid packet or wrong message type
+    if fields[0] != MAGIC_COOKIE or fields[1] != MSG_TYPE_OFFER:
+        return None
 
-        return {
-            "type": "OFFER",
-            "server_port": server_port,
-            "server_name": decode_string(server_name_bytes)
-        }
+    return _new_record(Offer, (fields[2], decode_string(fields[3])))
 
+def unpack_offer_from(buffer, offset=0):
+    """
+    Unpacks an Offer directly from a buffer (bytes, bytearray or memoryview).
+    """
+    try:
+        cookie, msg_type, server_port, server_name_bytes = OFFER_STRUCT.unpack_from(buffer, offset)
     # Parsing failed
     except struct.error:
         return None
 
+    # Invalid packet or wrong message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_OFFER:
+        return None
+
+    return _new_record(Offer, (server_port, decode_string(server_name_bytes)))
+
+def pack_offer_load(server_port, server_name, sessions, capacity):
+    """
+    Packs the load-carrying Offer, sent next to the v1 Offer (older clients ignore it).
+    Args:
+        server_port (int): The TCP port the server is listening on.
+        server_name (str): The name of the server.
+        sessions (int): Sessions currently being played.
+        capacity (int): Sessions the server accepts (0 = no limit).
+    Returns:
+        bytearray: The packed message, mutable so set_offer_sessions can update it in place.
+    """
+    return bytearray(OFFER_LOAD_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_OFFER_LOAD, server_port, pad_string(server_name),
+                                            min(sessions, MAX_FIELD_U16), min(capacity, MAX_FIELD_U16)))
+
+def set_offer_sessions(buffer, sessions):
+    """
+    Overwrites the Active Sessions field of a packed load Offer (no repacking).
+    """
+    SESSIONS_FIELD_STRUCT.pack_into(buffer, OFFER_SESSIONS_OFFSET, min(sessions, MAX_FIELD_U16))
+
+def unpack_offer_load(data):
+    """
+    Unpacks the load-carrying Offer (Used by Client).
+    Returns:
+        LoadOffer or None if the datagram is not a valid load Offer.
+    """
+    try:
+        cookie, msg_type, server_port, server_name_bytes, sessions, capacity = OFFER_LOAD_STRUCT.unpack(data)
+    # Parsing failed (wrong size)
+    except struct.error:
+        return None
+
+    # Invalid packet or wrong message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_OFFER_LOAD:
+        return None
+
+    return _new_record(LoadOffer, (server_port, decode_string(server_name_bytes), sessions, capacity))
+
 def pack_request(team_name, rounds):
     """
     Packs the Request message.
@@ -76,40 +199,94 @@ def pack_request(team_name, rounds):
     Returns:
         bytes: The packed binary message.
     """
-    padded_name = pad_string(team_name)
+    return REQUEST_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_REQUEST, rounds, pad_string(team_name))
 
-    # ! = Network Endian
-    # I = Magic Cookie (4 bytes)
-    # B = Message Type (1 byte)
-    # B = Rounds (1 byte)
-    # 32s = Team Name (32 bytes)
-    return struct.pack('!IBB32s', MAGIC_COOKIE, MSG_TYPE_REQUEST, rounds, padded_name)
+def pack_request_v2(team_name, rounds, version=PROTOCOL_VERSION, flags=0):
+    """
+    Packs the v2 Request message (negotiates the protocol version).
+    Args:
+        team_name (str): The name of the client team.
+        rounds (int): The number of rounds the client wishes to play.
+        version (int): Highest protocol version the client understands.
+        flags (int): Bitmask of FLAG_* session options.
+    Returns:
+        bytes: The packed binary message.
+    """
+    return REQUEST_V2_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_REQUEST_V2, version, flags, rounds, pad_string(team_name))
+
+def request_size(msg_type):
+    """
+    Returns the full size of a Request message of the given type, or None if
+    the type is not a Request.
+    """
+    if msg_type == MSG_TYPE_REQUEST:
+        return REQUEST_SIZE
+    if msg_type == MSG_TYPE_REQUEST_V2:
+        return REQUEST_V2_SIZE
+    if msg_type == MSG_TYPE_AUTOPLAY:
+        return AUTOPLAY_SIZE
+    return None
+
+def client_frame_length(buffer, offset, available):
+    """
+    Framing for messages the client sends (Request v1/v2, Autoplay, Payload, Decision).
+    Returns:
+        int: Full size of the message starting at 'offset', or None if fewer than
+        HEADER_SIZE bytes are available.
+    Raises:
+        ValueError: If the message type is not one a client sends.
+    """
+    if available < HEADER_SIZE:
+        return None
+
+    msg_type = buffer[offset + HEADER_SIZE - 1]
+    if msg_type == MSG_TYPE_PAYLOAD:
+        return PAYLOAD_CLIENT_SIZE
+    if msg_type == MSG_TYPE_DECISION:
+        return DECISION_SIZE
+    size = request_size(msg_type)
+    if size is None:
+        raise ValueError(f"Unexpected message type {msg_type:#04x} from client")
+    return size
 
 def unpack_request(data):
     """
-    Unpacks the Request message (Used by Server).
+    Unpacks a Request message, v1, v2 or Autoplay (Used by Server).
+    Returns:
+        Request, Autoplay or None. v1 requests are reported as version 1 with no flags.
+    """
+    if len(data) < HEADER_SIZE or len(data) != request_size(data[HEADER_SIZE - 1]):
+        return None
+    return unpack_request_from(data)
+
+def unpack_request_from(buffer, offset=0):
+    """
+    Unpacks a Request (v1, v2 or Autoplay) directly from a buffer.
     """
     try:
-        # Unpack returns a tuple
-        cookie, msg_type, rounds, team_name_bytes = struct.unpack('!IBB32s', data)
+        cookie, msg_type = HEADER_STRUCT.unpack_from(buffer, offset)
 
         # Invalid packet
         if cookie != MAGIC_COOKIE:
             return None
-        # Wrong message type
-        if msg_type != MSG_TYPE_REQUEST:
-            return None
 
-        return {
-            "type": "REQUEST",
-            "rounds": rounds,
-            "team_name": decode_string(team_name_bytes)
-        }
+        if msg_type == MSG_TYPE_REQUEST:
+            _, _, rounds, team_name_bytes = REQUEST_STRUCT.unpack_from(buffer, offset)
+            version, flags = PROTOCOL_V1, 0
+        elif msg_type == MSG_TYPE_REQUEST_V2:
+            _, _, version, flags, rounds, team_name_bytes = REQUEST_V2_STRUCT.unpack_from(buffer, offset)
+        elif msg_type == MSG_TYPE_AUTOPLAY:
+            return unpack_autoplay_from(buffer, offset)
+        else:
+            # Wrong message type
+            return None
 
     # Parsing failed
     except struct.error:
         return None
 
+    return _new_record(Request, (version, flags, rounds, decode_string(team_name_bytes)))
+
 def pack_payload_server(result, card_rank, card_suit):
     """
     Packs the Payload message (Server -> Client).
@@ -117,69 +294,475 @@ def pack_payload_server(result, card_rank, card_suit):
     card_rank: 1-13
     card_suit: 0-3 (H, D, C, S)
     """
+    return PAYLOAD_SERVER_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_PAYLOAD, result, card_rank, card_suit)
 
-    # ! = Network Endian
-    # I = Magic Cookie (4 bytes)
-    # B = Message Type (1 byte)
-    # B = Result (1 byte)
-    # H = Card Rank (2 bytes)
-    # B = Card Suit (1 byte)
-    return struct.pack('!IBBHB', MAGIC_COOKIE, MSG_TYPE_PAYLOAD, result, card_rank, card_suit)
+def pack_payload_server_into(buffer, offset, result, card_rank, card_suit):
+    """
+    Writes a Payload (Server -> Client) into a caller-supplied bytearray/memoryview.
+    Returns:
+        int: The offset just past the written message.
+    """
+    PAYLOAD_SERVER_STRUCT.pack_into(buffer, offset, MAGIC_COOKIE, MSG_TYPE_PAYLOAD, result, card_rank, card_suit)
+    return offset + PAYLOAD_SERVER_SIZE
 
 def unpack_payload_server(data):
     """
     Unpacks Payload (Client side receiving from Server)
     """
     try:
-        # Unpack returns a tuple
-        cookie, msg_type, result, rank, suit = struct.unpack('!IBBHB', data)
+        cookie, msg_type, result, rank, suit = _unpack_payload_server(data)
+    # Parsing failed (wrong size)
+    except struct.error:
+        return None
+
+    # Validate that the packet starts with the correct protocol ID and message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+        return None
+
+    return _new_record(PayloadServer, (result, rank, suit))
+
+def unpack_payload_server_from(buffer, offset=0):
+    """
+    Unpacks a Payload (Server -> Client) directly from a buffer.
+    """
+    try:
+        cookie, msg_type, result, rank, suit = _unpack_payload_server_from(buffer, offset)
+    # Parsing failed
+    except struct.error:
+        return None
+
+    # Validate that the packet starts with the correct protocol ID and message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+        return None
+
+    return _new_record(PayloadServer, (result, rank, suit))
 
-        # Validate that the packet starts with the correct protocol ID and message type
-        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+def pack_payload_batch(result, cards):
+    """
+    Packs the Batch message (Server -> Client, protocol v2).
+    Carries several cards in one message; the result applies after the last card.
+    result: 0 = Running, 1 = Tie, 2 = Loss, 3 = Win
+    cards: list of (rank, suit) tuples, at most MAX_BATCH_CARDS
+    """
+    buffer = bytearray(BATCH_HEADER_SIZE + BATCH_CARD_SIZE * len(cards))
+    pack_payload_batch_into(buffer, 0, result, cards)
+    return bytes(buffer)
+
+def pack_payload_batch_into(buffer, offset, result, cards):
+    """
+    Writes a Batch (Server -> Client, protocol v2) into a caller-supplied buffer.
+    Returns:
+        int: The offset just past the written message.
+    """
+    count = len(cards)
+    if count > MAX_BATCH_CARDS:
+        raise ValueError(f"Batch holds at most {MAX_BATCH_CARDS} cards, got {count}")
+
+    BATCH_HEADER_STRUCT.pack_into(buffer, offset, MAGIC_COOKIE, MSG_TYPE_PAYLOAD_BATCH, result, count)
+    offset += BATCH_HEADER_SIZE
+    for rank, suit in cards:
+        BATCH_CARD_STRUCT.pack_into(buffer, offset, rank, suit)
+        offset += BATCH_CARD_SIZE
+    return offset
+
+def batch_size(count):
+    """
+    Returns the full size of a Batch message holding 'count' cards.
+    """
+    return BATCH_HEADER_SIZE + BATCH_CARD_SIZE * count
+
+def server_frame_length(buffer, offset, available):
+    """
+    Framing for messages the server sends (Payload, Batch, Busy, table messages).
+    Returns:
+        int: Full size of the message starting at 'offset', or None if more bytes
+        are needed to read its header.
+    Raises:
+        ValueError: If the message type is not one a server sends.
+    """
+    if available < HEADER_SIZE:
+        return None
+
+    msg_type = buffer[offset + HEADER_SIZE - 1]
+    if msg_type == MSG_TYPE_PAYLOAD:
+        return PAYLOAD_SERVER_SIZE
+    if msg_type == MSG_TYPE_PAYLOAD_BATCH:
+        if available < BATCH_HEADER_SIZE:
+            return None
+        return batch_size(buffer[offset + BATCH_HEADER_SIZE - 1])
+    if msg_type == MSG_TYPE_BUSY:
+        return BUSY_SIZE
+    if msg_type == MSG_TYPE_TABLE_CARDS:
+        if available < TABLE_CARDS_HEADER_SIZE:
+            return None
+        return table_cards_size(buffer[offset + TABLE_CARDS_HEADER_SIZE - 1])
+    if msg_type == MSG_TYPE_SEAT:
+        return SEAT_SIZE
+    if msg_type == MSG_TYPE_TURN:
+        return TURN_SIZE
+    if msg_type == MSG_TYPE_ROUND_END:
+        return ROUND_END_SIZE
+    if msg_type == MSG_TYPE_AUTOPLAY_RESULTS:
+        if available < AUTOPLAY_RESULTS_HEADER_SIZE:
+            return None
+        count_offset = offset + AUTOPLAY_RESULTS_HEADER_SIZE - 2
+        return AUTOPLAY_RESULTS_HEADER_SIZE + (buffer[count_offset] << 8 | buffer[count_offset + 1])
+    if msg_type == MSG_TYPE_AUTOPLAY_SUMMARY:
+        return AUTOPLAY_SUMMARY_SIZE
+    raise ValueError(f"Unexpected message type {msg_type:#04x} from server")
+
+def unpack_payload_batch(data):
+    """
+    Unpacks a Batch message (Client side receiving from Server, protocol v2)
+    """
+    if len(data) < BATCH_HEADER_SIZE or len(data) != batch_size(data[BATCH_HEADER_SIZE - 1]):
+        return None
+    return unpack_payload_batch_from(data)
+
+def unpack_payload_batch_from(buffer, offset=0):
+    """
+    Unpacks a Batch directly from a buffer.
+    """
+    try:
+        cookie, msg_type, result, count = BATCH_HEADER_STRUCT.unpack_from(buffer, offset)
+
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD_BATCH:
             return None
 
-        return {
-            "type": "PAYLOAD_SERVER",
-            "result": result,
-            "rank": rank,
-            "suit": suit
-        }
+        start = offset + BATCH_HEADER_SIZE
+        end = start + BATCH_CARD_SIZE * count
+        # A batch cut short would otherwise decode as one with fewer cards
+        if len(buffer) < end:
+            return None
+        # Sliced through a memoryview: a bytes buffer is not copied
+        with memoryview(buffer) as view:
+            cards = list(BATCH_CARD_STRUCT.iter_unpack(view[start:end]))
 
     # Parsing failed
     except struct.error:
         return None
 
+    return _new_record(PayloadBatch, (result, cards))
+
 def pack_payload_client(decision):
     """
     Packs the Payload message (Client -> Server).
     decision: "Hit" or "Stand"
     """
-
-    encoded_decision = decision.encode('utf-8')
-
-    # ! = Network Endian
-    # I = Magic Cookie (4 bytes)
-    # B = Message Type (1 byte)
-    # 5s = Decision (5 bytes)
-    return struct.pack('!IB5s', MAGIC_COOKIE, MSG_TYPE_PAYLOAD, encoded_decision)
+    packed = _PACKED_DECISIONS.get(decision)
+    if packed is None:
+        packed = PAYLOAD_CLIENT_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_PAYLOAD, decision.encode('utf-8'))
+    return packed
 
 def unpack_payload_client(data):
     """
     Unpacks Payload (Server side receiving from Client)
     """
     try:
-        # Unpack returns a tuple
-        cookie, msg_type, decision_bytes = struct.unpack('!IB5s', data)
+        cookie, msg_type, decision_bytes = _unpack_payload_client(data)
+    # Parsing failed (wrong size)
+    except struct.error:
+        return None
+
+    # Validate that the packet starts with the correct protocol ID and message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+        return None
+
+    decision = _DECISIONS.get(decision_bytes)
+    if decision is None:
+        decision = decode_string(decision_bytes)
+    return _new_record(PayloadClient, (decision,))
+
+def unpack_payload_client_from(buffer, offset=0):
+    """
+    Unpacks a Payload (Client -> Server) directly from a buffer.
+    """
+    try:
+        cookie, msg_type, decision_bytes = PAYLOAD_CLIENT_STRUCT.unpack_from(buffer, offset)
+    # Parsing failed
+    except struct.error:
+        return None
+
+    # Validate that the packet starts with the correct protocol ID and message type
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+        return None
+
+    decision = _DECISIONS.get(decision_bytes)
+    if decision is None:
+        decision = decode_string(decision_bytes)
+    return _new_record(PayloadClient, (decision,))
 
-        # Validate that the packet starts with the correct protocol ID and message type
-        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_PAYLOAD:
+def pack_decision(round_num, decision):
+    """
+    Packs the Decision message (Client -> Server, protocol v2).
+    Tagging each decision with its round lets a client send several ahead
+    ("Hit, Hit, Stand"): the server drops the ones left over when the round
+    ends early (e.g. a bust on the first Hit).
+    round_num: the round the decision belongs to (sent modulo 2^16)
+    decision: "Hit" or "Stand"
+    """
+    return DECISION_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_DECISION, round_num & ROUND_TAG_MASK,
+                                decision.encode('utf-8'))
+
+def unpack_decision_from(buffer, offset=0):
+    """
+    Unpacks a player decision sent as either a v1 Payload or a v2 Decision.
+    Returns:
+        Decision or None. A v1 Payload has no round tag (round_tag is None).
+    """
+    try:
+        cookie, msg_type = HEADER_STRUCT.unpack_from(buffer, offset)
+        if cookie != MAGIC_COOKIE:
             return None
 
-        return {
-            "type": "PAYLOAD_CLIENT",
-            "decision": decode_string(decision_bytes)
-        }
+        if msg_type == MSG_TYPE_DECISION:
+            _, _, round_tag, decision_bytes = DECISION_STRUCT.unpack_from(buffer, offset)
+        elif msg_type == MSG_TYPE_PAYLOAD:
+            _, _, decision_bytes = _unpack_payload_client_from(buffer, offset)
+            round_tag = None
+        else:
+            return None
 
     # Parsing failed
     except struct.error:
-        return None
\ No newline at end of file
+        return None
+
+    decision = _DECISIONS.get(decision_bytes)
+    if decision is None:
+        decision = decode_string(decision_bytes)
+    return _new_record(Decision, (round_tag, decision))
+
+def pack_busy(retry_after_ms=BUSY_RETRY_AFTER_MS):
+    """
+    Packs the Busy reply: the server is full and closes the connection.
+    Args:
+        retry_after_ms (int): How long the client should wait before trying this server again.
+    Returns:
+        bytes: The packed binary message.
+    """
+    return BUSY_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_BUSY, min(retry_after_ms, MAX_FIELD_U16))
+
+def unpack_busy_from(buffer, offset=0):
+    """
+    Unpacks a Busy reply from a buffer.
+    Returns:
+        Busy or None if the message is not a valid Busy reply.
+    """
+    try:
+        cookie, msg_type, retry_after_ms = BUSY_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_BUSY:
+        return None
+
+    return _new_record(Busy, (retry_after_ms,))
+
+# --- Shared Table Messages (Server -> Client) ---
+def pack_seat_event(seat, event, team_name):
+    """
+    Packs a Seat message: 'team_name' took seat 'seat' (SEAT_YOU / SEAT_JOINED)
+    or left it (SEAT_LEFT).
+    """
+    return SEAT_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_SEAT, seat, event, pad_string(team_name))
+
+def unpack_seat_event_from(buffer, offset=0):
+    """
+    Returns:
+        SeatEvent or None if the message is not a valid Seat message.
+    """
+    try:
+        cookie, msg_type, seat, event, team_name_bytes = SEAT_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_SEAT:
+        return None
+
+    return _new_record(SeatEvent, (seat, event, decode_string(team_name_bytes)))
+
+def pack_turn(round_num, seat):
+    """
+    Packs a Turn message: the player in 'seat' decides next (Hit/Stand until
+    they stand or bust).
+    """
+    return TURN_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_TURN, round_num & ROUND_TAG_MASK, seat)
+
+def unpack_turn_from(buffer, offset=0):
+    """
+    Returns:
+        Turn or None if the message is not a valid Turn message.
+    """
+    try:
+        cookie, msg_type, round_tag, seat = TURN_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_TURN:
+        return None
+
+    return _new_record(Turn, (round_tag, seat))
+
+def table_cards_size(count):
+    """
+    Returns the full size of a Table Cards message holding 'count' cards.
+    """
+    return TABLE_CARDS_HEADER_SIZE + BATCH_CARD_SIZE * count
+
+def pack_table_cards(round_num, seat, result, cards):
+    """
+    Packs a Table Cards message: cards dealt to 'seat' (DEALER_SEAT for the
+    dealer) in a round. A result other than RESULT_NOT_OVER ends that seat's
+    round; a result alone is sent with no cards.
+    cards: list of (rank, suit) tuples, at most MAX_BATCH_CARDS
+    """
+    count = len(cards)
+    if count > MAX_BATCH_CARDS:
+        raise ValueError(f"Table Cards holds at most {MAX_BATCH_CARDS} cards, got {count}")
+
+    buffer = bytearray(table_cards_size(count))
+    TABLE_CARDS_HEADER_STRUCT.pack_into(buffer, 0, MAGIC_COOKIE, MSG_TYPE_TABLE_CARDS, round_num & ROUND_TAG_MASK,
+                                        seat, result, count)
+    offset = TABLE_CARDS_HEADER_SIZE
+    for rank, suit in cards:
+        BATCH_CARD_STRUCT.pack_into(buffer, offset, rank, suit)
+        offset += BATCH_CARD_SIZE
+    return bytes(buffer)
+
+def unpack_table_cards_from(buffer, offset=0):
+    """
+    Returns:
+        TableCards or None if the message is not a valid Table Cards message.
+    """
+    try:
+        cookie, msg_type, round_tag, seat, result, count = TABLE_CARDS_HEADER_STRUCT.unpack_from(buffer, offset)
+
+        if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_TABLE_CARDS:
+            return None
+
+        start = offset + TABLE_CARDS_HEADER_SIZE
+        end = start + BATCH_CARD_SIZE * count
+        # A message cut short would otherwise decode as one with fewer cards
+        if len(buffer) < end:
+            return None
+        cards = list(BATCH_CARD_STRUCT.iter_unpack(buffer[start:end]))
+
+    except struct.error:
+        return None
+
+    return _new_record(TableCards, (round_tag, seat, result, cards))
+
+def pack_round_end(round_num):
+    """
+    Packs a Round End message, sent after every seat's result.
+    """
+    return ROUND_END_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_ROUND_END, round_num & ROUND_TAG_MASK)
+
+def unpack_round_end_from(buffer, offset=0):
+    """
+    Returns:
+        RoundEnd or None if the message is not a valid Round End message.
+    """
+    try:
+        cookie, msg_type, round_tag = ROUND_END_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_ROUND_END:
+        return None
+
+    return _new_record(RoundEnd, (round_tag,))
+
+# Decoder for each table message type (the client reads them through one dispatch)
+TABLE_MESSAGE_UNPACKERS = {
+    MSG_TYPE_SEAT: unpack_seat_event_from,
+    MSG_TYPE_TURN: unpack_turn_from,
+    MSG_TYPE_TABLE_CARDS: unpack_table_cards_from,
+    MSG_TYPE_ROUND_END: unpack_round_end_from,
+}
+
+# --- Autoplay Messages ---
+def pack_autoplay(team_name, rounds, policy, hard_stand=0, soft_stand=0, hit_rows=None,
+                  version=PROTOCOL_VERSION, flags=0):
+    """
+    Packs an Autoplay request: a session whose rounds the server plays by itself,
+    deciding by the given policy, and reports as results only.
+    Args:
+        team_name (str): The name of the client team.
+        rounds (int): Rounds to play, up to MAX_AUTOPLAY_ROUNDS.
+        policy (int): POLICY_STAND_ON (uses hard_stand and soft_stand) or
+                      POLICY_TABLE (uses hit_rows).
+        hit_rows (sequence of int): POLICY_TABLE_ROWS bitmasks: rows for hard
+                      totals 12-21, then soft totals 12-21; bit (upcard value - 2) set = hit.
+        version (int): Highest protocol version the client understands.
+        flags (int): Bitmask of FLAG_* session options.
+    Returns:
+        bytes: The packed binary message.
+    """
+    if hit_rows is None:
+        hit_rows = (0,) * POLICY_TABLE_ROWS
+    return AUTOPLAY_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_AUTOPLAY, version, flags, rounds, pad_string(team_name),
+                                policy, hard_stand, soft_stand, *hit_rows)
+
+def unpack_autoplay_from(buffer, offset=0):
+    """
+    Returns:
+        Autoplay or None if the message is not a valid Autoplay request.
+    """
+    try:
+        fields = AUTOPLAY_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    cookie, msg_type, version, flags, rounds, team_name_bytes, policy, hard_stand, soft_stand = fields[:9]
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_AUTOPLAY:
+        return None
+
+    return _new_record(Autoplay, (version, flags, rounds, decode_string(team_name_bytes), policy, hard_stand,
+                                  soft_stand, fields[9:]))
+
+def pack_autoplay_results(first_round, results):
+    """
+    Packs the results of rounds first_round, first_round + 1, ... (one RESULT_*
+    byte each, at most AUTOPLAY_CHUNK_ROUNDS of them).
+    """
+    return AUTOPLAY_RESULTS_HEADER_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_AUTOPLAY_RESULTS, first_round,
+                                               len(results)) + results
+
+def unpack_autoplay_results_from(buffer, offset=0):
+    """
+    Returns:
+        AutoplayResults or None if the message is not a valid Autoplay Results message.
+    """
+    try:
+        cookie, msg_type, first_round, count = AUTOPLAY_RESULTS_HEADER_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    start = offset + AUTOPLAY_RESULTS_HEADER_SIZE
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_AUTOPLAY_RESULTS or len(buffer) < start + count:
+        return None
+
+    return _new_record(AutoplayResults, (first_round, bytes(buffer[start:start + count])))
+
+def pack_autoplay_summary(rounds, wins, losses, ties, elapsed_ms):
+    """
+    Packs the last message of an autoplay session: its totals and how long the server played.
+    """
+    return AUTOPLAY_SUMMARY_STRUCT.pack(MAGIC_COOKIE, MSG_TYPE_AUTOPLAY_SUMMARY, rounds, wins, losses, ties,
+                                        min(elapsed_ms, MAX_FIELD_U32))
+
+def unpack_autoplay_summary_from(buffer, offset=0):
+    """
+    Returns:
+        AutoplaySummary or None if the message is not a valid Autoplay Summary message.
+    """
+    try:
+        cookie, msg_type, *totals = AUTOPLAY_SUMMARY_STRUCT.unpack_from(buffer, offset)
+    except struct.error:
+        return None
+
+    if cookie != MAGIC_COOKIE or msg_type != MSG_TYPE_AUTOPLAY_SUMMARY:
+        return None
+
+    return _new_record(AutoplaySummary, tuple(totals))
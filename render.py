@@ -0,0 +1,350 @@
+"""
+Client output: what client.py shows for each game event, in one of three modes.
+
+    ansi   colored text for a terminal (the default)
+    quiet  warnings and the session summary only
+    json   one JSON object per event and line, for piping into other tools
+
+Renderers collect their output in a buffer; flush() writes it in one call. The
+client flushes whenever it is about to wait (for the server, when no message
+is buffered yet, or for the user), so the lines of messages that arrived
+together go out in one write, and a paced dealer's cards still show one by one.
+
+Every card, total and banner the ANSI renderer shows is formatted once, at
+import, and looked up afterwards.
+
+    renderer = make_renderer("json")
+    renderer.round_start(1, 3)
+    renderer.flush()
+"""
+import json
+import sys
+
+from cards import *
+from consts import *
+
+# --- Colors for UI ---
+class Colors:
+    """
+    ANSI Escape Codes for terminal coloring.
+    Allows printing colored text in the console.
+    """
+
+    RESET = "\033[0m"
+    RED = "\033[91m"  # For Bust / Loss
+    GREEN = "\033[92m"  # For Win / Safe
+    BOLD = "\033[1m"
+
+    @staticmethod
+    def card(text):
+        # Formats card text as Bold
+        return f"{Colors.BOLD}{text}{Colors.RESET}"
+
+    @staticmethod
+    def win(text):
+        # Formats text as Bold Green
+        return f"{Colors.GREEN}{Colors.BOLD}{text}{Colors.RESET}"
+
+    @staticmethod
+    def loss(text):
+        # Formats text as Bold Red
+        return f"{Colors.RED}{Colors.BOLD}{text}{Colors.RESET}"
+
+# --- Preformatted Text ---
+# Totals up to a hit on 21 with a ten, percentages as shown (rounded to whole numbers)
+MAX_SHOWN_TOTAL = BLACKJACK + ACE_VALUE - 1
+WIN_TOTAL = tuple(Colors.win(str(total)) for total in range(MAX_SHOWN_TOTAL + 1))
+LOSS_TOTAL = tuple(Colors.loss(str(total)) for total in range(MAX_SHOWN_TOTAL + 1))
+WIN_PERCENT = tuple(Colors.win(f"{percent}%") for percent in range(101))
+LOSS_PERCENT = tuple(Colors.loss(f"{percent}%") for percent in range(101))
+BEST_MOVE = {True: Colors.card("Hit"), False: Colors.card("Stand")}
+
+BUSTED_BANNER = Colors.loss("👮‍♂️ YOU BUSTED! 👮‍♂️") + "\n"
+RESULT_BANNERS = {
+    RESULT_WIN: Colors.win("✴✴ YOU WIN! ✴✴") + "\n",
+    RESULT_LOSS: Colors.loss("🤬 YOU LOST! 🤬") + "\n",
+    RESULT_TIE: "☞ IT'S A TIE! ☜\n",
+}
+RESULT_NAMES = {RESULT_WIN: "win", RESULT_LOSS: "loss", RESULT_TIE: "tie"}
+SEAT_EVENT_NAMES = {SEAT_YOU: "seated", SEAT_JOINED: "joined", SEAT_LEFT: "left"}
+
+class Renderer:
+    """
+    Shows nothing: the base of the renderers, with one method per game event.
+    """
+
+    name = None
+    wants_odds = False  # Whether the client should compute the odds to pass to odds()
+
+    def __init__(self, out=None, odds=None):
+        """
+        Args:
+            out (file): Where to write (default: sys.stdout).
+            odds (bool): Show bust odds and EVs before each move (None: the mode's default).
+        """
+        self.out = out or sys.stdout
+        self.buffer = []  # Text not yet written
+        if odds is not None:
+            self.wants_odds = odds
+
+    def flush(self):
+        """
+        Writes everything buffered in one call.
+        """
+        if self.buffer:
+            self.out.write("".join(self.buffer))
+            self.buffer.clear()
+            self.out.flush()
+
+    def prompt(self, text):
+        """
+        Flushes, then reads a line of the user's input (the prompt 'text' is not shown).
+        """
+        self.flush()
+        return input()
+
+    # --- Messages outside the game (written at once) ---
+    def info(self, text):
+        pass
+
+    def success(self, text):
+        pass
+
+    def warning(self, text):
+        pass
+
+    # --- Private rounds ---
+    def round_start(self, round_num, rounds):
+        pass
+
+    def player_cards(self, cards, total):
+        """
+        The player's two opening cards and their total.
+        """
+
+    def upcard(self, card):
+        pass
+
+    def odds(self, bust_prob, safe_prob, ev=None):
+        """
+        The odds of the next move: bust and safe hit chances in percent, and
+        ev = (dealer bust chance in percent, stand EV, hit EV) or None.
+        """
+
+    def hit(self, card, total, busted):
+        pass
+
+    def stand(self, total, dealer_turn=True):
+        pass
+
+    def dealer_draw(self, card):
+        pass
+
+    def result(self, result, dealer_total=None, busted=False):
+        """
+        The outcome of the player's round (the dealer's final total if known).
+        """
+
+    def session_summary(self, rounds, wins):
+        pass
+
+    # --- Shared tables ---
+    def seat_event(self, event, seat, team_name):
+        pass
+
+    def table_cards(self, who, cards, total, upcard=False):
+        """
+        Cards dealt to a seat ('who' as the table describes it) or the dealer's upcard.
+        """
+
+    def seat_result(self, who, text):
+        pass
+
+    def turn(self, who):
+        pass
+
+class QuietRenderer(Renderer):
+    """
+    Warnings and the session summary, as plain text.
+    """
+
+    name = "quiet"
+
+    def warning(self, text):
+        self.buffer.append(text + "\n")
+        self.flush()
+
+    def session_summary(self, rounds, wins):
+        win_rate = wins / rounds * 100 if rounds else 0.0
+        self.buffer.append(f"Finished {rounds} rounds. Win Rate: {win_rate:.1f}%\n")
+
+class AnsiRenderer(Renderer):
+    """
+    The interactive client's colored text.
+    """
+
+    name = "ansi"
+    wants_odds = True
+
+    def prompt(self, text):
+        self.buffer.append(text)
+        self.flush()
+        return input()
+
+    def info(self, text):
+        self.buffer.append(text + "\n")
+        self.flush()
+
+    def success(self, text):
+        self.info(Colors.win(text))
+
+    def warning(self, text):
+        self.info(Colors.loss(text))
+
+    def round_start(self, round_num, rounds):
+        self.buffer.append(f"\n{'=' * 15} ROUND {round_num} / {rounds} {'=' * 15}\n")
+
+    def player_cards(self, cards, total):
+        append = self.buffer.append
+        for i, card in enumerate(cards):
+            append(f"My Card {i + 1}: {CARD_NAME_BOLD[card]}\n")
+        append(f"--> My Total: {WIN_TOTAL[total]}\n")
+
+    def upcard(self, card):
+        self.buffer.append(f"Dealer Shows: {CARD_NAME_BOLD[card]}\n")
+
+    def odds(self, bust_prob, safe_prob, ev=None):
+        self.buffer.append(f"Stats: Bust Chance {LOSS_PERCENT[round(bust_prob)]} | "
+                           f"Safe Hit Chance {WIN_PERCENT[round(safe_prob)]}\n")
+        if ev:
+            dealer_bust, stand_ev, hit_ev = ev
+            self.buffer.append(f"       Dealer Bust {dealer_bust:.0f}% | EV Stand {stand_ev:+.2f} | "
+                               f"EV Hit {hit_ev:+.2f} -> {BEST_MOVE[hit_ev > stand_ev]}\n")
+
+    def hit(self, card, total, busted):
+        shown = LOSS_TOTAL[total] if busted else WIN_TOTAL[total]
+        self.buffer.append(f"Dealt: {CARD_NAME_BOLD[card]} | Total: {shown}\n")
+
+    def stand(self, total, dealer_turn=True):
+        self.buffer.append(f"Standing on {total}. Dealer's turn...\n" if dealer_turn else f"Standing on {total}.\n")
+
+    def dealer_draw(self, card):
+        self.buffer.append(f"Dealer draws: {CARD_NAME_BOLD[card]}\n")
+
+    def result(self, result, dealer_total=None, busted=False):
+        if dealer_total is not None:
+            self.buffer.append(f"Dealer's Final Total: {dealer_total}\n")
+        self.buffer.append(BUSTED_BANNER if busted else RESULT_BANNERS[result])
+
+    def session_summary(self, rounds, wins):
+        win_rate = wins / rounds * 100 if rounds else 0.0
+        self.buffer.append(f"\n=== SESSION SUMMARY ===\nFinished {rounds} rounds. "
+                           f"Win Rate: {Colors.win(f'{win_rate:.1f}%')}\n")
+
+    def seat_event(self, event, seat, team_name):
+        if event == SEAT_YOU:
+            self.buffer.append(Colors.win(f"Seated at seat {seat}.") + "\n")
+        elif event == SEAT_JOINED:
+            self.buffer.append(f"'{team_name}' sits down at seat {seat}.\n")
+        else:
+            self.buffer.append(f"'{team_name}' left the table.\n")
+
+    def table_cards(self, who, cards, total, upcard=False):
+        shown = " ".join([CARD_NAME_BOLD[card] for card in cards])
+        self.buffer.append(f"Dealer Shows: {shown}\n" if upcard else f"{who}: {shown} | Total: {total}\n")
+
+    def seat_result(self, who, text):
+        self.buffer.append(f"  {who} {text}\n")
+
+    def turn(self, who):
+        self.buffer.append(f"{who} is playing...\n")
+
+class JsonRenderer(Renderer):
+    """
+    One JSON object per line: {"event": ..., ...}. Cards are their names
+    (e.g. "10♤"), results "win" / "loss" / "tie".
+    """
+
+    name = "json"
+
+    def __init__(self, out=None, odds=None):
+        super().__init__(out, odds)
+        self.encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def emit(self, event, **fields):
+        self.buffer.append(self.encode({"event": event, **fields}) + "\n")
+
+    def prompt(self, text):
+        # Tells a program driving the client that it waits for a line on stdin
+        self.emit("prompt", text=text.strip())
+        self.flush()
+        return input()
+
+    def info(self, text):
+        self.emit("info", text=text)
+        self.flush()
+
+    def success(self, text):
+        self.info(text)
+
+    def warning(self, text):
+        self.emit("warning", text=text)
+        self.flush()
+
+    def round_start(self, round_num, rounds):
+        self.emit("round", round=round_num, rounds=rounds)
+
+    def player_cards(self, cards, total):
+        self.emit("player_cards", cards=[CARD_NAME[card] for card in cards], total=total)
+
+    def upcard(self, card):
+        self.emit("upcard", card=CARD_NAME[card])
+
+    def odds(self, bust_prob, safe_prob, ev=None):
+        if ev:
+            dealer_bust, stand_ev, hit_ev = ev
+            self.emit("odds", bust=bust_prob, safe=safe_prob, dealer_bust=dealer_bust, stand_ev=stand_ev,
+                      hit_ev=hit_ev)
+        else:
+            self.emit("odds", bust=bust_prob, safe=safe_prob)
+
+    def hit(self, card, total, busted):
+        self.emit("hit", card=CARD_NAME[card], total=total, busted=busted)
+
+    def stand(self, total, dealer_turn=True):
+        self.emit("stand", total=total)
+
+    def dealer_draw(self, card):
+        self.emit("dealer_draw", card=CARD_NAME[card])
+
+    def result(self, result, dealer_total=None, busted=False):
+        self.emit("result", result=RESULT_NAMES[result], dealer_total=dealer_total, busted=busted)
+
+    def session_summary(self, rounds, wins):
+        self.emit("session", rounds=rounds, wins=wins)
+
+    def seat_event(self, event, seat, team_name):
+        self.emit("seat", seat=seat, action=SEAT_EVENT_NAMES.get(event), team=team_name)
+
+    def table_cards(self, who, cards, total, upcard=False):
+        self.emit("table_cards", who=who, cards=[CARD_NAME[card] for card in cards], total=total, upcard=upcard)
+
+    def seat_result(self, who, text):
+        self.emit("seat_result", who=who, result=text)
+
+    def turn(self, who):
+        self.emit("turn", who=who)
+
+RENDERERS = {renderer.name: renderer for renderer in (AnsiRenderer, QuietRenderer, JsonRenderer)}
+
+def make_renderer(mode="ansi", out=None, odds=None):
+    """
+    Returns a renderer by mode name: 'ansi', 'quiet' or 'json' (see RENDERERS).
+    Raises:
+        ValueError: For an unknown mode.
+    """
+    try:
+        renderer = RENDERERS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown output mode '{mode}' (expected {', '.join(RENDERERS)})") from None
+    return renderer(out, odds)
@@ -1,53 +1,192 @@
+import argparse
+import asyncio
+import functools
+import selectors
+import signal
 import socket
+import sys
 import time
 import threading
-import random
+from concurrent.futures import ThreadPoolExecutor
+import gamelog
+import interfaces
+import journal
+import metrics
+import pacing
+from framing import FrameReader, read_frame_async
 import protocol
 from protocol import *
-import utils
+import simulator
+import table
+from cards import *
+from engine import RoundEngine, Settled, BETWEEN_ROUNDS, PLAYER_TURN, PLAYER, DEALER_UPCARD, DEALER_HOLE, DEALER_DRAW
 
-# --- Game Logic Class ---
-class Deck:
+# --- Game Logic ---
+# The rules live in engine.RoundEngine; the server only turns its records into
+# wire messages (and trace lines) and feeds it the client's decisions.
+RESULT_TRACE = {
+    RESULT_WIN: ("result", "Player Wins!"),
+    RESULT_LOSS: ("result", "Dealer Wins."),
+    RESULT_TIE: ("result", "It's a Tie."),
+}
 
-    def __init__(self):
-        self.cards = []
-        self.reset_deck()
+def encode_events(events, batched):
+    """
+    Packs the records of one engine event for the client.
+    v1 gets one Payload per card: a bust's result rides on the busting card, and
+    after a stand the dealer's last card is sent once more with the result.
+    v2 gets the records of one event as a single Batch, except a hit, whose one
+    card goes out as a Payload like in v1.
+    Returns:
+        list of (paced, msg) tuples: paced is True when the dealer's draw delay
+        comes before msg (v1 only).
+    """
+    if not events:
+        return []
+    result = RESULT_NOT_OVER
+    dealt = []
+    for event in events:
+        if type(event) is Settled:
+            result = event.result
+        else:
+            dealt.append(event)
+
+    if batched:
+        if len(dealt) == 1 and dealt[0].to == PLAYER:
+            card = dealt[0].card
+            return [(False, protocol.pack_payload_server(result, CARD_RANK[card], CARD_SUIT[card]))]
+        return [(False, protocol.pack_payload_batch(result, [CARD_WIRE[event.card] for event in dealt]))]
+
+    messages = [(event.to == DEALER_DRAW, protocol.pack_payload_server(RESULT_NOT_OVER, CARD_RANK[event.card], CARD_SUIT[event.card]))
+                for event in dealt]
+    if result != RESULT_NOT_OVER:
+        last = dealt[-1]
+        final = (False, protocol.pack_payload_server(result, CARD_RANK[last.card], CARD_SUIT[last.card]))
+        if last.to == PLAYER:
+            messages[-1] = final
+        else:
+            messages.append(final)
+    return messages
+
+def trace_events(events):
+    """
+    Logs the trace lines for the records of one engine event (call only while tracing).
+    """
+    for event in events:
+        if type(event) is Settled:
+            if event.player_total > BLACKJACK:
+                gamelog.trace("player_bust", "  Player Busted! Score: %(score)s", score=event.player_total)
+                continue
+            gamelog.trace("scores", "Scores -> Player: %(player)s | Dealer: %(dealer)s",
+                player=event.player_total, dealer=event.dealer_total)
+            if event.dealer_total > BLACKJACK:
+                gamelog.trace("result", "Dealer Busted. Player Wins!")
+            else:
+                gamelog.trace(*RESULT_TRACE[event.result])
+        elif event.to == PLAYER:
+            gamelog.trace("player_card", "  Player got: %(card)s", card=CARD_NAME[event.card])
+        elif event.to == DEALER_UPCARD:
+            gamelog.trace("dealer_upcard", "Dealer shows: %(card)s", card=CARD_NAME[event.card])
+        elif event.to == DEALER_HOLE:
+            gamelog.trace("dealer_hole_card", "Dealer reveals hidden: %(card)s", card=CARD_NAME[event.card])
+        else:
+            gamelog.trace("dealer_card", "  Dealer draws: %(card)s", card=CARD_NAME[event.card])
 
-    def reset_deck(self):
-        self.cards = []
+def trace_decision(decision, engine):
+    if decision == ACTION_HIT:
+        gamelog.trace("hit", "Player Hit.")
+    elif decision == ACTION_STAND:
+        gamelog.trace("stand", "Player Stand. Score: %(score)s", score=engine.player_hand.total)
 
-        # Generate 52 cards: 4 suits (0-3) x 13 ranks (1-13)
-        for suit in range(4):
-            for rank in range(1, 14):
-                self.cards.append((rank, suit))
+def autoplay_messages(engine, strategy, record=None, chunk_rounds=AUTOPLAY_CHUNK_ROUNDS):
+    """
+    Plays every round left on a joined engine by 'strategy' (autoplay: no client
+    decisions, no pacing) and packs the results.
+    record: optional record(round_num, events, decision), as in simulator.play_round.
+    Yields:
+        (rounds, msg): an Autoplay Results message per 'chunk_rounds' rounds
+        (with how many rounds it covers), then the Autoplay Summary (0 rounds).
+    """
+    started = time.perf_counter()
+    play_round = simulator.play_round
+    wins = losses = ties = 0
+    results = bytearray()
+    first_round = engine.round_num + 1
+    while engine.state is BETWEEN_ROUNDS:
+        results.append(play_round(engine, strategy, record))
+        if len(results) == chunk_rounds or engine.state is not BETWEEN_ROUNDS:
+            wins += results.count(RESULT_WIN)
+            losses += results.count(RESULT_LOSS)
+            ties += results.count(RESULT_TIE)
+            yield len(results), protocol.pack_autoplay_results(first_round, bytes(results))
+            first_round = engine.round_num + 1
+            results.clear()
+    elapsed_ms = round((time.perf_counter() - started) * 1e3)
+    yield 0, protocol.pack_autoplay_summary(engine.round_num, wins, losses, ties, elapsed_ms)
 
-        # Shuffle the deck randomly
-        random.shuffle(self.cards)
+# Counters summed across workers in supervisor mode (see metrics.COUNTER_KEYS for all of them)
+STAT_KEYS = ("sessions_started", "sessions_finished", "rounds_played")
 
-    def draw_card(self):
-        # Remove and return the last card in the list
-        return self.cards.pop()
+# --- Kept-Alive Connections ---
+class IdleConnections:
+    """
+    Kept-alive connections waiting for their client's next Request, watched by
+    one thread (threaded mode with a session limit), so that an idle client
+    holds neither a pool thread nor an admission place.
 
-    def calculate_score(self, hand):
-        score = 0
-        aces = 0
+    A connection that gets data is unregistered and handed to
+    resume(client_conn, reader) on the watching thread; one idle for 'timeout'
+    seconds is closed.
+    """
 
-        # First pass: Count Aces as 11
-        for rank, suit in hand:
-            if rank == 1:    # Ace
-                aces += 1
-                score += 11
-            elif rank >= 11: # J/Q/K
-                score += 10
-            else:            # Number cards
-                score += rank
+    def __init__(self, resume, timeout=KEEP_ALIVE_TIMEOUT):
+        self.resume = resume
+        self.timeout = timeout
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        # park() writes a byte here so that a select() already in progress sees the new connection
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        watcher = threading.Thread(target=self.watch, name="idle-connections")
+        watcher.daemon = True
+        watcher.start()
 
-        # Second pass: If busted (>21), convert Aces from 11 to 1
-        while score > 21 and aces > 0:
-            score -= 10
-            aces -= 1
+    def park(self, client_conn, reader):
+        """
+        Watches a kept-alive connection until its client sends something.
+        """
+        with self.lock:
+            self.selector.register(client_conn, selectors.EVENT_READ, (reader, time.monotonic() + self.timeout))
+        self.wakeup_send.send(b"\0")
 
-        return score
+    def watch(self):
+        next_check = time.monotonic() + IDLE_CHECK_INTERVAL  # Next scan for connections idle too long
+        while True:
+            ready = []
+            expired = []
+            events = self.selector.select(IDLE_CHECK_INTERVAL)
+            now = time.monotonic()
+            with self.lock:
+                for key, _ in events:
+                    if key.fileobj is self.wakeup_recv:
+                        try:
+                            self.wakeup_recv.recv(4096)
+                        except BlockingIOError:
+                            pass
+                    else:
+                        self.selector.unregister(key.fileobj)
+                        ready.append(key)
+                if now >= next_check:
+                    next_check = now + IDLE_CHECK_INTERVAL
+                    for key in list(self.selector.get_map().values()):
+                        if key.data is not None and key.data[1] <= now:
+                            self.selector.unregister(key.fileobj)
+                            expired.append(key.fileobj)
+            for key in ready:
+                self.resume(key.fileobj, key.data[0])
+            for client_conn in expired:
+                client_conn.close()
 
 # --- Server Class ---
 class BlackjackServer:
@@ -55,10 +194,58 @@ class BlackjackServer:
     Manages the Blackjack server.
     - Broadcasts availability via UDP.
     - Accepts client connections via TCP.
-    - Manages game logic (Deck, Dealing, Scoring) for each client in a separate thread.
+    - Manages game logic (Shoe, Dealing, Scoring) for each client, either in a
+      separate thread ("threaded" mode) or as a coroutine ("asyncio" mode).
     """
 
-    def __init__(self):
+    def __init__(self, port=0, session_pacing=pacing.HUMAN, decks=1, penetration=0.0,
+                 reuse_port=False, broadcast=True, metrics_port=None, max_sessions=0, max_pending=None,
+                 table_seats=TABLE_SEATS, journal_path=None):
+        self.requested_port = port
+        # Supervisor workers share one port (SO_REUSEPORT) and leave broadcasting to the supervisor
+        self.reuse_port = reuse_port
+        self.broadcast = broadcast
+        # Live counters and latency histograms for this process, served on
+        # localhost:metrics_port when one is given (see metrics.py)
+        self.metrics = metrics.ServerMetrics()
+        self.metrics_port = metrics_port
+        # Admission control: at most max_sessions sessions are played at once (threaded
+        # mode: by a pool of that many threads) and max_pending more wait for a free slot;
+        # any further connection gets a Busy reply. A kept-alive connection between
+        # sessions counts as neither: it is admitted again with its next Request.
+        # max_sessions 0 = no limit.
+        if max_sessions < 0 or (max_pending is not None and max_pending < 0):
+            raise ValueError("max_sessions and max_pending must not be negative")
+        self.max_sessions = max_sessions
+        self.max_pending = max_sessions // 4 if max_pending is None else max_pending
+        self.admitted = 0  # Connections playing a session or waiting for a slot
+        self.admission_lock = threading.Lock()
+        # Moving average of the seconds between two places being freed, which sets
+        # the retry hint of a Busy reply (see retry_after_ms)
+        self.release_interval = 0.0
+        self.released_at = time.monotonic()
+        self.session_slots = None  # asyncio mode: Semaphore(max_sessions), created on the event loop
+        self.pool = None  # threaded mode: the session threads, with a session limit
+        self.idle_connections = None  # threaded mode: kept-alive connections between sessions (IdleConnections)
+        # Advertised in the load Offer so clients can pick the least-loaded server
+        # (0 = no limit). session_count is replaced by the supervisor, which
+        # advertises the total over its workers.
+        self.capacity = max_sessions
+        self.session_count = self.metrics.active_sessions
+        # Default delay policy for sessions (see pacing.py)
+        self.pacing = session_pacing
+        # Shoe settings; the default (1 deck, reshuffled every round) plays like a fresh deck per round
+        self.decks = decks
+        self.penetration = penetration
+        # Shoes not currently in use, handed to the next session instead of building new ones
+        # (the first one is built now so bad settings fail at startup)
+        self.idle_shoes = [Shoe(decks, penetration)]
+        # Shared tables for clients that ask for one (FLAG_TABLE, see table.py)
+        self.lobby = table.TableLobby(self, table_seats)
+        # Every session, card and decision, written to journal_path when one is given
+        # (see journal.py); opened when the server starts serving
+        self.journal_path = journal_path
+        self.journal = None
         self.tcp_port = 0
         self.server_name = "bl\033[1mACK\033[0mj\033[1mACK\033[0m"
         self.running = True
@@ -68,217 +255,694 @@ class BlackjackServer:
         Runs in a background thread. Broadcasts offer messages so clients can find the server.
         """
 
-        # Find the real Wi-Fi IP to ensure broadcast works on LAN
-        my_ip = utils.get_local_ip()
-        print(f"--- Server started, broadcasting from {my_ip} on UDP {UDP_PORT} ---")
+        # Offers go to the broadcast address of every local network (read from the
+        # interfaces, cached: a new interface is picked up within its refresh interval)
+        targets = interfaces.broadcast_targets()
+        gamelog.info("broadcasting", "--- Server started, broadcasting from %(ip)s on UDP %(udp_port)s ---",
+            ip=", ".join(address for address, _ in targets), udp_port=UDP_PORT)
 
+        # Unbound: the kernel sends each subnet broadcast out of the interface that owns the subnet
         udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            # Bind to the specific interface to force traffic through the correct adapter
-            udp_socket.bind((my_ip, 0))
-        except Exception as e:
-            print(f"Warning: Could not bind broadcast socket to {my_ip}: {e}")
 
         # Enable Broadcast mode
         udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
+        # Both offers are packed once; only the load Offer's session count changes,
+        # and it is patched in place when it does
+        offer = protocol.pack_offer(self.tcp_port, self.server_name)
+        advertised = self.session_count()
+        load_offer = protocol.pack_offer_load(self.tcp_port, self.server_name, advertised, self.capacity)
+
         while self.running:
             try:
-                # specific protocol message with TCP port
-                msg = protocol.pack_offer(self.tcp_port, self.server_name)
-                # Send to everyone (255.255.255.255)
-                udp_socket.sendto(msg, ('255.255.255.255', UDP_PORT))
-                time.sleep(1)
+                sessions = self.session_count()
+                if sessions != advertised:
+                    protocol.set_offer_sessions(load_offer, sessions)
+                    advertised = sessions
             except Exception as e:
-                print(f"UDP Broadcast Error: {e}")
+                gamelog.warning("broadcast_error", "UDP Broadcast Error: %(error)s", error=str(e))
+            # Send to every network: v1 Offer for older clients, then the load Offer.
+            # A network that fails (link down, no route) does not keep the others from theirs.
+            for _, broadcast in interfaces.broadcast_targets():
+                try:
+                    udp_socket.sendto(offer, (broadcast, UDP_PORT))
+                    udp_socket.sendto(load_offer, (broadcast, UDP_PORT))
+                except OSError as e:
+                    gamelog.warning("broadcast_error", "UDP Broadcast Error on %(target)s: %(error)s",
+                        target=broadcast, error=str(e))
+            time.sleep(1)
+
+    def acquire_shoe(self):
+        """
+        Returns a shoe for a new session, reusing one left by an earlier session.
+        """
+        try:
+            return self.idle_shoes.pop()
+        except IndexError:
+            return Shoe(self.decks, self.penetration)
+
+    def release_shoe(self, shoe):
+        """
+        Returns a session's shoe to the pool (it keeps its position and cut card).
+        """
+        self.idle_shoes.append(shoe)
+
+    def admit(self):
+        """
+        Reserves a place for a new connection.
+        Returns:
+            bool: False if max_sessions are being served and max_pending already wait.
+        """
+        with self.admission_lock:
+            if self.max_sessions and self.admitted >= self.max_sessions + self.max_pending:
+                return False
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self.admission_lock:
+            self.admitted -= 1
+            now = time.monotonic()
+            interval = min(now - self.released_at, BUSY_RETRY_AFTER_MS / 1000)
+            self.release_interval += (interval - self.release_interval) / 16
+            self.released_at = now
+
+    def retry_after_ms(self):
+        """
+        The retry hint for a Busy reply: about how long the connections already
+        waiting take to get a slot, at the rate places were freed lately
+        (between MIN_RETRY_AFTER_MS and BUSY_RETRY_AFTER_MS).
+        """
+        with self.admission_lock:
+            waiting = max(0, self.admitted - self.max_sessions)
+            retry_after = (waiting + 1) * self.release_interval * 1000
+        return max(MIN_RETRY_AFTER_MS, min(BUSY_RETRY_AFTER_MS, round(retry_after)))
+
+    def reject(self, client_conn):
+        """
+        Tells a connection that the server is full and closes it (threaded mode).
+        """
+        self.metrics.count("sessions_rejected")
+        try:
+            client_conn.sendall(protocol.pack_busy(self.retry_after_ms()))
+        except OSError:
+            pass
+        finally:
+            client_conn.close()
 
-    def handle_client(self, client_conn):
+    def serve_admitted(self, client_conn, reader=None):
+        """
+        Runs an admitted connection on a pool thread, then frees its place (and
+        parks the connection if it is kept alive, see IdleConnections).
+        """
+        try:
+            reader = self.handle_client(client_conn, reader)
+        finally:
+            self.release()
+        if reader is not None:
+            self.idle_connections.park(client_conn, reader)
+
+    def resume_connection(self, client_conn, reader):
+        """
+        Called by IdleConnections when a kept-alive connection's client sends its
+        next Request: admits it again like a new connection.
+        """
+        if not self.admit():
+            self.reject(client_conn)
+        else:
+            self.pool.submit(self.serve_admitted, client_conn, reader)
+
+    async def serve_admitted_async(self, reader, writer):
+        """
+        Connection callback (asyncio mode): admission control, then the game
+        (which takes a session slot per session, see handle_client_async).
+        """
+        if not self.admit():
+            self.metrics.count("sessions_rejected")
+            writer.write(protocol.pack_busy(self.retry_after_ms()))
+            writer.close()
+            return
+        await self.handle_client_async(reader, writer)
+
+    def negotiate(self, request):
+        """
+        Picks the protocol version and the pacing for a session from its Request.
+        Returns:
+            (version, session_pacing) tuple.
+        """
+        version = min(request.version, PROTOCOL_VERSION)
+        if request.flags & FLAG_TURBO:
+            session_pacing = pacing.TURBO
+        else:
+            session_pacing = self.pacing
+        return version, session_pacing
+
+    def read_next_request(self, reader, client_conn):
+        """
+        Waits on a kept-alive connection for the client's next Request, skipping
+        decisions left over from the last session (sent ahead for a round that ended).
+        Returns:
+            memoryview: The Request frame, or None if the client closed the connection
+                        or sent nothing for KEEP_ALIVE_TIMEOUT seconds.
+        """
+        client_conn.settimeout(KEEP_ALIVE_TIMEOUT)
+        try:
+            while True:
+                frame = reader.read_frame()
+                if frame[protocol.HEADER_SIZE - 1] not in (MSG_TYPE_DECISION, MSG_TYPE_PAYLOAD):
+                    return frame
+        except (ConnectionError, socket.timeout):
+            return None
+        finally:
+            client_conn.settimeout(None)
+
+    def poll_next_request(self, reader, client_conn, readable):
+        """
+        Takes a kept-alive connection's next Request if the client already sent it,
+        skipping decisions left over from the last session, but does not wait for
+        one (threaded mode with a session limit: an idle connection is parked instead).
+        Args:
+            readable (bool): The socket has data (IdleConnections just resumed it).
+        Returns:
+            memoryview: The Request frame, or None if there is none yet.
+        Raises:
+            ConnectionError, socket.timeout: If the client closed the connection
+                                             (or stopped halfway through a message).
+        """
+        client_conn.settimeout(KEEP_ALIVE_TIMEOUT)
+        try:
+            while readable or reader.has_frame():
+                readable = False
+                frame = reader.read_frame()
+                if frame[protocol.HEADER_SIZE - 1] not in (MSG_TYPE_DECISION, MSG_TYPE_PAYLOAD):
+                    return frame
+            return None
+        finally:
+            client_conn.settimeout(None)
+
+    async def read_next_request_async(self, reader):
+        """
+        Same as read_next_request, for an asyncio stream.
+        """
+        try:
+            while True:
+                data = await read_frame_async(reader, protocol.client_frame_length, protocol.HEADER_SIZE,
+                                              KEEP_ALIVE_TIMEOUT)
+                if data[protocol.HEADER_SIZE - 1] not in (MSG_TYPE_DECISION, MSG_TYPE_PAYLOAD):
+                    return data
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            # A timeout mid-message (ConnectionError) leaves the stream out of step: close it either way
+            return None
+
+    def handle_client(self, client_conn, reader=None):
         """
         Handles a single client connection (Game Loop).
+        Args:
+            reader (FrameReader): The connection's reader when IdleConnections
+                                  resumes a kept-alive connection (None: a new one).
+        Returns:
+            FrameReader: The reader of a kept-alive connection left open to be parked
+                         until its next Request (see IdleConnections), else None.
         """
 
+        shoe = None
+        # Traffic since the last round was recorded (see metrics.ServerMetrics.record_round)
+        bytes_in = bytes_out = 0
+        journal = self.journal
+        journal_session = None  # Journal id of the session in progress
+        parked = False  # Left open for self.idle_connections between sessions
+
+        def send(msg):
+            nonlocal bytes_out
+            client_conn.sendall(msg)
+            bytes_out += len(msg)
+
         try:
-            print(f"Starting game with {client_conn.getpeername()}")
+            resumed = reader is not None
+            if not resumed:
+                gamelog.info("session_start", "Starting game with %(peer)s", peer=client_conn.getpeername())
+
+                # Every message from the client is read through one buffered reader,
+                # so split or coalesced TCP segments are reassembled into whole messages
+                reader = FrameReader(client_conn, protocol.client_frame_length)
 
             # --- 1. Handshake ---
-            # Wait for the Client to send their "Request" message
-            data = client_conn.recv(BUFFER_SIZE)
-            # Convert raw bytes -> Python Dictionary
-            request = protocol.unpack_request(data)
+            # A kept-alive connection returns here after each session for the next Request
+            keep_alive = resumed
+            while True:
+                # Wait for the Client to send their "Request" message
+                if keep_alive and self.idle_connections is not None:
+                    # With a session limit, an idle client gives its pool thread and its
+                    # place back until it sends the next Request
+                    try:
+                        frame = self.poll_next_request(reader, client_conn, resumed)
+                    except (ConnectionError, socket.timeout):
+                        break
+                    resumed = False
+                    if frame is None:
+                        parked = True
+                        break
+                elif keep_alive:
+                    frame = self.read_next_request(reader, client_conn)
+                    if frame is None:
+                        break
+                else:
+                    frame = reader.read_frame()
+                bytes_in += len(frame)
+                # Convert raw bytes -> Request record
+                request = protocol.unpack_request_from(frame)
 
-            # If the packet was invalid or not a Request - disconnect immediately
-            if not request:
-                client_conn.close()
-                return
-
-            # Extract the Game Settings from the dictionary
-            total_rounds = request['rounds']
-            team_name = request['team_name']
-
-            print(f"Team '{team_name}' joined for {total_rounds} rounds.")
-
-            # --- 2. Rounds Loop ---
-            for round_num in range(1, total_rounds + 1):
-                print(f"\n--- Round {round_num} / {total_rounds} vs {team_name} ---")
-
-                # New Deck and hands for every round
-                deck = Deck()
-                player_hand = []
-                dealer_hand = []
-                player_busted = False
-
-                # --- 3. Deal Player ---
-                print("Dealing to player...")
-                for _ in range(2):
-                    card = deck.draw_card()
-                    player_hand.append(card)
-                    print(f"  Player got: {utils.get_card_name(card[0], card[1])}")
-
-                    score = deck.calculate_score(player_hand)
-                    if score > 21:
-                        msg = protocol.pack_payload_server(RESULT_LOSS, card[0], card[1])
-                        client_conn.sendall(msg)
-                        player_busted = True
+                # If the packet was invalid or not a Request - disconnect immediately
+                if not request:
+                    break
+
+                # Extract the Game Settings from the request
+                total_rounds = request.rounds
+                team_name = request.team_name
+
+                keep_alive = bool(request.flags & FLAG_KEEP_ALIVE)
+                version, session_pacing = self.negotiate(request)
+                # v2 clients get the opening deal and the dealer's turn as one Batch message each
+                batched = version >= PROTOCOL_V2
+
+                gamelog.info("session_joined", "Team '%(team)s' joined for %(rounds)s rounds (protocol v%(version)s).",
+                    team=team_name, rounds=total_rounds, version=version)
+                self.metrics.count("sessions_started")
+                autoplay = type(request) is protocol.Autoplay
+                if journal:
+                    journal_session = journal.start_session(version, total_rounds, request.flags, autoplay)
+
+                if request.flags & FLAG_TABLE and batched and not autoplay:
+                    # Shared table: the table's thread plays the rounds on this connection,
+                    # this thread only waits for the player to leave it
+                    seat = table.Seat(team_name, total_rounds, client_conn, reader, threading.Event(), journal_session)
+                    client_conn.settimeout(TABLE_TURN_TIMEOUT)
+                    self.lobby.join(seat, session_pacing, table.ThreadedTable)
+                    seat.done.wait()
+                    client_conn.settimeout(None)
+                    self.metrics.count("sessions_finished")
+                    if journal:
+                        # The table journaled the rounds; the session ends here
+                        journal.end_session(journal_session, total_rounds - seat.rounds_left, seat.gone)
+                        journal_session = None
+                    if seat.gone:
+                        self.metrics.count("session_errors")
                         break
-                    else:
-                        msg = protocol.pack_payload_server(RESULT_NOT_OVER, card[0], card[1])
-                        client_conn.sendall(msg)
-
-                if not player_busted:
-                    # --- 4. Deal Dealer ---
-                    dealer_visible = deck.draw_card()
-                    dealer_hidden = deck.draw_card()
-                    dealer_hand = [dealer_visible, dealer_hidden]
-                    print(f"Dealer shows: {utils.get_card_name(dealer_visible[0], dealer_visible[1])}")
-
-                    # Send only the visible card to client
-                    msg = protocol.pack_payload_server(RESULT_NOT_OVER, dealer_visible[0], dealer_visible[1])
-                    client_conn.sendall(msg)
-
-                    # --- 5. Player Moves (Hit/Stand) ---
-                    while True:
+                    if not keep_alive:
+                        gamelog.info("session_end", "Left the table. Closing connection.")
+                        break
+                    gamelog.info("session_end", "Left the table. Keeping the connection open.")
+                    continue
+
+                shoe = self.acquire_shoe()
+                engine = RoundEngine(shoe)
+                engine.join(total_rounds)
+
+                # --- 2a. Autoplay: the server decides every round and only reports results ---
+                if autoplay:
+                    strategy = simulator.strategy_from_policy(request.policy, request.hard_stand,
+                                                              request.soft_stand, request.hit_rows)
+                    record = functools.partial(journal.record_events, journal_session) if journal else None
+                    for rounds, msg in autoplay_messages(engine, strategy, record):
+                        send(msg)
+                        self.metrics.record_rounds(rounds, bytes_in, bytes_out)
+                        bytes_in = bytes_out = 0
+
+                # --- 2. Rounds Loop ---
+                while engine.state is BETWEEN_ROUNDS:
+                    gamelog.trace("round_start", "\n--- Round %(round)s / %(rounds)s vs %(team)s ---",
+                        round=engine.round_num + 1, rounds=total_rounds, team=team_name)
+
+                    round_started = time.perf_counter()
+                    decision_waits = []
+
+                    # --- 3. Deal (the player's two cards and the dealer's upcard) ---
+                    # Same shoe for every round (reshuffled only when the cut card is out)
+                    gamelog.trace("deal", "Dealing to player...")
+                    events = engine.start_round()
+                    round_tag = engine.round_num & ROUND_TAG_MASK
+                    if journal:
+                        journal.record_events(journal_session, engine.round_num, events)
+                    if gamelog.tracing:
+                        trace_events(events)
+                    for _, msg in encode_events(events, batched):
+                        send(msg)
+
+                    # --- 4. Player Moves (Hit/Stand), then the Dealer's turn ---
+                    while engine.state is PLAYER_TURN:
                         # Wait for client to send "Hit" or "Stand"
-                        data = client_conn.recv(BUFFER_SIZE)
-                        msg = protocol.unpack_payload_client(data)
-                        # Stop if connection lost/invalid
-                        if not msg: break
-
-                        # --- CASE A: Player Stands ---
-                        if msg['decision'] == ACTION_STAND:
-                            print(f"Player Stand. Score: {deck.calculate_score(player_hand)}")
-                            # Exit loop, turn is over
-                            break
-
-                        # --- CASE B: Player Hits ---
-                        if msg['decision'] == ACTION_HIT:
-                            print("Player Hit.")
-                            new_card = deck.draw_card()
-                            player_hand.append(new_card)
-                            print(f"  Player got: {utils.get_card_name(new_card[0], new_card[1])}")
-
-                            # Check if this new card caused a Bust (>21)
-                            score = deck.calculate_score(player_hand)
-
-                            if score > 21:
-                                print(f"  Player Busted! Score: {score}")
-                                # Send LOSS immediately. Round ends for player.
-                                msg = protocol.pack_payload_server(RESULT_LOSS, new_card[0], new_card[1])
-                                client_conn.sendall(msg)
-                                player_busted = True
-                                break
-                            else:
-                                # Send the card and keep the loop running
-                                msg = protocol.pack_payload_server(RESULT_NOT_OVER, new_card[0], new_card[1])
-                                client_conn.sendall(msg)
-
-                # --- 6. Dealer Moves ---
-                if not player_busted:
-                    # Reveal the hidden card to the client first
-                    print(f"Dealer reveals hidden: {utils.get_card_name(dealer_hidden[0], dealer_hidden[1])}")
-                    msg = protocol.pack_payload_server(RESULT_NOT_OVER, dealer_hidden[0], dealer_hidden[1])
-                    client_conn.sendall(msg)
-
-                    dealer_score = deck.calculate_score(dealer_hand)
-
-                    # Dealer must hit until 17
-                    while dealer_score < 17:
-                        time.sleep(0.5) # Small delay for realism
-                        new_card = deck.draw_card()
-                        dealer_hand.append(new_card)
-                        dealer_score = deck.calculate_score(dealer_hand)
-                        print(f"  Dealer draws: {utils.get_card_name(new_card[0], new_card[1])}")
-
-                        # Send new card to client (Game still running)
-                        msg = protocol.pack_payload_server(RESULT_NOT_OVER, new_card[0], new_card[1])
-                        client_conn.sendall(msg)
-
-                    # --- 7. Determine Winner ---
-                    player_score = deck.calculate_score(player_hand)
-                    last_card = dealer_hand[-1]
-                    print(f"Scores -> Player: {player_score} | Dealer: {dealer_score}")
-
-                    # Compare scores to find the winner
-                    if dealer_score > 21:
-                        print("Dealer Busted. Player Wins!")
-                        result = RESULT_WIN
-                    elif player_score > dealer_score:
-                        print("Player Wins!")
-                        result = RESULT_WIN
-                    elif player_score < dealer_score:
-                        print("Dealer Wins.")
-                        result = RESULT_LOSS
-                    else:
-                        print("It's a Tie.")
-                        result = RESULT_TIE
+                        # (decisions the client sent ahead are already buffered in the reader)
+                        asked = time.perf_counter()
+                        frame = reader.read_frame()
+                        decision_waits.append(time.perf_counter() - asked)
+                        bytes_in += len(frame)
+                        msg = protocol.unpack_decision_from(frame)
+                        if msg:
+                            # Skip decisions pipelined for a round that already ended (e.g. after a bust)
+                            if msg.round_tag is not None and msg.round_tag != round_tag:
+                                continue
+                            decision = msg.decision
+                        else:
+                            # An invalid message ends the player's turn
+                            decision = ACTION_STAND
 
-                    # Send Final Result (Win/Loss/Tie) attached to the last card info
-                    msg = protocol.pack_payload_server(result, last_card[0], last_card[1])
-                    client_conn.sendall(msg)
+                        if gamelog.tracing:
+                            trace_decision(decision, engine)
+                        events = engine.decide(decision)
+                        if journal:
+                            journal.record_events(journal_session, engine.round_num, events, decision)
+                        if gamelog.tracing:
+                            trace_events(events)
+                        for paced, msg in encode_events(events, batched):
+                            if paced:
+                                session_pacing.wait(pacing.DELAY_DEALER_DRAW) # Small delay for realism
+                            send(msg)
 
-                time.sleep(1)
+                    self.metrics.record_round(time.perf_counter() - round_started, bytes_in, bytes_out, decision_waits)
+                    bytes_in = bytes_out = 0
+                    session_pacing.wait(pacing.DELAY_ROUND_END)
 
-            # --- End of Session ---
-            print(f"Finished {total_rounds} rounds. Closing connection.")
-            client_conn.close()
+                # --- End of Session ---
+                self.release_shoe(shoe)
+                shoe = None
+                self.metrics.count("sessions_finished")
+                if journal:
+                    journal.end_session(journal_session, engine.round_num)
+                    journal_session = None
+                if not keep_alive:
+                    gamelog.info("session_end", "Finished %(rounds)s rounds. Closing connection.", rounds=total_rounds)
+                    break
+                gamelog.info("session_end", "Finished %(rounds)s rounds. Keeping the connection open.",
+                    rounds=total_rounds)
 
         except Exception as e:
-            print(f"Game Error: {e}")
+            gamelog.warning("session_error", "Game Error: %(error)s", error=str(e))
+            self.metrics.count("session_errors")
         finally:
-            client_conn.close()
+            if shoe:
+                self.release_shoe(shoe)
+                self.metrics.count("sessions_finished")
+            if journal_session is not None:
+                journal.end_session(journal_session, engine.round_num if shoe else 0, failed=True)
+            self.metrics.record_traffic(bytes_in, bytes_out)
+            if not parked:
+                client_conn.close()
+        return reader if parked else None
 
-    def start_server(self):
+    async def handle_client_async(self, reader, writer):
+        """
+        Handles a single client connection as a coroutine (asyncio mode).
+        Same game flow as handle_client, but every wait yields to the event loop
+        instead of holding an OS thread.
+        """
+
+        shoe = None
+        # Traffic since the last round was recorded (see metrics.ServerMetrics.record_round)
+        bytes_in = bytes_out = 0
+        journal = self.journal
+        journal_session = None  # Journal id of the session in progress
+        # Admission: the place serve_admitted_async took, and a session slot while playing.
+        # Both are given back while a kept-alive connection waits for its next Request.
+        admitted = True
+        slots = self.session_slots
+        seated = False
+
+        def write(data):
+            nonlocal bytes_out
+            writer.write(data)
+            bytes_out += len(data)
+
+        try:
+            gamelog.info("session_start", "Starting game with %(peer)s", peer=writer.get_extra_info('peername'))
+            # As in start_server. asyncio only sets this itself for sockets created
+            # with proto=IPPROTO_TCP, which the listening socket is not.
+            writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            # --- 1. Handshake ---
+            # A kept-alive connection returns here after each session for the next Request
+            keep_alive = False
+            while True:
+                if keep_alive:
+                    if seated:
+                        slots.release()
+                        seated = False
+                    self.release()
+                    admitted = False
+                    data = await self.read_next_request_async(reader)
+                    if data is None:
+                        break
+                    if not self.admit():
+                        self.metrics.count("sessions_rejected")
+                        write(protocol.pack_busy(self.retry_after_ms()))
+                        break
+                    admitted = True
+                else:
+                    data = await read_frame_async(reader, protocol.client_frame_length, protocol.HEADER_SIZE)
+                bytes_in += len(data)
+                request = protocol.unpack_request(data)
+
+                # If the packet was invalid or not a Request - disconnect immediately
+                if not request:
+                    break
+
+                # Beyond max_sessions, admitted sessions wait here for a slot
+                if slots is not None and not seated:
+                    await slots.acquire()
+                    seated = True
+
+                total_rounds = request.rounds
+                team_name = request.team_name
+
+                keep_alive = bool(request.flags & FLAG_KEEP_ALIVE)
+                version, session_pacing = self.negotiate(request)
+                # v2 clients get the opening deal and the dealer's turn as one Batch message each
+                batched = version >= PROTOCOL_V2
+
+                gamelog.info("session_joined", "Team '%(team)s' joined for %(rounds)s rounds (protocol v%(version)s).",
+                    team=team_name, rounds=total_rounds, version=version)
+                self.metrics.count("sessions_started")
+                autoplay = type(request) is protocol.Autoplay
+                if journal:
+                    journal_session = journal.start_session(version, total_rounds, request.flags, autoplay)
+
+                if request.flags & FLAG_TABLE and batched and not autoplay:
+                    # Shared table: the table's task plays the rounds on this connection
+                    seat = table.Seat(team_name, total_rounds, writer, reader, asyncio.Event(), journal_session)
+                    self.lobby.join(seat, session_pacing, table.AsyncTable)
+                    await seat.done.wait()
+                    self.metrics.count("sessions_finished")
+                    if journal:
+                        # The table journaled the rounds; the session ends here
+                        journal.end_session(journal_session, total_rounds - seat.rounds_left, seat.gone)
+                        journal_session = None
+                    if seat.gone:
+                        self.metrics.count("session_errors")
+                        break
+                    if not keep_alive:
+                        gamelog.info("session_end", "Left the table. Closing connection.")
+                        break
+                    gamelog.info("session_end", "Left the table. Keeping the connection open.")
+                    continue
+
+                shoe = self.acquire_shoe()
+                engine = RoundEngine(shoe)
+                engine.join(total_rounds)
+
+                # --- 2a. Autoplay (see handle_client) ---
+                if autoplay:
+                    strategy = simulator.strategy_from_policy(request.policy, request.hard_stand,
+                                                              request.soft_stand, request.hit_rows)
+                    record = functools.partial(journal.record_events, journal_session) if journal else None
+                    # Smaller chunks: the loop runs the other sessions only between two of them
+                    for rounds, msg in autoplay_messages(engine, strategy, record, AUTOPLAY_ASYNC_CHUNK_ROUNDS):
+                        write(msg)
+                        await writer.drain()
+                        self.metrics.record_rounds(rounds, bytes_in, bytes_out)
+                        bytes_in = bytes_out = 0
+                        await asyncio.sleep(0)
+
+                # --- 2. Rounds Loop ---
+                while engine.state is BETWEEN_ROUNDS:
+                    gamelog.trace("round_start", "\n--- Round %(round)s / %(rounds)s vs %(team)s ---",
+                        round=engine.round_num + 1, rounds=total_rounds, team=team_name)
+                    round_started = time.perf_counter()
+                    decision_waits = []
+
+                    # --- 3. Deal ---
+                    gamelog.trace("deal", "Dealing to player...")
+                    events = engine.start_round()
+                    round_tag = engine.round_num & ROUND_TAG_MASK
+                    if journal:
+                        journal.record_events(journal_session, engine.round_num, events)
+                    if gamelog.tracing:
+                        trace_events(events)
+                    for _, msg in encode_events(events, batched):
+                        write(msg)
+                    await writer.drain()
+
+                    # --- 4. Player Moves (Hit/Stand), then the Dealer's turn ---
+                    while engine.state is PLAYER_TURN:
+                        asked = time.perf_counter()
+                        data = await read_frame_async(reader, protocol.client_frame_length, protocol.HEADER_SIZE)
+                        decision_waits.append(time.perf_counter() - asked)
+                        bytes_in += len(data)
+                        msg = protocol.unpack_decision_from(data)
+                        if msg:
+                            # Skip decisions pipelined for a round that already ended (e.g. after a bust)
+                            if msg.round_tag is not None and msg.round_tag != round_tag:
+                                continue
+                            decision = msg.decision
+                        else:
+                            # An invalid message ends the player's turn
+                            decision = ACTION_STAND
+
+                        if gamelog.tracing:
+                            trace_decision(decision, engine)
+                        events = engine.decide(decision)
+                        if journal:
+                            journal.record_events(journal_session, engine.round_num, events, decision)
+                        if gamelog.tracing:
+                            trace_events(events)
+                        for paced, msg in encode_events(events, batched):
+                            if paced:
+                                await session_pacing.wait_async(pacing.DELAY_DEALER_DRAW) # Small delay for realism
+                            write(msg)
+                            await writer.drain()
+
+                    await writer.drain()
+                    self.metrics.record_round(time.perf_counter() - round_started, bytes_in, bytes_out, decision_waits)
+                    bytes_in = bytes_out = 0
+                    await session_pacing.wait_async(pacing.DELAY_ROUND_END)
+
+                # --- End of Session ---
+                self.release_shoe(shoe)
+                shoe = None
+                self.metrics.count("sessions_finished")
+                if journal:
+                    journal.end_session(journal_session, engine.round_num)
+                    journal_session = None
+                if not keep_alive:
+                    gamelog.info("session_end", "Finished %(rounds)s rounds. Closing connection.", rounds=total_rounds)
+                    break
+                gamelog.info("session_end", "Finished %(rounds)s rounds. Keeping the connection open.",
+                    rounds=total_rounds)
+
+        except asyncio.IncompleteReadError:
+            gamelog.warning("session_error", "Game Error: Connection closed unexpectedly")
+            self.metrics.count("session_errors")
+        except Exception as e:
+            gamelog.warning("session_error", "Game Error: %(error)s", error=str(e))
+            self.metrics.count("session_errors")
+        finally:
+            if shoe:
+                self.release_shoe(shoe)
+                self.metrics.count("sessions_finished")
+            if journal_session is not None:
+                journal.end_session(journal_session, engine.round_num if shoe else 0, failed=True)
+            self.metrics.record_traffic(bytes_in, bytes_out)
+            if seated:
+                slots.release()
+            if admitted:
+                self.release()
+            writer.close()
+
+    def create_listening_socket(self):
         """
-        Main entry point. Starts TCP listener and UDP broadcaster.
+        Creates the TCP socket for game connections and starts listening on it.
+        Returns:
+            socket: The listening socket (self.tcp_port holds its port).
         """
 
         # Create a TCP socket (SOCK_STREAM) for game connections
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.bind(('', 0))
+        # Allow a fixed --port to be reused right after a restart (TIME_WAIT)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            # Several processes listen on the same port; the kernel spreads new connections across them
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server_socket.bind(('', self.requested_port))
 
         # Retrieve the actual port number assigned by the OS
         self.tcp_port = server_socket.getsockname()[1]
-        print(f"Listening for TCP connections on port {self.tcp_port}")
 
-        # Start listening for incoming connections
-        server_socket.listen()
+        # Start listening for incoming connections (before announcing the port,
+        # so whoever reads the line below can connect right away)
+        server_socket.listen(TCP_BACKLOG)
+        gamelog.info("listening", "Listening for TCP connections on port %(port)s", port=self.tcp_port)
+        return server_socket
+
+    def start_metrics_endpoint(self):
+        """
+        Serves the metrics snapshot on localhost:metrics_port, if a port was given.
+        """
+        if self.metrics_port is None:
+            return
+        http_server = metrics.start_metrics_server(self.metrics, self.metrics_port)
+        gamelog.info("metrics_endpoint", "Metrics on http://127.0.0.1:%(port)s/metrics", port=http_server.server_address[1])
+
+    def start_journal(self):
+        """
+        Opens the game journal, if a path was given.
+        """
+        if self.journal_path is None:
+            return
+        self.journal = journal.Journal(self.journal_path)
+        gamelog.info("journal", "Journaling games to %(path)s", path=self.journal_path)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
 
-        # Start the UDP Broadcast in a background thread (daemon=True kills it when main ends)
+    def start_broadcast_thread(self):
+        """
+        Starts the UDP Broadcast in a background thread (daemon=True kills it when main ends).
+        """
         udp_thread = threading.Thread(target=self.start_udp_broadcast)
         udp_thread.daemon = True
         udp_thread.start()
 
+    def start_server(self):
+        """
+        Main entry point (threaded mode). Starts TCP listener and UDP broadcaster.
+        """
+
+        # Create a TCP socket (SOCK_STREAM) for game connections
+        server_socket = self.create_listening_socket()
+        self.start_metrics_endpoint()
+        self.start_journal()
+
+        if self.broadcast:
+            self.start_broadcast_thread()
+
         # Set a timeout so the loop can check 'self.running' every second
         server_socket.settimeout(1.0)
 
+        # With a session limit, games run on a fixed pool of threads (started as needed);
+        # admitted connections beyond the pool wait in its queue, and kept-alive
+        # connections wait for their next Request off the pool
+        pool = None
+        if self.max_sessions:
+            pool = self.pool = ThreadPoolExecutor(max_workers=self.max_sessions, thread_name_prefix="session")
+            self.idle_connections = IdleConnections(self.resume_connection)
+
         try:
             while self.running:
                 try:
                     # distinct 'accept' call creates a new socket for the incoming client
                     client_socket, client_address = server_socket.accept()
+                    # Small messages go out back to back (a result, then the next deal): don't let
+                    # Nagle hold the second one until the client's delayed ACK (~40 ms)
+                    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
-                    # Start a dedicated thread for this client's game
-                    client_handler = threading.Thread(target=self.handle_client, args=(client_socket,))
-                    client_handler.start()
+                    if not self.admit():
+                        self.reject(client_socket)
+                    elif pool:
+                        pool.submit(self.serve_admitted, client_socket)
+                    else:
+                        # No limit: a dedicated thread for this client's game
+                        client_handler = threading.Thread(target=self.serve_admitted, args=(client_socket,))
+                        client_handler.start()
 
                 except socket.timeout:
                     continue # No client connected this second, loop again
@@ -287,8 +951,104 @@ class BlackjackServer:
             self.running = False
         finally:
             server_socket.close()
+            if pool:
+                pool.shutdown(wait=False)
+            self.close_journal()
+
+    async def serve_async(self):
+        """
+        Runs the asyncio game server until cancelled.
+        """
+        server_socket = self.create_listening_socket()
+        self.start_metrics_endpoint()
+        self.start_journal()
+
+        # The broadcaster stays on its own thread; it only sleeps and sends
+        if self.broadcast:
+            self.start_broadcast_thread()
+
+        self.session_slots = asyncio.Semaphore(self.max_sessions) if self.max_sessions else None
+        game_server = await asyncio.start_server(self.serve_admitted_async, sock=server_socket,
+                                                 backlog=TCP_BACKLOG)
+        async with game_server:
+            await game_server.serve_forever()
+
+    def start_async_server(self):
+        """
+        Main entry point (asyncio mode). One thread serves every client connection.
+        """
+        try:
+            asyncio.run(self.serve_async())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            self.close_journal()
+
+SERVER_MODES = ("threaded", "asyncio")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blackjack game server")
+    parser.add_argument("--mode", choices=SERVER_MODES, default="threaded",
+                        help="threaded: one OS thread per client, asyncio: one event loop for all clients")
+    parser.add_argument("--port", type=int, default=0, help="TCP port to listen on (0 = any free port)")
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in each shoe")
+    parser.add_argument("--penetration", type=float, default=0.0,
+                        help="Fraction of the shoe dealt before the cut card forces a reshuffle "
+                             "(0 = reshuffle every round)")
+    parser.add_argument("--pacing", choices=sorted(pacing.PRESETS), default=pacing.HUMAN.name,
+                        help="Delay policy: human (readable dealer turn) or turbo (no delays, for bots)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Run N worker processes sharing the port (supervisor mode, see supervisor.py)")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="Seconds between aggregate stats reports in supervisor mode")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve live metrics as JSON on http://127.0.0.1:PORT/metrics "
+                             "(supervisor mode: worker i uses PORT + i)")
+    parser.add_argument("--max-sessions", type=int, default=0,
+                        help="Connections served at once; also advertised as capacity in offers "
+                             "(0 = no limit; supervisor mode: per worker)")
+    parser.add_argument("--max-pending", type=int,
+                        help="Connections that may wait for a free slot before the rest get a Busy "
+                             "reply (default: a quarter of --max-sessions)")
+    parser.add_argument("--table-seats", type=int, default=TABLE_SEATS,
+                        help="Seats per shared table, for clients that ask to play at one")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="Append every session, card and decision to a binary journal (see journal.py; "
+                             "supervisor mode: worker i writes PATH.i)")
+    parser.add_argument("--log-format", choices=gamelog.LOG_FORMATS, default="text",
+                        help="text: readable lines, json: one structured event per line")
+    parser.add_argument("--trace", action="store_true",
+                        help="Log every card and decision (toggle at runtime with SIGUSR1)")
+    args = parser.parse_args()
+
+    gamelog.setup(args.log_format, args.trace)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, gamelog.toggle_trace)
+
+    if args.workers:
+        from supervisor import Supervisor
+        try:
+            supervisor = Supervisor(args.workers, port=args.port, mode=args.mode, stats_interval=args.stats_interval,
+                                    session_pacing=pacing.get_pacing(args.pacing),
+                                    decks=args.decks, penetration=args.penetration,
+                                    metrics_port=args.metrics_port,
+                                    max_sessions=args.max_sessions, max_pending=args.max_pending,
+                                    table_seats=args.table_seats, journal_path=args.journal)
+        except (RuntimeError, ValueError) as e:
+            parser.error(str(e))
+        supervisor.run()
+        sys.exit()
+
     # Main entry point: Initialize and start the server
-    server = BlackjackServer()
-    server.start_server()
\ No newline at end of file
+    try:
+        server = BlackjackServer(port=args.port, session_pacing=pacing.get_pacing(args.pacing),
+                                 decks=args.decks, penetration=args.penetration, metrics_port=args.metrics_port,
+                                 max_sessions=args.max_sessions, max_pending=args.max_pending,
+                                 table_seats=args.table_seats, journal_path=args.journal)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.mode == "asyncio":
+        server.start_async_server()
+    else:
+        server.start_server()
\ No newline at end of file
@@ -0,0 +1,414 @@
+"""
+Headless Blackjack simulator for tuning strategies and house rules offline.
+
+Rounds follow the server's rules (see engine.py): two cards to the
+player, the dealer's upcard and hole card, the player's hits, then the dealer
+hits below 17 and stands on every 17. No natural bonus, equal totals tie.
+
+Two engines:
+    vectorized  NumPy: a whole batch of rounds at once, one freshly shuffled
+                shoe per round (the server's default, --penetration 0).
+    scalar      engine.RoundEngine on a cards.Shoe, one round at a time: the
+                server's own rules code; used with a cut card or without NumPy.
+
+The vectorized engine has its own array copy of the rules, so it is checked
+against the scalar one: --check plays the same number of fresh-shoe rounds
+through both and fails unless their win, loss and tie rates agree.
+
+Batches are spread across a process pool.
+
+Usage:
+    python simulator.py --rounds 1000000 --strategy basic --workers 4
+    python simulator.py --rounds 1000000 --decks 6 --check
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cards import *
+from consts import *
+from engine import RoundEngine, PLAYER_TURN
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the scalar engine covers every case
+    np = None
+
+# Player totals a strategy table covers: up to 21 + 10 (a hard 21 that hits a ten)
+MAX_TOTAL = BLACKJACK + 10
+
+# Two-sided 95% confidence
+Z_95 = 1.96
+# Two-sided 99.9%: check_engines compares three rates, and a false alarm should be rare
+Z_CHECK = 3.29
+
+DEFAULT_BATCH = 50000
+
+# --- Strategies ---
+# A strategy is a hit table: table[soft][total][upcard_value] is True to hit.
+# soft: 1 if an Ace in the hand still counts as 11; upcard_value: 2-11 (Ace = 11).
+
+def make_strategy(should_hit):
+    """
+    Builds a hit table from should_hit(total, soft, upcard_value).
+    Busted totals never hit.
+    """
+    return tuple(
+        tuple(
+            tuple(total <= BLACKJACK and bool(should_hit(total, bool(soft), upcard)) for upcard in range(ACE_VALUE + 1))
+            for total in range(MAX_TOTAL + 1))
+        for soft in (0, 1))
+
+def stand_on(n, soft_n=None):
+    """
+    Hits below n, stands on n or more (n=17 plays like the dealer). With soft_n,
+    soft hands hit below soft_n instead (e.g. stand on 17, hit soft 17: soft_n=18).
+    """
+    if soft_n is None:
+        soft_n = n
+    return make_strategy(lambda total, soft, upcard: total < (soft_n if soft else n))
+
+def _basic_hit(total, soft, upcard):
+    # Hit/stand basic strategy (no doubling or splitting in this game)
+    if soft:
+        return total <= 17 or (total == 18 and upcard >= 9)
+    if total >= 17:
+        return False
+    if total >= 13:
+        return upcard >= 7
+    if total == 12:
+        return not 4 <= upcard <= 6
+    return True
+
+BASIC = make_strategy(_basic_hit)
+
+def parse_stand_on(name):
+    """
+    Returns:
+        (n, soft_n) for 'stand-on-N' or 'stand-on-N-soft-M' (N, M = 2-21), None for any other name.
+    """
+    if not name.startswith("stand-on-"):
+        return None
+    n, _, soft_n = name[len("stand-on-"):].partition("-soft-")
+    soft_n = soft_n or n
+    if not (n.isdigit() and soft_n.isdigit() and 2 <= int(n) <= BLACKJACK and 2 <= int(soft_n) <= BLACKJACK):
+        return None
+    return int(n), int(soft_n)
+
+def get_strategy(name):
+    """
+    Looks up a strategy by name: 'basic', 'stand-on-N' or 'stand-on-N-soft-M'
+    (N, M = 2-21: soft hands stand on M).
+    Raises:
+        ValueError: For an unknown name.
+    """
+    if name == "basic":
+        return BASIC
+    thresholds = parse_stand_on(name)
+    if thresholds:
+        return stand_on(*thresholds)
+    raise ValueError(f"Unknown strategy '{name}' (expected 'basic', 'stand-on-N' or 'stand-on-N-soft-M')")
+
+# --- Autoplay policies ---
+# How a strategy travels in an Autoplay request (see protocol.pack_autoplay): stand-on
+# thresholds as two numbers, anything else as a hit table of POLICY_TABLE_ROWS bitmasks
+TABLE_TOTALS = range(POLICY_TABLE_FIRST_TOTAL, BLACKJACK + 1)
+UPCARD_VALUES = range(2, ACE_VALUE + 1)
+
+def hit_rows(strategy):
+    """
+    Packs a strategy's decisions for totals 12-21 into hit table rows (hard, then soft).
+    """
+    return tuple(sum(1 << (upcard - 2) for upcard in UPCARD_VALUES if strategy[soft][total][upcard])
+                 for soft in (0, 1) for total in TABLE_TOTALS)
+
+def policy_for(name):
+    """
+    Returns:
+        (policy, hard_stand, soft_stand, hit_rows) for pack_autoplay, for a strategy name.
+    Raises:
+        ValueError: For an unknown name.
+    """
+    thresholds = parse_stand_on(name)
+    if thresholds:
+        return POLICY_STAND_ON, thresholds[0], thresholds[1], None
+    return POLICY_TABLE, 0, 0, hit_rows(get_strategy(name))
+
+def strategy_from_policy(policy, hard_stand, soft_stand, rows):
+    """
+    Builds the strategy an Autoplay request asks for. A table policy hits every
+    total below 12.
+    Raises:
+        ValueError: For an unknown policy.
+    """
+    if policy == POLICY_STAND_ON:
+        return stand_on(hard_stand, soft_stand)
+    if policy == POLICY_TABLE:
+        def should_hit(total, soft, upcard):
+            if total < POLICY_TABLE_FIRST_TOTAL:
+                return True
+            row = rows[soft * len(TABLE_TOTALS) + total - POLICY_TABLE_FIRST_TOTAL]
+            return upcard >= 2 and row >> (upcard - 2) & 1
+        return make_strategy(should_hit)
+    raise ValueError(f"Unknown autoplay policy {policy}")
+
+# --- Scalar engine ---
+def play_round(engine, strategy, record=None):
+    """
+    Plays one round on a joined engine.RoundEngine, hitting by the strategy
+    table (the same rules and dealing order as the server).
+    record: optional record(round_num, events, decision), called with the records
+            of every engine event (decision None for the deal), e.g. Journal.record_events.
+    Returns:
+        int: RESULT_WIN, RESULT_LOSS or RESULT_TIE.
+    """
+    events = engine.start_round()
+    if record:
+        record(engine.round_num, events, None)
+    player_hand = engine.player_hand
+    upcard_value = CARD_VALUE[engine.dealer_hand.cards[0]]
+    while engine.state is PLAYER_TURN:
+        if strategy[player_hand.soft_aces > 0][player_hand.total][upcard_value]:
+            decision = ACTION_HIT
+            events = engine.hit()
+        else:
+            decision = ACTION_STAND
+            events = engine.stand()
+        if record:
+            record(engine.round_num, events, decision)
+    return engine.result
+
+def simulate_scalar(rounds, strategy, decks=1, penetration=0.0, seed=None):
+    """
+    Plays 'rounds' rounds from one persistent shoe.
+    Returns:
+        (wins, losses, ties)
+    """
+    engine = RoundEngine(Shoe(decks, penetration, rng=random.Random(seed)))
+    engine.join(rounds)
+    counts = {RESULT_WIN: 0, RESULT_LOSS: 0, RESULT_TIE: 0}
+    for _ in range(rounds):
+        counts[play_round(engine, strategy)] += 1
+    return counts[RESULT_WIN], counts[RESULT_LOSS], counts[RESULT_TIE]
+
+# --- Vectorized engine ---
+def _add_cards(total, soft_aces, values):
+    # Hand.add_value for arrays of hands; one new card needs at most two Ace reductions
+    total = total + values
+    soft_aces = soft_aces + (values == ACE_VALUE)
+    for _ in range(2):
+        reduce = (total > BLACKJACK) & (soft_aces > 0)
+        total -= reduce * ACE_REDUCTION
+        soft_aces -= reduce
+    return total, soft_aces
+
+class ShuffledShoes:
+    """
+    One shoe per round, as rows of Blackjack values, shuffled lazily.
+
+    A round only uses the first few cards of its shoe, so rather than permuting
+    every row up front the shoes are shuffled with a partial Fisher-Yates, one
+    column at a time and only as deep as some round actually deals (the prefix
+    is exactly as random as a full shuffle).
+    """
+
+    def __init__(self, rounds, decks, rng):
+        shoe = np.array(CARD_VALUE * decks, dtype=np.int8)
+        self.values = np.tile(shoe, (rounds, 1))
+        self.rows = np.arange(rounds)
+        self.rng = rng
+        self.shuffled = 0  # Columns already final
+
+    def shuffle_to(self, depth):
+        # Fix columns [shuffled, depth): swap each with a random later card of its row
+        values, rows, size = self.values, self.rows, self.values.shape[1]
+        for column in range(self.shuffled, min(depth, size)):
+            picks = self.rng.integers(column, size, size=len(rows))
+            picked = values[rows, picks]
+            values[rows, picks] = values[:, column]
+            values[:, column] = picked
+        self.shuffled = max(self.shuffled, depth)
+
+    def column(self, index):
+        self.shuffle_to(index + 1)
+        return self.values[:, index]
+
+    def draw(self, rows, positions):
+        self.shuffle_to(int(positions.max()) + 1)
+        return self.values[rows, positions]
+
+def simulate_vectorized(rounds, strategy, decks=1, seed=None):
+    """
+    Plays 'rounds' rounds at once, each from its own freshly shuffled shoe.
+    Every step (deal, player hit, dealer hit) is applied to all hands still
+    drawing in one array operation.
+    Returns:
+        (wins, losses, ties)
+    """
+    hit_table = np.array(strategy, dtype=bool)
+    shoes = ShuffledShoes(rounds, decks, np.random.default_rng(seed))
+
+    zeros = np.zeros(rounds, dtype=np.int16)
+    player_total, player_soft = _add_cards(*_add_cards(zeros, zeros, shoes.column(0)), shoes.column(1))
+    upcard = shoes.column(2)
+    dealer_total, dealer_soft = _add_cards(*_add_cards(zeros, zeros, upcard), shoes.column(3))
+    position = np.full(rounds, 4)
+
+    # Player's turn: hands that hit draw the next card of their shoe
+    drawing = np.flatnonzero(hit_table[(player_soft > 0).astype(np.intp), player_total, upcard])
+    while drawing.size:
+        total, soft = _add_cards(player_total[drawing], player_soft[drawing], shoes.draw(drawing, position[drawing]))
+        player_total[drawing] = total
+        player_soft[drawing] = soft
+        position[drawing] += 1
+        drawing = drawing[hit_table[(soft > 0).astype(np.intp), total, upcard[drawing]]]
+
+    # Dealer's turn (only against hands that did not bust)
+    player_busted = player_total > BLACKJACK
+    drawing = np.flatnonzero(~player_busted & (dealer_total < DEALER_STANDS_ON))
+    while drawing.size:
+        total, soft = _add_cards(dealer_total[drawing], dealer_soft[drawing], shoes.draw(drawing, position[drawing]))
+        dealer_total[drawing] = total
+        dealer_soft[drawing] = soft
+        position[drawing] += 1
+        drawing = drawing[total < DEALER_STANDS_ON]
+
+    standing = ~player_busted
+    wins = int(np.count_nonzero(standing & ((dealer_total > BLACKJACK) | (player_total > dealer_total))))
+    ties = int(np.count_nonzero(standing & (dealer_total <= BLACKJACK) & (player_total == dealer_total)))
+    return wins, rounds - wins - ties, ties
+
+# --- Batches and the process pool ---
+def run_batch(rounds, strategy_name, decks, penetration, seed, vectorized):
+    """
+    Plays one batch (runs in a pool worker). Returns (wins, losses, ties).
+    """
+    strategy = get_strategy(strategy_name)
+    if vectorized:
+        return simulate_vectorized(rounds, strategy, decks, seed)
+    return simulate_scalar(rounds, strategy, decks, penetration, seed)
+
+def simulate(rounds, strategy_name="basic", decks=1, penetration=0.0, workers=None,
+             batch_size=DEFAULT_BATCH, seed=None, vectorized=None):
+    """
+    Plays 'rounds' rounds split into batches across 'workers' processes.
+    Args:
+        vectorized (bool): Force an engine; by default the vectorized one is used
+            whenever NumPy is installed and the shoe is reshuffled every round.
+    Returns:
+        dict: rounds, wins, losses, ties, seconds, engine.
+    Raises:
+        ValueError: For fewer than one round or batch size, an unknown strategy,
+                    or the vectorized engine without NumPy.
+    """
+    if rounds < 1:
+        raise ValueError(f"Rounds must be at least 1, got {rounds}")
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+    get_strategy(strategy_name)  # Fail early on a bad name
+    if vectorized is None:
+        vectorized = np is not None and penetration == 0.0
+    if vectorized and np is None:
+        raise ValueError("The vectorized engine needs NumPy")
+    workers = workers or os.cpu_count() or 1
+
+    seeds = random.Random(seed)
+    batches = []
+    for start in range(0, rounds, batch_size):
+        batches.append((min(batch_size, rounds - start), strategy_name, decks, penetration, seeds.getrandbits(64), vectorized))
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [run_batch(*batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_batch, *zip(*batches)))
+    seconds = time.perf_counter() - started
+
+    wins, losses, ties = (sum(column) for column in zip(*results))
+    return {
+        "rounds": rounds, "wins": wins, "losses": losses, "ties": ties,
+        "seconds": seconds, "engine": "vectorized" if vectorized else "scalar",
+    }
+
+def check_engines(rounds, strategy_name="basic", decks=1, workers=None, seed=None, z=Z_CHECK):
+    """
+    Plays 'rounds' rounds on a fresh shoe every round with the vectorized
+    engine, then with the scalar one (engine.RoundEngine).
+    Returns:
+        (vectorized result, scalar result, agree): agree is False if a win, loss
+            or tie rate differs by more than z standard errors of the difference.
+    """
+    vectorized = simulate(rounds, strategy_name, decks, 0.0, workers, seed=seed, vectorized=True)
+    scalar = simulate(rounds, strategy_name, decks, 0.0, workers, seed=seed, vectorized=False)
+    agree = True
+    for key in ("wins", "losses", "ties"):
+        rate, half_width = confidence_interval(vectorized[key], rounds, z)
+        other_rate, other_half_width = confidence_interval(scalar[key], rounds, z)
+        agree = agree and abs(rate - other_rate) <= math.hypot(half_width, other_half_width)
+    return vectorized, scalar, agree
+
+def confidence_interval(successes, n, z=Z_95):
+    """
+    Normal-approximation interval for a rate. Returns (rate, half_width).
+    """
+    rate = successes / n
+    return rate, z * math.sqrt(rate * (1.0 - rate) / n)
+
+def expected_value(result, z=Z_95):
+    """
+    Mean result per round (+1 win, -1 loss, 0 tie). Returns (ev, half_width).
+    """
+    n = result["rounds"]
+    ev = (result["wins"] - result["losses"]) / n
+    variance = (result["wins"] + result["losses"]) / n - ev * ev
+    return ev, z * math.sqrt(variance / n)
+
+def print_report(result):
+    n = result["rounds"]
+    print(f"{n:,} rounds in {result['seconds']:.2f}s ({n / result['seconds']:,.0f} rounds/s, {result['engine']})")
+    for label, key in (("Win", "wins"), ("Loss", "losses"), ("Tie", "ties")):
+        rate, half_width = confidence_interval(result[key], n)
+        print(f"  {label:<5}{rate * 100:7.3f}% ± {half_width * 100:.3f}%")
+    ev, half_width = expected_value(result)
+    print(f"  EV  {ev:+8.4f} ± {half_width:.4f} per round (95% CI)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Blackjack rounds under the server's rules.")
+    parser.add_argument("--rounds", type=int, default=1000000)
+    parser.add_argument("--strategy", default="basic", help="'basic', 'stand-on-N' or 'stand-on-N-soft-M'")
+    parser.add_argument("--decks", type=int, default=1)
+    parser.add_argument("--penetration", type=float, default=0.0,
+                        help="Cut card position; above 0 uses the scalar engine (persistent shoe)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Rounds per batch")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--scalar", action="store_true", help="Use the scalar engine even with NumPy")
+    parser.add_argument("--check", action="store_true",
+                        help="Play the rounds with both engines (fresh shoes) and compare their rates")
+    args = parser.parse_args()
+
+    if args.check:
+        if np is None:
+            parser.error("--check needs NumPy")
+        try:
+            vectorized, scalar, agree = check_engines(args.rounds, args.strategy, args.decks, args.workers, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+        print_report(vectorized)
+        print_report(scalar)
+        print("Engines agree." if agree else "ENGINES DISAGREE: the vectorized rules differ from engine.py.")
+        sys.exit(0 if agree else 1)
+    try:
+        result = simulate(args.rounds, args.strategy, args.decks, args.penetration, args.workers,
+                          args.batch, args.seed, vectorized=False if args.scalar else None)
+    except ValueError as e:
+        parser.error(str(e))
+    print_report(result)
+
+if __name__ == "__main__":
+    main()
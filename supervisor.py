@@ -0,0 +1,248 @@
+"""
+Supervisor mode: several server processes sharing one TCP port.
+
+One BlackjackServer is a single CPython process, so the GIL keeps all game
+logic on one core. The supervisor starts N worker processes that each listen
+on the same port with SO_REUSEPORT; the kernel spreads new connections across
+them. Only the supervisor broadcasts UDP offers (one offer for the shared
+port). Workers that exit are restarted, and their counters are summed into
+periodic reports.
+
+Started from server.py:
+    python server.py --workers 4 --mode asyncio
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import gamelog
+
+from server import BlackjackServer, STAT_KEYS
+
+PUBLISH_INTERVAL = 0.5  # How often a worker copies its counters to shared memory (seconds)
+CHECK_INTERVAL = 0.5    # How often the supervisor looks for workers that exited
+RESTART_DELAY = 1.0     # Minimum time between two starts of the same worker (avoids crash loops)
+
+def reserve_port(port):
+    """
+    Binds (without listening) a SO_REUSEPORT socket, so a requested port of 0 is
+    resolved once and the port stays ours while workers come and go.
+    Returns:
+        socket: The bound socket; its port is getsockname()[1].
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(('', port))
+    return sock
+
+def run_worker(worker_id, port, mode, server_options, counters, log_settings):
+    """
+    Worker process: serves games on the shared port and publishes its counters
+    into its own slot of the shared 'counters' array.
+    """
+    # Ctrl+C reaches the whole process group: let the supervisor decide when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # The supervisor forwards SIGUSR1; the log writer thread has to be started again in this process
+    signal.signal(signal.SIGUSR1, gamelog.toggle_trace)
+    gamelog.setup(**log_settings)
+
+    options = dict(server_options)
+    if options.get("metrics_port"):
+        # Every worker serves its own metrics endpoint, one port apart
+        options["metrics_port"] += worker_id
+    if options.get("journal_path"):
+        # One journal file per worker: PATH.0, PATH.1, ...
+        options["journal_path"] = f"{options['journal_path']}.{worker_id}"
+    server = BlackjackServer(port=port, reuse_port=True, broadcast=False, **options)
+    slot = worker_id * len(STAT_KEYS)
+
+    def publish():
+        while True:
+            counters[slot:slot + len(STAT_KEYS)] = server.metrics.counter_values(STAT_KEYS)
+            time.sleep(PUBLISH_INTERVAL)
+
+    publisher = threading.Thread(target=publish)
+    publisher.daemon = True
+    publisher.start()
+
+    if mode == "asyncio":
+        server.start_async_server()
+    else:
+        server.start_server()
+
+class Supervisor:
+    """
+    Starts, watches and restarts the worker processes, and runs the broadcaster.
+    """
+
+    def __init__(self, workers, port=0, mode="threaded", stats_interval=10.0, **server_options):
+        """
+        Args:
+            workers (int): Number of worker processes.
+            port (int): Shared TCP port (0 = any free port).
+            mode (str): Server mode of every worker ("threaded" or "asyncio").
+            stats_interval (float): Seconds between aggregate stats reports.
+            server_options: Passed to each worker's BlackjackServer (pacing, decks, ...).
+        """
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("Supervisor mode needs SO_REUSEPORT (Linux, macOS or BSD)")
+        if workers < 1:
+            raise ValueError(f"Need at least one worker, got {workers}")
+
+        self.workers = workers
+        self.port = port
+        self.mode = mode
+        self.stats_interval = stats_interval
+        self.server_options = server_options
+
+        # One slot of len(STAT_KEYS) counters per worker, written only by that worker
+        self.counters = multiprocessing.Array('q', workers * len(STAT_KEYS), lock=False)
+        # Counters of worker processes that have exited (their slot is reused)
+        self.retired = dict.fromkeys(STAT_KEYS, 0)
+        self.processes = [None] * workers
+        self.started_at = [0.0] * workers
+        self.restarts = 0
+        self.running = True
+
+        # Advertises the shared port; built here so bad server options fail before any worker starts
+        self.broadcaster = BlackjackServer(port=port, **server_options)
+
+    def start_worker(self, worker_id):
+        process = multiprocessing.Process(
+            target=run_worker, name=f"blackjack-worker-{worker_id}",
+            args=(worker_id, self.port, self.mode, self.server_options, self.counters,
+                  gamelog.settings()))
+        process.daemon = True
+        process.start()
+        self.processes[worker_id] = process
+        self.started_at[worker_id] = time.monotonic()
+
+    def worker_counters(self, worker_id):
+        slot = worker_id * len(STAT_KEYS)
+        return dict(zip(STAT_KEYS, self.counters[slot:slot + len(STAT_KEYS)]))
+
+    def retire_worker(self, worker_id):
+        """
+        Keeps what an exited worker counted, then clears its slot for the replacement.
+        Sessions it had in play died with it: they are counted as finished, so the
+        active session count (advertised in load offers) does not stay inflated.
+        Returns:
+            int: The sessions that were in play.
+        """
+        counters = self.worker_counters(worker_id)
+        lost = max(0, counters["sessions_started"] - counters["sessions_finished"])
+        counters["sessions_finished"] += lost
+        for key, value in counters.items():
+            self.retired[key] += value
+        slot = worker_id * len(STAT_KEYS)
+        self.counters[slot:slot + len(STAT_KEYS)] = [0] * len(STAT_KEYS)
+        self.processes[worker_id] = None
+        return lost
+
+    def check_workers(self):
+        """
+        Restarts workers that exited (no sooner than RESTART_DELAY after their last start).
+        """
+        for worker_id, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                lost = self.retire_worker(worker_id)
+                gamelog.warning("worker_exited", "[supervisor] Worker %(worker)s (pid %(pid)s) exited with code "
+                                "%(code)s, dropping %(lost)s session(s) in play",
+                                worker=worker_id, pid=process.pid, code=process.exitcode, lost=lost)
+
+            if self.processes[worker_id] is None and time.monotonic() - self.started_at[worker_id] >= RESTART_DELAY:
+                self.start_worker(worker_id)
+                self.restarts += 1
+                gamelog.info("worker_restarted", "[supervisor] Restarted worker %(worker)s (pid %(pid)s)",
+                             worker=worker_id, pid=self.processes[worker_id].pid)
+
+    def totals(self):
+        """
+        Counters summed over every worker, past and present.
+        """
+        totals = dict(self.retired)
+        for worker_id in range(self.workers):
+            for key, value in self.worker_counters(worker_id).items():
+                totals[key] += value
+        return totals
+
+    def active_sessions(self):
+        totals = self.totals()
+        return totals["sessions_started"] - totals["sessions_finished"]
+
+    def report(self, rounds_per_s):
+        totals = self.totals()
+        alive = sum(1 for process in self.processes if process is not None and process.is_alive())
+        active = totals["sessions_started"] - totals["sessions_finished"]
+        per_worker = " ".join(str(self.worker_counters(i)["sessions_started"]) for i in range(self.workers))
+        gamelog.info("supervisor_stats",
+                     "[supervisor] %(alive)s/%(workers)s workers up, %(restarts)s restarts | "
+                     "sessions %(sessions_started)s started, %(sessions_finished)s finished, %(active)s active | "
+                     "rounds %(rounds_played)s (%(rounds_per_s).1f/s) | sessions per worker: %(per_worker)s",
+                     alive=alive, workers=self.workers, restarts=self.restarts, active=active,
+                     rounds_per_s=rounds_per_s, per_worker=per_worker, **totals)
+
+    def run(self):
+        """
+        Main entry point (supervisor mode). Runs until Ctrl+C or SIGTERM.
+        """
+        reserved = reserve_port(self.port)
+        self.port = reserved.getsockname()[1]
+        gamelog.info("supervisor_started", "[supervisor] %(workers)s %(mode)s workers sharing TCP port %(port)s",
+                     workers=self.workers, mode=self.mode, port=self.port)
+
+        # SIGTERM stops the supervisor like Ctrl+C, so the workers are stopped too
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        signal.signal(signal.SIGUSR1, self.forward_trace_toggle)
+
+        for worker_id in range(self.workers):
+            self.start_worker(worker_id)
+
+        # A single broadcaster advertises the shared port, and the load of all workers together
+        self.broadcaster.tcp_port = self.port
+        self.broadcaster.capacity *= self.workers
+        self.broadcaster.session_count = self.active_sessions
+        self.broadcaster.start_broadcast_thread()
+
+        last_report = time.monotonic()
+        last_rounds = 0
+        try:
+            while self.running:
+                time.sleep(CHECK_INTERVAL)
+                self.check_workers()
+
+                now = time.monotonic()
+                if now - last_report >= self.stats_interval:
+                    rounds = self.totals()["rounds_played"]
+                    self.report((rounds - last_rounds) / (now - last_report))
+                    last_report, last_rounds = now, rounds
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            self.broadcaster.running = False
+            self.stop_workers()
+            reserved.close()
+            self.report(0.0)
+
+    def forward_trace_toggle(self, *_signal_args):
+        """
+        SIGUSR1 handler: toggles trace logging here and in every worker.
+        """
+        gamelog.toggle_trace()
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, signal.SIGUSR1)
+
+    def stop_workers(self):
+        for process in self.processes:
+            if process is not None:
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join()
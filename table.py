@@ -0,0 +1,431 @@
+"""
+Shared tables: several players against one dealer, dealt from one shoe
+(requested with FLAG_TABLE in a v2 Request).
+
+A table seats up to N players and plays rounds while anyone is seated; new
+players sit down between rounds. Each round:
+    1. every seat gets two cards and the dealer an upcard;
+    2. the seats play their turns in seat order (a Turn message says whose);
+    3. one dealer turn settles every seat still in the round.
+Every message is packed once and written to all seats (fan-out), so each
+player sees the others' cards: a Table Cards message names the seat it belongs
+to, and a Round End message closes the round.
+
+While a player is seated, the table's own thread (threaded mode) or task
+(asyncio mode) does every read and write on the connection; the connection's
+handler waits for Seat.done and then carries on with keep-alive or closes.
+
+The rules are engine.TableEngine's. With a server journal, each seat's cards,
+decisions and results go to its player's session, numbered by the player's
+own rounds, just as a private session's would.
+"""
+import asyncio
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from framing import read_frame_async
+import gamelog
+import pacing
+import protocol
+from protocol import *
+from cards import *
+from engine import TableEngine
+
+class Seat:
+    """
+    One player at a table. 'conn' and 'reader' are the connection's socket and
+    FrameReader (threaded mode) or StreamWriter and StreamReader (asyncio mode);
+    'done' is a threading.Event or asyncio.Event, set when the player leaves.
+    'journal_session' is the player's journal session id (None without a journal).
+    """
+
+    __slots__ = ("team_name", "rounds_left", "conn", "reader", "done", "journal_session", "number", "round_num",
+                 "hand", "busted", "gone", "bytes_in", "bytes_out", "decision_waits")
+
+    def __init__(self, team_name, rounds, conn, reader, done, journal_session=None):
+        self.team_name = team_name
+        self.rounds_left = rounds
+        self.conn = conn
+        self.reader = reader
+        self.done = done
+        self.journal_session = journal_session
+        self.number = None  # Assigned when the player sits down
+        self.round_num = 0  # Rounds dealt to this player
+        self.hand = None    # The seat's hand in the table's engine
+        self.busted = False  # Out of the current round (busted or dropped)
+        self.gone = False   # Connection lost (or timed out writing): leaves after the round
+        # Traffic and decision waits since the last round was recorded (see metrics.ServerMetrics.record_round)
+        self.bytes_in = self.bytes_out = 0
+        self.decision_waits = []
+
+# --- Round Steps (no I/O) ---
+# Each step feeds one event to the table's engine, journals every seat's records
+# ('journal' may be None) and returns the packed messages for the whole table
+def deal_round(engine, seats, round_num, journal):
+    """
+    Two cards to every seat, then the dealer's upcard and hole card.
+    Returns:
+        bytes: The packed deal (the hole card is not sent).
+    """
+    dealt = engine.start_round(seat.number for seat in seats)
+    parts = []
+    for seat in seats:
+        events = dealt[seat.number]
+        seat.hand = engine.hands[seat.number]
+        seat.round_num += 1
+        seat.busted = seat.gone  # A seat that dropped since the last round sits this one out
+        if seat.gone:
+            engine.forfeit(seat.number)
+        elif journal:
+            journal.record_events(seat.journal_session, seat.round_num, events)
+        # Two cards can never bust, so every seat still plays its turn
+        parts.append(protocol.pack_table_cards(round_num, seat.number, RESULT_NOT_OVER,
+                                               [CARD_WIRE[event.card] for event in events[:2]]))
+    parts.append(protocol.pack_table_cards(round_num, DEALER_SEAT, RESULT_NOT_OVER,
+                                           [CARD_WIRE[engine.dealer_hand.cards[0]]]))
+    return b"".join(parts)
+
+def hit(engine, seat, round_num, journal):
+    """
+    Deals one card to a seat that hit.
+    Returns:
+        bytes: The packed card, carrying RESULT_LOSS if it busted the seat.
+    """
+    events = engine.hit(seat.number)
+    card = events[0].card
+    seat.busted = len(events) > 1
+    if journal:
+        journal.record_events(seat.journal_session, seat.round_num, events, ACTION_HIT)
+    gamelog.trace("table_card", "  Seat %(seat)s got: %(card)s", seat=seat.number, card=CARD_NAME[card])
+    return protocol.pack_table_cards(round_num, seat.number, RESULT_LOSS if seat.busted else RESULT_NOT_OVER,
+                                     [CARD_WIRE[card]])
+
+def settle_round(engine, seats, round_num, journal):
+    """
+    Plays the dealer's turn (only if some seat is still in the round) and
+    decides every seat that did not bust.
+    Returns:
+        bytes: The dealer's hole card and draws, each remaining seat's result, then Round End.
+    """
+    dealer_events, settled = engine.settle()
+    dealer_hand = engine.dealer_hand
+    gamelog.trace("table_dealer", "Dealer: %(cards)s (%(score)s)",
+        cards=" ".join(CARD_NAME[c] for c in dealer_hand.cards), score=dealer_hand.total)
+
+    parts = [protocol.pack_table_cards(round_num, DEALER_SEAT, RESULT_NOT_OVER,
+                                       [CARD_WIRE[event.card] for event in dealer_events])]
+    for seat in seats:
+        outcome = settled.get(seat.number)
+        if outcome:
+            if journal:
+                journal.record_events(seat.journal_session, seat.round_num, dealer_events + [outcome])
+            parts.append(protocol.pack_table_cards(round_num, seat.number, outcome.result, []))
+    parts.append(protocol.pack_round_end(round_num))
+    return b"".join(parts)
+
+# --- Tables ---
+class Table(ABC):
+    """
+    Seats, shoe and round flow of one table. ThreadedTable and AsyncTable add
+    the I/O: writing to a seat and reading its decisions.
+    """
+
+    def __init__(self, lobby, table_id, size, session_pacing, shoe):
+        self.lobby = lobby
+        self.metrics = lobby.server.metrics
+        self.table_id = table_id
+        self.size = size
+        self.pacing = session_pacing
+        self.shoe = shoe
+        self.engine = TableEngine(shoe, size)
+        self.journal = lobby.server.journal
+        # Changed under lobby.lock: other connections add themselves to 'joining'
+        self.seats = []    # Seated players, in seat order
+        self.joining = []  # Players waiting for the next round
+        self.open = True   # False once the table has emptied and left the lobby
+        self.round_num = 0
+
+    def has_room(self):
+        return self.open and len(self.seats) + len(self.joining) < self.size
+
+    @abstractmethod
+    def send(self, seat, data):
+        """
+        Writes packed messages to one seat, dropping the seat if that fails.
+        """
+
+    def fan_out(self, data):
+        """
+        Writes one packed message to every seat still connected.
+        """
+        for seat in self.seats:
+            if not seat.gone:
+                self.send(seat, data)
+
+    def drop(self, seat, reason):
+        """
+        Marks a seat whose connection failed: its hand is forfeited and it leaves
+        after the round.
+        """
+        if not seat.gone:
+            gamelog.warning("table_drop", "Table %(table)s: seat %(seat)s dropped (%(reason)s)",
+                table=self.table_id, seat=seat.number, reason=reason)
+        seat.gone = True
+        seat.busted = True
+        self.engine.forfeit(seat.number)
+
+    def seat_newcomers(self):
+        """
+        Sits waiting players down on free seats and announces them. When nobody
+        is seated or waiting, closes the table instead.
+        Returns:
+            bool: False if the table closed.
+        """
+        with self.lobby.lock:
+            newcomers, self.joining = self.joining, []
+            if not newcomers and not self.seats:
+                self.open = False
+                self.lobby.tables.remove(self)
+            else:
+                taken = {seat.number for seat in self.seats}
+                free = (number for number in range(self.size) if number not in taken)
+                for seat, number in zip(newcomers, free):
+                    seat.number = number
+                self.seats = sorted(self.seats + newcomers, key=lambda seat: seat.number)
+
+        if not self.open:
+            self.lobby.server.release_shoe(self.shoe)
+            gamelog.info("table_close", "Table %(table)s closed", table=self.table_id)
+            return False
+        if not newcomers:
+            return True
+
+        joined = b"".join(protocol.pack_seat_event(seat.number, SEAT_JOINED, seat.team_name) for seat in newcomers)
+        for seat in self.seats:
+            if seat in newcomers:
+                # The newcomer learns its own seat, then everyone at the table
+                others = b"".join(protocol.pack_seat_event(other.number, SEAT_JOINED, other.team_name)
+                                  for other in self.seats if other is not seat)
+                self.send(seat, protocol.pack_seat_event(seat.number, SEAT_YOU, seat.team_name) + others)
+                gamelog.info("table_join", "Team '%(team)s' sat down at table %(table)s, seat %(seat)s",
+                    team=seat.team_name, table=self.table_id, seat=seat.number)
+            elif not seat.gone:
+                self.send(seat, joined)
+        return True
+
+    def start_round(self):
+        """
+        Deals a new round to every seat.
+        """
+        self.round_num += 1
+        gamelog.trace("table_round", "\n--- Table %(table)s, round %(round)s, %(seats)s seat(s) ---",
+            table=self.table_id, round=self.round_num, seats=len(self.seats))
+        self.fan_out(deal_round(self.engine, self.seats, self.round_num, self.journal))
+
+    def accept_decision(self, seat, frame):
+        """
+        Applies one decision frame read from the seat whose turn it is.
+        Returns:
+            bool: True if the seat's turn is over (stood, busted or sent garbage).
+        """
+        seat.bytes_in += len(frame)
+        msg = protocol.unpack_decision_from(frame)
+        if not msg:
+            self.drop(seat, "invalid message")
+            return True
+        # Skip decisions sent ahead for a round that already ended
+        if msg.round_tag is not None and msg.round_tag != self.round_num & ROUND_TAG_MASK:
+            return False
+        if msg.decision == ACTION_STAND:
+            gamelog.trace("table_stand", "  Seat %(seat)s stands on %(score)s", seat=seat.number, score=seat.hand.total)
+            if self.journal:
+                self.journal.record_events(seat.journal_session, seat.round_num, (), ACTION_STAND)
+            return True
+        if msg.decision == ACTION_HIT:
+            self.fan_out(hit(self.engine, seat, self.round_num, self.journal))
+            return seat.busted
+        return False
+
+    def finish_round(self, started):
+        """
+        Settles the round, records it for every seat, and lets go of the seats
+        that played their last round (or dropped).
+        """
+        self.fan_out(settle_round(self.engine, self.seats, self.round_num, self.journal))
+
+        seconds = time.perf_counter() - started
+        for seat in self.seats:
+            self.metrics.record_round(seconds, seat.bytes_in, seat.bytes_out, seat.decision_waits)
+            seat.bytes_in = seat.bytes_out = 0
+            seat.decision_waits = []
+            seat.rounds_left -= 1
+
+        leaving = [seat for seat in self.seats if seat.gone or seat.rounds_left <= 0]
+        if not leaving:
+            return
+        with self.lobby.lock:
+            self.seats = [seat for seat in self.seats if seat not in leaving]
+        self.fan_out(b"".join(protocol.pack_seat_event(seat.number, SEAT_LEFT, seat.team_name) for seat in leaving))
+        for seat in leaving:
+            gamelog.info("table_leave", "Team '%(team)s' left table %(table)s", team=seat.team_name, table=self.table_id)
+            seat.done.set()
+
+    def abandon(self):
+        """
+        Releases every player after an unexpected error (their handlers stop
+        waiting and close the connections).
+        """
+        with self.lobby.lock:
+            stranded = self.seats + self.joining
+            self.seats, self.joining = [], []
+            if self.open:
+                self.open = False
+                self.lobby.tables.remove(self)
+                self.lobby.server.release_shoe(self.shoe)
+        for seat in stranded:
+            seat.gone = True
+            seat.done.set()
+
+class ThreadedTable(Table):
+    """
+    A table run by its own thread, with blocking socket I/O (threaded mode).
+    Seat sockets have a TABLE_TURN_TIMEOUT timeout, for reads and writes alike.
+    """
+
+    def start(self):
+        threading.Thread(target=self.run, name=f"table-{self.table_id}", daemon=True).start()
+
+    def send(self, seat, data):
+        try:
+            seat.conn.sendall(data)
+            seat.bytes_out += len(data)
+        except OSError as e:
+            self.drop(seat, str(e) or "write timed out")
+
+    def play_turn(self, seat):
+        self.fan_out(protocol.pack_turn(self.round_num, seat.number))
+        while not seat.gone:
+            asked = time.perf_counter()
+            try:
+                frame = seat.reader.read_frame()
+            except socket.timeout:
+                gamelog.info("table_turn_timeout", "Seat %(seat)s took too long, standing", seat=seat.number)
+                return
+            except (OSError, ValueError) as e:
+                self.drop(seat, str(e))
+                return
+            seat.decision_waits.append(time.perf_counter() - asked)
+            if self.accept_decision(seat, frame):
+                return
+
+    def run(self):
+        try:
+            while True:
+                # The pause between rounds also lets players gather at a new table
+                self.pacing.wait(pacing.DELAY_ROUND_END)
+                if not self.seat_newcomers():
+                    return
+                started = time.perf_counter()
+                self.start_round()
+                for seat in self.seats:
+                    if not seat.busted:
+                        self.play_turn(seat)
+                self.finish_round(started)
+        except Exception as e:
+            gamelog.warning("table_error", "Table %(table)s error: %(error)s", table=self.table_id, error=str(e))
+            self.abandon()
+
+class AsyncTable(Table):
+    """
+    A table run as a task on the event loop (asyncio mode).
+    Writes never wait: a seat whose unsent data passes TABLE_WRITE_BUFFER_LIMIT
+    (its player stopped reading) is dropped, the way a threaded table's send
+    times out, instead of holding up the other seats.
+    """
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def send(self, seat, data):
+        if seat.conn.is_closing():
+            self.drop(seat, "connection closed")
+            return
+        if seat.conn.transport.get_write_buffer_size() > TABLE_WRITE_BUFFER_LIMIT:
+            self.drop(seat, "not reading")
+            return
+        seat.conn.write(data)
+        seat.bytes_out += len(data)
+
+    async def play_turn(self, seat):
+        self.fan_out(protocol.pack_turn(self.round_num, seat.number))
+        while not seat.gone:
+            asked = time.perf_counter()
+            try:
+                frame = await read_frame_async(seat.reader, protocol.client_frame_length, protocol.HEADER_SIZE,
+                                               TABLE_TURN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # No decision began: nothing was read, so the seat can stand and stay
+                gamelog.info("table_turn_timeout", "Seat %(seat)s took too long, standing", seat=seat.number)
+                return
+            except (asyncio.IncompleteReadError, OSError, ValueError) as e:
+                self.drop(seat, str(e) or "connection closed")
+                return
+            seat.decision_waits.append(time.perf_counter() - asked)
+            if self.accept_decision(seat, frame):
+                return
+
+    async def run(self):
+        try:
+            while True:
+                await self.pacing.wait_async(pacing.DELAY_ROUND_END)
+                if not self.seat_newcomers():
+                    return
+                started = time.perf_counter()
+                self.start_round()
+                for seat in self.seats:
+                    if not seat.busted:
+                        await self.play_turn(seat)
+                self.finish_round(started)
+        except Exception as e:
+            gamelog.warning("table_error", "Table %(table)s error: %(error)s", table=self.table_id, error=str(e))
+            self.abandon()
+
+class TableLobby:
+    """
+    The open tables of one server. A player joins the first table with the same
+    pacing and a free seat; when every such table is full, a new one opens with
+    a shoe from the server's pool.
+    """
+
+    def __init__(self, server, size=TABLE_SEATS):
+        if not 1 <= size <= MAX_TABLE_SEATS:
+            raise ValueError(f"Seats per table must be between 1 and {MAX_TABLE_SEATS}")
+        self.server = server
+        self.size = size
+        self.lock = threading.Lock()
+        self.tables = []
+        self.next_id = 1
+
+    def join(self, seat, session_pacing, table_class):
+        """
+        Queues a player for the next round of a table (seat.done is set when the
+        player leaves it).
+        Args:
+            table_class: ThreadedTable or AsyncTable, matching the server mode.
+        """
+        if seat.rounds_left <= 0:
+            seat.done.set()
+            return
+        with self.lock:
+            for table in self.tables:
+                if table.pacing is session_pacing and table.has_room():
+                    table.joining.append(seat)
+                    return
+            table = table_class(self, self.next_id, self.size, session_pacing, self.server.acquire_shoe())
+            self.next_id += 1
+            table.joining.append(seat)
+            self.tables.append(table)
+        gamelog.info("table_open", "Table %(table)s opened (%(seats)s seats)", table=table.table_id, seats=self.size)
+        table.start()